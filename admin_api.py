@@ -0,0 +1,114 @@
+"""
+관리(admin) API
+운영 중인 서버를 재시작하지 않고 제어하기 위한 HTTP 경로와 인증 도우미를 제공합니다.
+
+인증: config.json의 server.admin_token
+    - 설정된 경우: 'Authorization: Bearer <token>' 또는 'X-Admin-Token' 헤더가 일치해야 합니다.
+    - 비어 있는 경우: localhost에서 온 요청만 허용합니다.
+
+    GET  /admin/stream_profile   현재 스트림 프로파일
+    POST /admin/stream_profile   {"width": 640, "height": 480, "fps": 30, "streams": ["color", "depth"], "persist": false}
+    GET  /admin/profiler         ?seconds=10&interval_ms=10&tracemalloc=1&top=25&idle=0&format=json|collapsed
+                                 N초 동안 샘플링한 collapsed 스택(flamegraph)과 상위 할당 위치 (sampling_profiler 참고)
+"""
+
+import hmac
+import json
+import logging
+from typing import Optional, Callable, Awaitable, Dict, Any
+from aiohttp import web
+from config import Config
+from realsense_manager import RealSenseManager
+from sampling_profiler import SamplingProfiler
+
+logger = logging.getLogger(__name__)
+
+LOOPBACK_ADDRESSES = ('127.0.0.1', '::1', 'localhost')
+TRUE_VALUES = ('1', 'true', 'yes', 'on')
+
+# 프로파일 변경 후 호출할 코루틴 (Socket.IO 클라이언트 알림 등)
+ProfileChangedCallback = Callable[[Dict[str, Any]], Awaitable[None]]
+
+
+def is_admin_authorized(token: Optional[str], remote: Optional[str]) -> bool:
+    """관리 요청이 허용되는지 확인합니다."""
+    expected = Config().get_server_config().get('admin_token', '')
+    if not expected:
+        return remote in LOOPBACK_ADDRESSES
+    return bool(token) and hmac.compare_digest(str(token), str(expected))
+
+
+def _request_token(request: web.Request) -> Optional[str]:
+    auth = request.headers.get('Authorization', '')
+    if auth.startswith('Bearer '):
+        return auth[len('Bearer '):].strip()
+    return request.headers.get('X-Admin-Token')
+
+
+def require_admin(request: web.Request):
+    """관리 권한이 없으면 403을 발생시킵니다."""
+    if not is_admin_authorized(_request_token(request), request.remote):
+        logger.warning(f"Unauthorized admin request from {request.remote}: {request.path}")
+        raise web.HTTPForbidden(text="Admin token required.")
+
+
+async def apply_stream_profile(params: Dict[str, Any]) -> Dict[str, Any]:
+    """요청 파라미터로 RealSenseManager 프로파일을 변경합니다. (잘못된 요청은 ValueError)"""
+    if not isinstance(params, dict):
+        raise ValueError("Request body must be a JSON object.")
+    streams = params.get('streams')
+    return await RealSenseManager().reconfigure(
+        width=params.get('width'),
+        height=params.get('height'),
+        fps=params.get('fps'),
+        streams=set(streams) if streams is not None else None,
+        persist=bool(params.get('persist', False)),
+    )
+
+
+def setup_routes(app: web.Application, on_profile_changed: Optional[ProfileChangedCallback] = None):
+    """aiohttp 앱에 관리 API 경로를 등록합니다."""
+
+    async def get_stream_profile(request: web.Request) -> web.Response:
+        require_admin(request)
+        return web.json_response(RealSenseManager().get_stream_profile())
+
+    async def post_stream_profile(request: web.Request) -> web.Response:
+        require_admin(request)
+        try:
+            params = await request.json()
+        except json.JSONDecodeError as e:
+            raise web.HTTPBadRequest(text=f"Invalid JSON body: {e}")
+        try:
+            result = await apply_stream_profile(params)
+        except (ValueError, TypeError) as e:
+            raise web.HTTPBadRequest(text=str(e))
+
+        if result["changed"] and on_profile_changed is not None:
+            await on_profile_changed(result)
+        return web.json_response(result)
+
+    async def get_profiler(request: web.Request) -> web.Response:
+        require_admin(request)
+        query = request.query
+        try:
+            result = await SamplingProfiler().profile(
+                seconds=float(query.get('seconds', 10)),
+                interval_ms=float(query.get('interval_ms', 10)),
+                trace_allocations=query.get('tracemalloc', '0').lower() in TRUE_VALUES,
+                top=int(query.get('top', 25)),
+                include_idle=query.get('idle', '0').lower() in TRUE_VALUES,
+            )
+        except ValueError as e:
+            raise web.HTTPBadRequest(text=str(e))
+        except RuntimeError as e:
+            raise web.HTTPConflict(text=str(e))
+
+        if query.get('format') == 'collapsed':
+            return web.Response(text=result['collapsed'], content_type='text/plain',
+                                headers={'Content-Disposition': 'attachment; filename="rsunity.folded"'})
+        return web.json_response(result)
+
+    app.router.add_get('/admin/stream_profile', get_stream_profile)
+    app.router.add_post('/admin/stream_profile', post_stream_profile)
+    app.router.add_get('/admin/profiler', get_profiler)
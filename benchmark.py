@@ -0,0 +1,161 @@
+"""
+메시지 분배 벤치마크
+카메라 없이 합성 프레임을 바이너리 WebSocket 클라이언트 N개에게 분배하여
+이벤트 루프 구현(asyncio, uvloop)별 메시지 처리량, 전달 지연, 루프 지연, CPU 사용량을 비교합니다.
+서버와 클라이언트가 같은 루프에서 실행되므로 메시지당 스케줄링 비용이 그대로 드러납니다.
+
+사용법:
+    python benchmark.py --loop both --clients 50 --fps 30 --size 20000 --duration 10
+    python benchmark.py --loop uvloop --json
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import os
+import time
+from typing import Dict, Any, List
+import aiohttp
+from aiohttp import web
+from binary_protocol import pack_frame, unpack_header
+from frame_cache import EncodedFrame
+from loop_monitor import LoopLagMonitor, run_event_loop, is_uvloop_available, describe_running_loop
+
+logger = logging.getLogger(__name__)
+
+
+def _percentile(values: List[float], q: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+async def _run_benchmark(clients: int, fps: float, size: int, duration: float, port: int) -> Dict[str, Any]:
+    """WebSocket 서버와 클라이언트를 띄워 duration초 동안 합성 프레임을 분배합니다."""
+    sockets = set()
+
+    async def handler(request):
+        ws = web.WebSocketResponse()
+        await ws.prepare(request)
+        sockets.add(ws)
+        try:
+            async for _ in ws:
+                pass
+        finally:
+            sockets.discard(ws)
+        return ws
+
+    app = web.Application()
+    app.router.add_get('/ws', handler)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    await web.TCPSite(runner, '127.0.0.1', port).start()
+
+    latencies: List[float] = []
+    received = 0
+
+    async def client(session):
+        nonlocal received
+        async with session.ws_connect(f'http://127.0.0.1:{port}/ws') as ws:
+            async for msg in ws:
+                if msg.type != aiohttp.WSMsgType.BINARY:
+                    break
+                header, _ = unpack_header(msg.data)
+                latencies.append(time.time() - header['send_timestamp'])
+                received += 1
+
+    async def broadcast():
+        payload = os.urandom(size)
+        sequence = 0
+        interval = 1.0 / fps
+        next_tick = time.perf_counter()
+        while True:
+            sequence += 1
+            frame = EncodedFrame(stream='color', codec='jpeg', sequence=sequence, timestamp=time.time(),
+                                 width=640, height=480, data=payload)
+            message = pack_frame(frame)
+            await asyncio.gather(*(ws.send_bytes(message) for ws in list(sockets)), return_exceptions=True)
+            next_tick += interval
+            await asyncio.sleep(max(0.0, next_tick - time.perf_counter()))
+
+    monitor = LoopLagMonitor()
+    session = aiohttp.ClientSession()
+    client_tasks = [asyncio.create_task(client(session)) for _ in range(clients)]
+    while len(sockets) < clients:
+        await asyncio.sleep(0.01)
+
+    monitor.reset()
+    monitor.start()
+    cpu_start = time.process_time()
+    wall_start = time.perf_counter()
+    broadcaster = asyncio.create_task(broadcast())
+    await asyncio.sleep(duration)
+    broadcaster.cancel()
+    wall = time.perf_counter() - wall_start
+    cpu = time.process_time() - cpu_start
+    delivered = received
+    lag = monitor.get_stats()
+    await monitor.stop()
+
+    for ws in list(sockets):
+        await ws.close()
+    await asyncio.gather(*client_tasks, return_exceptions=True)
+    await session.close()
+    await runner.cleanup()
+
+    expected = int(duration * fps) * clients
+    return {
+        "loop": describe_running_loop(),
+        "clients": clients,
+        "fps": fps,
+        "size": size,
+        "messages_per_s": delivered / wall,
+        "delivery_ratio": delivered / expected if expected else 0.0,
+        "latency_p50_ms": _percentile(latencies, 0.5) * 1000,
+        "latency_p99_ms": _percentile(latencies, 0.99) * 1000,
+        "cpu_us_per_message": cpu / delivered * 1e6 if delivered else 0.0,
+        "loop_lag_p99_ms": lag["p99_ms"],
+        "loop_lag_max_ms": lag["max_ms"],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="이벤트 루프별 메시지 분배 벤치마크")
+    parser.add_argument('--loop', choices=['asyncio', 'uvloop', 'both'], default='both')
+    parser.add_argument('--clients', type=int, default=20)
+    parser.add_argument('--fps', type=float, default=30)
+    parser.add_argument('--size', type=int, default=20000, help='프레임 페이로드 크기 (bytes)')
+    parser.add_argument('--duration', type=float, default=10)
+    parser.add_argument('--port', type=int, default=18080)
+    parser.add_argument('--json', action='store_true', help='결과를 JSON으로 출력')
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.WARNING, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+
+    loops = ['asyncio', 'uvloop'] if args.loop == 'both' else [args.loop]
+    if 'uvloop' in loops and not is_uvloop_available():
+        logger.warning("uvloop가 설치되어 있지 않아 asyncio만 측정합니다. (pip install uvloop)")
+        loops = ['asyncio']
+
+    results = []
+    for name in loops:
+        results.append(run_event_loop(
+            _run_benchmark(args.clients, args.fps, args.size, args.duration, args.port), name
+        ))
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+
+    columns = ('messages_per_s', 'delivery_ratio', 'latency_p50_ms', 'latency_p99_ms',
+               'cpu_us_per_message', 'loop_lag_p99_ms', 'loop_lag_max_ms')
+    print(f"clients={args.clients} fps={args.fps:g} size={args.size} duration={args.duration:g}s")
+    print(f"{'metric':<22}" + ''.join(f"{name:>14}" for name in loops))
+    for column in columns:
+        print(f"{column:<22}" + ''.join(f"{result[column]:>14.2f}" for result in results))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,219 @@
+"""
+바이너리 프레임 프로토콜
+WebSocket으로 전송하는 프레임 메시지의 고정 길이 헤더를 정의합니다.
+
+메시지 구조 (little-endian):
+    magic(4s) version(B) stream_id(B) codec_id(B) flags(B)
+    sequence(I) capture_ts(d) send_ts(d) width(H) height(H) payload_len(I)
+    + payload
+
+서버 모듈에 의존하지 않으므로 rsunity_client도 페이로드 해석에 이 모듈만 사용합니다.
+"""
+
+import struct
+import time
+from typing import Dict, Any, Tuple, TYPE_CHECKING
+import numpy as np
+
+if TYPE_CHECKING:
+    from frame_cache import EncodedFrame
+
+MAGIC = b'RSUL'
+VERSION = 1
+
+HEADER_FORMAT = '<4sBBBBIddHHI'
+HEADER_SIZE = struct.calcsize(HEADER_FORMAT)
+_HEADER = struct.Struct(HEADER_FORMAT)
+
+STREAM_IDS: Dict[str, int] = {
+    'color': 1,
+    'depth': 2,
+    'pointcloud': 3,
+    'metadata': 4,
+    'depthgrid': 5,
+    'mesh': 6,
+}
+
+CODEC_IDS: Dict[str, int] = {
+    'raw': 0,
+    'jpeg': 1,
+    'png': 2,
+    'png16': 3,
+    'npy': 4,
+    'xyz32f': 5,
+    'webp': 6,
+    'h264': 7,
+    'vp8': 8,
+    'rsfm': 9,  # 프레임 메타데이터 헤더 (realsense_manager.FrameData.to_header_bytes)
+    'f16': 10,  # float16 little-endian 격자 (height x width)
+    'mesh': 11,  # MESH_HEADER + 정점 + 인덱스
+    'xyzrgba': 12,  # POINT_XYZRGBA 레코드 배열
+    'qdepth': 13,  # QDEPTH_HEADER + 양자화 코드 비트 스트림
+}
+
+# flags 비트
+FLAG_KEYFRAME = 0x01  # 비디오 코덱 스트림의 키프레임
+
+# --- 페이로드 형식 (서버 인코더와 rsunity_client 디코더가 공유) ---
+# xyzrgba (pointcloud:voxel) 점 레코드: float32 XYZ(미터) + RGBA (색이 없으면 A=0)
+POINT_XYZRGBA = np.dtype([('x', '<f4'), ('y', '<f4'), ('z', '<f4'),
+                          ('r', 'u1'), ('g', 'u1'), ('b', 'u1'), ('a', 'u1')])
+
+# qdepth 페이로드 헤더 (little-endian): bits(B) mode(B, 0=linear 1=log) + 2바이트 패딩 near_m(f) far_m(f)
+# 코드 q(>0)의 미터 값: linear near + (q-1)/(2^bits-2)*(far-near), log near*(far/near)^((q-1)/(2^bits-2))
+QDEPTH_HEADER = struct.Struct('<BB2xff')
+
+# mesh 페이로드 헤더 (little-endian): vertex_count(I) triangle_count(I) index_size(B) + 3바이트 패딩
+MESH_HEADER = struct.Struct('<IIB3x')
+
+# qdepth 양자화 설정 (코드 0 = 뎁스 없음, 1..2^bits-1 = near..far)
+QUANT_BITS = (8, 10, 12)
+QUANT_MODES = ('linear', 'log')
+
+# 타임스탬프 도메인 (rs.timestamp_domain 이름 -> 헤더 코드)
+TIMESTAMP_DOMAINS = {'hardware_clock': 0, 'system_time': 1, 'global_time': 2}
+UNKNOWN_DOMAIN = 255
+
+# 프레임 메타데이터 헤더: magic, version, flags(1=color, 2=depth), reserved, sequence,
+# host_timestamp(초, epoch), host_monotonic(초) + 스트림별(color, depth) StreamMetadata
+FRAME_HEADER_MAGIC = b'RSFM'
+FRAME_HEADER_VERSION = 1
+FRAME_HEADER = struct.Struct('<4sBBHIdd')
+# frame_number, sensor_timestamp(us), timestamp(ms), exposure(us), gain, laser_power, domain
+STREAM_HEADER = struct.Struct('<QqdfffB3x')
+FRAME_HEADER_SIZE = FRAME_HEADER.size + 2 * STREAM_HEADER.size
+NO_FRAME_NUMBER = 0xFFFFFFFFFFFFFFFF
+
+_STREAM_NAMES = {v: k for k, v in STREAM_IDS.items()}
+_CODEC_NAMES = {v: k for k, v in CODEC_IDS.items()}
+
+
+def pack_frame(encoded: 'EncodedFrame', flags: int = 0) -> bytes:
+    """인코딩된 프레임을 헤더 + 페이로드 바이트로 직렬화합니다."""
+    header = _HEADER.pack(
+        MAGIC,
+        VERSION,
+        STREAM_IDS[encoded.stream],
+        CODEC_IDS[encoded.codec],
+        flags,
+        encoded.sequence & 0xFFFFFFFF,
+        encoded.timestamp,
+        time.time(),
+        encoded.width,
+        encoded.height,
+        len(encoded.data),
+    )
+    return header + encoded.data
+
+
+def unpack_header(message: bytes) -> Tuple[Dict[str, Any], memoryview]:
+    """메시지에서 헤더를 해석하고 (헤더 정보, 페이로드 뷰)를 반환합니다."""
+    if len(message) < HEADER_SIZE:
+        raise ValueError(f"Message too short for header: {len(message)} bytes")
+
+    (magic, version, stream_id, codec_id, flags, sequence,
+     capture_ts, send_ts, width, height, payload_len) = _HEADER.unpack_from(message)
+
+    if magic != MAGIC:
+        raise ValueError(f"Invalid magic: {magic!r}")
+    if version != VERSION:
+        raise ValueError(f"Unsupported protocol version: {version}")
+
+    header = {
+        'stream': _STREAM_NAMES.get(stream_id, str(stream_id)),
+        'codec': _CODEC_NAMES.get(codec_id, str(codec_id)),
+        'flags': flags,
+        'sequence': sequence,
+        'capture_timestamp': capture_ts,
+        'send_timestamp': send_ts,
+        'width': width,
+        'height': height,
+    }
+    payload = memoryview(message)[HEADER_SIZE:HEADER_SIZE + payload_len]
+    return header, payload
+
+
+def unpack_frame_header(data: bytes) -> Dict[str, Any]:
+    """realsense_manager.FrameData.to_header_bytes로 만든 헤더를 해석합니다. (클라이언트/분석 도구용)"""
+    if len(data) < FRAME_HEADER_SIZE:
+        raise ValueError(f"Frame header too short: {len(data)} bytes")
+    magic, version, flags, _, sequence, host_timestamp, host_monotonic = FRAME_HEADER.unpack_from(data)
+    if magic != FRAME_HEADER_MAGIC or version != FRAME_HEADER_VERSION:
+        raise ValueError(f"Invalid frame header: {magic!r} v{version}")
+    domains = {code: name for name, code in TIMESTAMP_DOMAINS.items()}
+    streams = {}
+    for index, (stream, bit) in enumerate((('color', 1), ('depth', 2))):
+        if not flags & bit:
+            streams[stream] = None
+            continue
+        offset = FRAME_HEADER.size + index * STREAM_HEADER.size
+        (frame_number, sensor_timestamp, timestamp, exposure, gain, laser_power,
+         domain) = STREAM_HEADER.unpack_from(data, offset)
+        streams[stream] = {
+            "frame_number": -1 if frame_number == NO_FRAME_NUMBER else frame_number,
+            "sensor_timestamp": sensor_timestamp,
+            "timestamp": timestamp,
+            "timestamp_domain": domains.get(domain, ''),
+            "exposure": exposure,
+            "gain": gain,
+            "laser_power": laser_power,
+        }
+    return {"sequence": sequence, "host_timestamp": host_timestamp, "host_monotonic": host_monotonic, **streams}
+
+
+def quant_levels(bits: int, mode: str, near: float, far: float) -> int:
+    """양자화 설정을 검증하고 최대 코드 값(2^bits-1)을 반환합니다. (잘못된 설정은 ValueError)"""
+    if bits not in QUANT_BITS:
+        raise ValueError(f"Unsupported quantization bits {bits} (supported: {QUANT_BITS})")
+    if mode not in QUANT_MODES:
+        raise ValueError(f"Unknown quantization mode '{mode}' (supported: {', '.join(QUANT_MODES)})")
+    if not 0 < near < far:
+        raise ValueError(f"Invalid quantization range: near={near}, far={far}")
+    return (1 << bits) - 1
+
+
+def dequantize_depth(codes: np.ndarray, bits: int, mode: str, near: float, far: float) -> np.ndarray:
+    """양자화 코드를 근사 미터 값(float32)으로 되돌립니다. 코드 0은 0 (뎁스 없음)"""
+    top = quant_levels(bits, mode, near, far)
+    position = (codes.astype(np.float32) - 1) / np.float32(top - 1)
+    if mode == 'linear':
+        metres = near + position * np.float32(far - near)
+    else:
+        metres = near * np.power(np.float32(far / near), position)
+    return np.where(codes > 0, metres, np.float32(0)).astype(np.float32)
+
+
+def _pack_group(bits: int) -> Tuple[int, int]:
+    """(값 개수, 바이트 수): 8비트 1->1, 10비트 4->5, 12비트 2->3"""
+    values = {8: 1, 10: 4, 12: 2}[bits]
+    return values, values * bits // 8
+
+
+def pack_codes(codes: np.ndarray, bits: int) -> bytes:
+    """코드를 LSB 우선 비트 스트림으로 빈틈없이 묶습니다. (값 개수가 묶음 단위로 나누어떨어지지 않으면 0으로 채움)"""
+    flat = codes.reshape(-1)
+    if bits == 8:
+        return flat.astype(np.uint8, copy=False).tobytes()
+    values, nbytes = _pack_group(bits)
+    padded = -len(flat) % values
+    if padded:
+        flat = np.concatenate((flat, np.zeros(padded, dtype=flat.dtype)))
+    groups = flat.reshape(-1, values).astype(np.uint64)
+    word = groups[:, 0].copy()
+    for index in range(1, values):
+        word |= groups[:, index] << np.uint64(bits * index)
+    return word.astype('<u8').view(np.uint8).reshape(-1, 8)[:, :nbytes].tobytes()
+
+
+def unpack_codes(data: bytes, bits: int, count: int) -> np.ndarray:
+    """pack_codes의 역변환 (코드 count개, uint16)"""
+    raw = np.frombuffer(data, dtype=np.uint8)
+    if bits == 8:
+        return raw[:count].astype(np.uint16)
+    values, nbytes = _pack_group(bits)
+    words = np.zeros((len(raw) // nbytes, 8), dtype=np.uint8)
+    words[:, :nbytes] = raw[:len(words) * nbytes].reshape(-1, nbytes)
+    word = words.view('<u8').reshape(-1)
+    mask = np.uint64((1 << bits) - 1)
+    codes = np.stack([(word >> np.uint64(bits * index)) & mask for index in range(values)], axis=1)
+    return codes.reshape(-1)[:count].astype(np.uint16)
@@ -0,0 +1,130 @@
+"""
+프레임 처리용 버퍼 풀
+매 프레임 같은 크기로 만들어지는 중간 배열(정규화 뎁스, 컬러맵, 축소 이미지, 포인트 클라우드 등)을
+(shape, dtype)별로 재사용하여 정상 상태 스트리밍 중의 메모리 할당/해제를 없앱니다.
+
+    pool = BufferPool()
+    visual = pool.acquire(depth.shape, np.uint8)
+    cv2.normalize(depth, visual, 0, 255, cv2.NORM_MINMAX, dtype=cv2.CV_8U)
+    ...
+    pool.release(visual)
+
+acquire로 받은 배열은 초기화되지 않은 상태이므로 전체를 덮어쓰는 dst=/out= 인자로만 사용해야 합니다.
+"""
+
+import threading
+from collections import defaultdict
+from contextlib import contextmanager
+from typing import Dict, Any, List, Tuple
+import numpy as np
+from metrics import MetricsRegistry
+
+# (shape, dtype)별로 보관할 여유 버퍼 최대 개수
+MAX_FREE_PER_KEY = 4
+
+PoolKey = Tuple[Tuple[int, ...], str]
+
+
+class BufferPool:
+    """크기별 NumPy 버퍼를 재사용하는 싱글톤 클래스"""
+
+    _instance = None
+    _initialized = False
+
+    def __new__(cls):
+        if cls._instance is None:
+            cls._instance = super(BufferPool, cls).__new__(cls)
+        return cls._instance
+
+    def __init__(self):
+        if self._initialized:
+            return
+
+        self._free: Dict[PoolKey, List[np.ndarray]] = defaultdict(list)
+        self._in_use: Dict[int, Tuple[PoolKey, np.ndarray]] = {}
+        self._lock = threading.Lock()
+
+        # 통계
+        self.hits = 0
+        self.misses = 0
+        self.resident_bytes = 0
+        self.peak_resident_bytes = 0
+
+        MetricsRegistry().add_collector(self._export_metrics)
+        self._initialized = True
+
+    def acquire(self, shape, dtype) -> np.ndarray:
+        """(shape, dtype) 버퍼를 반환합니다. 여유 버퍼가 없으면 새로 할당합니다."""
+        shape = tuple(int(n) for n in (shape if isinstance(shape, (tuple, list)) else (shape,)))
+        key = (shape, np.dtype(dtype).str)
+        with self._lock:
+            free = self._free[key]
+            if free:
+                array = free.pop()
+                self.hits += 1
+            else:
+                array = np.empty(shape, dtype=dtype)
+                self.misses += 1
+                self.resident_bytes += array.nbytes
+                self.peak_resident_bytes = max(self.peak_resident_bytes, self.resident_bytes)
+            self._in_use[id(array)] = (key, array)
+        return array
+
+    def release(self, array: np.ndarray) -> None:
+        """acquire로 받은 버퍼를 반환합니다. 풀에서 받지 않은 배열은 무시합니다."""
+        with self._lock:
+            entry = self._in_use.pop(id(array), None)
+            if entry is None:
+                return
+            key, owned = entry
+            free = self._free[key]
+            if len(free) < MAX_FREE_PER_KEY:
+                free.append(owned)
+            else:
+                self.resident_bytes -= owned.nbytes
+
+    def discard(self, array: np.ndarray) -> None:
+        """버퍼를 재사용하지 않고 풀의 관리 대상에서 제외합니다. (다른 곳에서 아직 참조 중인 경우)"""
+        with self._lock:
+            entry = self._in_use.pop(id(array), None)
+            if entry is not None:
+                self.resident_bytes -= entry[1].nbytes
+
+    @contextmanager
+    def borrow(self, shape, dtype):
+        """with 블록 안에서만 사용하는 임시 버퍼"""
+        array = self.acquire(shape, dtype)
+        try:
+            yield array
+        finally:
+            self.release(array)
+
+    def clear(self) -> None:
+        """여유 버퍼를 모두 해제합니다. (해상도 변경 시 이전 크기 버퍼 정리)"""
+        with self._lock:
+            for free in self._free.values():
+                for array in free:
+                    self.resident_bytes -= array.nbytes
+            self._free.clear()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """풀 통계 반환"""
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / total if total else 0.0,
+                "in_use": len(self._in_use),
+                "free": sum(len(free) for free in self._free.values()),
+                "resident_bytes": self.resident_bytes,
+                "peak_resident_bytes": self.peak_resident_bytes,
+            }
+
+    def _export_metrics(self, metrics: MetricsRegistry):
+        stats = self.get_stats()
+        metrics.set_gauge('rsunity_buffer_pool_hit_rate', stats["hit_rate"], help='Buffer pool hit rate')
+        metrics.set_gauge('rsunity_buffer_pool_resident_bytes', stats["resident_bytes"],
+                          help='Bytes held by the buffer pool (in use + free)')
+        metrics.set_gauge('rsunity_buffer_pool_peak_resident_bytes', stats["peak_resident_bytes"],
+                          help='Peak bytes held by the buffer pool')
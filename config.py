@@ -39,15 +39,154 @@ class Config:
                 "enable_imu": True,
 
                 # --- 해상도 및 FPS 설정 ---
-                # 안정적인 옵션: 424, 240, 15
-                # 고해상도 옵션: 640, 480, 30
+                # auto_profile.enabled가 True이면 시작 시 보정(calibration) 결과로 대체됩니다.
                 "width": 424,
                 "height": 240,
-                "fps": 15
+                "fps": 15,
+
+                # --- 컬러 수신 포맷 ---
+                # 'bgr8': librealsense가 호스트에서 BGR로 변환한 프레임을 받습니다.
+                # 'yuyv': 카메라 원본 YUYV를 그대로 받아 turbojpeg JPEG/비디오 인코더에 바로 넘기고,
+                #         BGR이 필요한 단계(PNG/WebP/raw, 복셀 색 등)가 있을 때만 프레임당 한 번 변환합니다.
+                "color_format": "bgr8",
+
+                # --- 프레임 기록 ---
+                # 최근 프레임을 순번/타임스탬프로 다시 조회할 수 있도록 보관합니다. (history_mb: 0이면 프레임 수만 제한)
+                "history_frames": 30,
+                "history_mb": 0,
+
+                # --- 워밍업 ---
+                # 파이프라인 시작 직후 자동 노출이 수렴하기 전의 프레임을 버립니다. (0이면 사용 안 함)
+                "warmup_frames": 15
+            },
+            "auto_profile": {
+                # --- 시작 시 프로파일 자동 선택 ---
+                # 장치가 지원하는 프로파일을 이 호스트에서 측정하여
+                # 예산 안에서 가장 높은 해상도/FPS를 고릅니다.
+                "enabled": False,
+                "cpu_budget": 0.5,          # 프로세스 CPU 사용률 상한 (1.0 = 코어 1개)
+                "latency_budget_ms": 100,   # 프레임 간격 + 인코딩 시간 상한
+                "frames": 30,               # 후보당 측정 프레임 수
+                "warmup_frames": 10,        # 측정 전 버리는 프레임 수 (자동 노출 안정화)
+                "max_candidates": 6,
+                "min_fps": 15,
+                "persist": False            # 선택 결과를 config.json의 realsense 설정에 저장
             },
             "server": {
                 "host": "0.0.0.0",
-                "port": 8080
+                "port": 8080,
+                # 관리 API 토큰 (비어 있으면 localhost에서만 관리 API 허용)
+                "admin_token": "",
+                # 이벤트 루프 구현: asyncio, uvloop, auto (uvloop 설치 시 사용)
+                "event_loop": "asyncio",
+                # Socket.IO 직렬화: json, msgpack (바이트 그대로 전송 + 메타데이터 배열 평탄화, msgpack 필요)
+                # JSON은 항상 기본 경로(/socket.io)에서 제공되며, msgpack이면 msgpack_path에 MessagePack 경로를 추가로 엽니다.
+                "serializer": "json",
+                "msgpack_path": "socket.io-msgpack",
+                # 이벤트 루프 지연 측정 간격 / 스택을 기록할 차단 시간
+                "loop_lag_interval_ms": 50,
+                "loop_block_threshold_ms": 250,
+                # Socket.IO 클라이언트 송신 큐에 이 이상 패킷이 쌓이면 큐가 빠질 때까지 프레임을 건너뜀
+                "max_client_queue": 2
+            },
+            "encoding": {
+                # --- 스트림별 인코더 설정 ---
+                # jpeg_backend: 'jpeg' 포맷 백엔드 (opencv_jpeg, turbojpeg, auto)
+                # backend: 'auto' 포맷 백엔드 (opencv_jpeg, turbojpeg, webp, png, raw, auto)
+                # auto는 시작 시 후보를 벤치마크하여 auto_target_bytes 이하 중 가장 빠른 것을 고릅니다.
+                "color": {
+                    "jpeg_backend": "auto",
+                    "backend": "auto",
+                    "quality": 95,
+                    "subsampling": "420",
+                    "optimize": False,
+                    "png_compression": 1,
+                    "auto_candidates": ["turbojpeg", "opencv_jpeg", "webp"],
+                    "auto_target_bytes": 0
+                },
+                "depth": {
+                    "jpeg_backend": "auto",
+                    "backend": "auto",
+                    "quality": 95,
+                    "subsampling": "420",
+                    "optimize": False,
+                    "png_compression": 1,
+                    "auto_candidates": ["turbojpeg", "opencv_jpeg", "webp"],
+                    "auto_target_bytes": 0
+                }
+            },
+            "governor": {
+                # --- 과부하 제어 ---
+                # 압력(아래 임계값 대비 최대 비율)이 1.0 이상인 샘플이 escalate_samples번 이어지면 한 단계 저하,
+                # recover_ratio 미만인 샘플이 recover_samples번 이어지면 한 단계 복구합니다.
+                # 단계: 인코딩 품질 저하 -> 뎁스 컬러맵 생략 -> 축소(decimation) -> FPS 감소 -> 'low' 클라이언트 일시 중지
+                "enabled": True,
+                "interval_s": 1.0,
+                "max_loop_lag_ms": 50,
+                "max_cpu": 0.85,              # 프로세스 CPU 사용률 (1.0 = 코어 1개)
+                "max_encode_queue": 4,        # 인코딩 스레드에 대기/진행 중인 인코딩 수
+                "max_client_backlog": 2,      # 클라이언트가 건너뛴 프레임 수
+                "escalate_samples": 3,
+                "recover_samples": 10,
+                "recover_ratio": 0.6,
+                "degraded_quality": 60,
+                "decimation": 2,
+                "frame_stride": 2
+            },
+            "depth_processing": {
+                # --- 저해상도 뎁스 격자 (depthgrid 스트림) ---
+                # grid_method: 블록 대표값 (min: 가장 가까운 표면, median: 잡음에 강함)
+                "grid_width": 64,
+                "grid_height": 48,
+                "grid_method": "min",
+                # --- 뎁스 메시 (mesh 스트림) ---
+                # mesh_step 픽셀 간격의 격자를 삼각형화하고, 정점 간 뎁스 차이가
+                # mesh_max_depth_jump(미터)를 넘는 삼각형(물체 경계)은 제외합니다.
+                "mesh_step": 4,
+                "mesh_max_depth_jump": 0.1,
+                # --- 복셀 다운샘플링 (pointcloud:voxel) ---
+                # voxel_size(미터) 격자의 점유 복셀마다 평균 점 하나를 보냅니다.
+                "voxel_size": 0.02,
+                # --- 범위 양자화 뎁스 (depth:q8/q10/q12, q8log/q10log/q12log) ---
+                "quant_near_m": 0.2,
+                "quant_far_m": 5.0
+            },
+            "motion_gate": {
+                # --- 움직임 기반 전송 제어 ---
+                # 장면이 정지해 있으면 heartbeat_s마다 한 프레임만 보내고, 움직임이 감지되면 즉시 전송을 재개합니다.
+                "enabled": False,
+                "thumbnail_width": 32,
+                "color_delta": 12,          # 그레이 레벨 차이
+                "depth_delta_m": 0.05,
+                "changed_ratio": 0.02,      # 변한 썸네일 픽셀 비율
+                "hold_s": 0.5,
+                "heartbeat_s": 1.0
+            },
+            "idle": {
+                # --- 유휴 정책 (hot -> warm -> cold) ---
+                # 마지막 소비자가 떠나도 hot_hold_s 동안은 전체 FPS로 캡처를 유지하고(hot),
+                # 그 뒤 warm_fps로 낮춰 노출을 유지하며(warm), warm_hold_s가 지나면 파이프라인을 멈춥니다(cold).
+                # 새 소비자가 오면 즉시 hot으로 돌아갑니다. (cold에서는 파이프라인 시작 + 워밍업이 필요)
+                "hot_hold_s": 5.0,
+                "warm_fps": 6,              # 0이면 warm 단계 없이 바로 cold
+                "warm_hold_s": 60.0         # null이면 cold로 가지 않음
+            },
+            "relay": {
+                # --- 릴레이 모드 ---
+                # 카메라 대신 상위 서버(카메라 호스트 또는 다른 릴레이)의 /ws 스트림을 한 번 구독하여
+                # 받은 인코딩 바이트를 디코딩/재인코딩 없이 이 서버의 클라이언트에게 그대로 다시 보냅니다.
+                "enabled": False,
+                "upstream": "ws://192.168.0.10:8080/ws",
+                "streams": "color,depth",   # 상위 서버에서 받을 스트림/포맷 (이 릴레이가 제공할 수 있는 것)
+                "priority": "high",         # 상위 서버의 과부하 제어에서 릴레이가 마지막에 일시 중지되도록
+                "reconnect_s": 2.0,
+                "idle_disconnect_s": 10.0   # 이 서버에 클라이언트가 없는 상태가 이어지면 상위 연결을 끊음
+            },
+            "video": {
+                # --- 비디오 코덱 스트림 설정 (color:h264, color:vp8 구독 시 사용, PyAV 필요) ---
+                "bitrate": 1500000,
+                "gop": 30,
+                "queue_size": 30
             }
         }
         
@@ -75,10 +214,42 @@ class Config:
         """RealSense 설정 반환"""
         return self.settings.get('realsense', {})
     
+    def get_auto_profile_config(self) -> Dict[str, Any]:
+        """프로파일 자동 선택 설정 반환"""
+        return self.settings.get('auto_profile', {})
+    
     def get_server_config(self) -> Dict[str, Any]:
         """소켓 설정 반환"""
         return self.settings.get('server', {})
     
+    def get_encoding_config(self) -> Dict[str, Any]:
+        """인코딩 설정 반환"""
+        return self.settings.get('encoding', {})
+    
+    def get_governor_config(self) -> Dict[str, Any]:
+        """과부하 제어 설정 반환"""
+        return self.settings.get('governor', {})
+    
+    def get_depth_processing_config(self) -> Dict[str, Any]:
+        """뎁스 파생 데이터 설정 반환"""
+        return self.settings.get('depth_processing', {})
+    
+    def get_motion_gate_config(self) -> Dict[str, Any]:
+        """움직임 기반 전송 제어 설정 반환"""
+        return self.settings.get('motion_gate', {})
+    
+    def get_idle_config(self) -> Dict[str, Any]:
+        """유휴 정책 설정 반환"""
+        return self.settings.get('idle', {})
+    
+    def get_relay_config(self) -> Dict[str, Any]:
+        """릴레이 모드 설정 반환"""
+        return self.settings.get('relay', {})
+    
+    def get_video_config(self) -> Dict[str, Any]:
+        """비디오 코덱 스트림 설정 반환"""
+        return self.settings.get('video', {})
+    
     def get_transmission_config(self) -> Dict[str, Any]:
         """전송 설정 반환"""
         return self.settings.get('transmission', {})
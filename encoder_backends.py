@@ -0,0 +1,338 @@
+"""
+이미지 인코더 백엔드
+OpenCV JPEG, libjpeg-turbo(PyTurboJPEG), WebP, PNG, raw 인코더를 같은 인터페이스로 제공하고,
+'auto' 모드에서는 현재 호스트에서 후보 백엔드를 직접 측정하여 가장 빠른 것을 고릅니다.
+
+카메라 원본 YUYV(realsense.color_format = 'yuyv')를 받을 수 있는 백엔드(turbojpeg)는
+supports_yuyv/encode_yuyv로 BGR 변환 없이 YUV 평면을 바로 JPEG로 압축합니다.
+"""
+
+import logging
+import time
+import numpy as np
+from typing import Optional, Dict, Any, List, Type
+from buffer_pool import BufferPool
+from startup import lazy_import
+
+# OpenCV는 첫 인코딩 시점에 불러옵니다. (서버 시작 시간 단축)
+cv2 = lazy_import('cv2')
+
+logger = logging.getLogger(__name__)
+
+# 서브샘플링 설정값 ('444', '422', '420')
+SUBSAMPLING_MODES = ('444', '422', '420')
+
+
+class ImageEncoder:
+    """이미지 인코더 기본 클래스"""
+
+    name = ''
+    codec = ''
+
+    def __init__(self, options: Optional[Dict[str, Any]] = None):
+        self.options = options or {}
+        self.quality = int(self.options.get('quality', 95))
+        self.subsampling = str(self.options.get('subsampling', '420'))
+        self.optimize = bool(self.options.get('optimize', False))
+        if self.subsampling not in SUBSAMPLING_MODES:
+            raise ValueError(f"Unsupported subsampling '{self.subsampling}' (supported: {', '.join(SUBSAMPLING_MODES)})")
+
+    @classmethod
+    def is_available(cls) -> bool:
+        """현재 환경에서 사용 가능한지 여부"""
+        return True
+
+    def encode(self, image: np.ndarray) -> Optional[bytes]:
+        """이미지를 인코딩합니다. 실패하면 None을 반환합니다."""
+        raise NotImplementedError
+
+    def supports_yuyv(self, shape) -> bool:
+        """(H, W, 2) YUYV 이미지를 BGR 변환 없이 인코딩할 수 있는지 여부"""
+        return False
+
+    def encode_yuyv(self, image: np.ndarray) -> Optional[bytes]:
+        """YUYV 이미지를 인코딩합니다. (supports_yuyv가 True일 때만 호출)"""
+        raise NotImplementedError
+
+    def set_quality(self, quality: int):
+        """인코딩 품질을 변경합니다. (무손실 백엔드는 무시)"""
+        self.quality = int(quality)
+        self._build_params()
+
+    def _build_params(self):
+        """품질 등 옵션이 바뀌면 백엔드별 인코딩 파라미터를 다시 만듭니다."""
+        pass
+
+    def describe(self) -> Dict[str, Any]:
+        return {
+            "backend": self.name,
+            "codec": self.codec,
+            "quality": self.quality,
+            "subsampling": self.subsampling,
+            "optimize": self.optimize,
+        }
+
+
+class OpenCVJpegEncoder(ImageEncoder):
+    """cv2.imencode 기반 JPEG 인코더"""
+
+    name = 'opencv_jpeg'
+    codec = 'jpeg'
+
+    def __init__(self, options: Optional[Dict[str, Any]] = None):
+        super().__init__(options)
+        self._build_params()
+
+    def _build_params(self):
+        self._params = [cv2.IMWRITE_JPEG_QUALITY, self.quality]
+        if self.optimize:
+            self._params += [cv2.IMWRITE_JPEG_OPTIMIZE, 1]
+        # 샘플링 팩터 설정은 OpenCV 4.5.5 이상에서만 지원됩니다.
+        sampling_flag = getattr(cv2, 'IMWRITE_JPEG_SAMPLING_FACTOR', None)
+        sampling_value = getattr(cv2, f'IMWRITE_JPEG_SAMPLING_FACTOR_{self.subsampling}', None)
+        if sampling_flag is not None and sampling_value is not None:
+            self._params += [sampling_flag, sampling_value]
+
+    def encode(self, image: np.ndarray) -> Optional[bytes]:
+        ret, buffer = cv2.imencode('.jpg', image, self._params)
+        return buffer.tobytes() if ret else None
+
+
+class TurboJpegEncoder(ImageEncoder):
+    """libjpeg-turbo(PyTurboJPEG) 기반 JPEG 인코더 (설치된 경우에만 사용)"""
+
+    name = 'turbojpeg'
+    codec = 'jpeg'
+
+    _module = None
+    _jpeg = None
+
+    @classmethod
+    def _load(cls):
+        if cls._jpeg is None:
+            import turbojpeg
+            cls._module = turbojpeg
+            cls._jpeg = turbojpeg.TurboJPEG()
+        return cls._jpeg
+
+    @classmethod
+    def is_available(cls) -> bool:
+        try:
+            cls._load()
+            return True
+        except Exception:
+            return False
+
+    def __init__(self, options: Optional[Dict[str, Any]] = None):
+        super().__init__(options)
+        self._jpeg = self._load()
+        module = self._module
+        self._subsample = {
+            '444': module.TJSAMP_444,
+            '422': module.TJSAMP_422,
+            '420': module.TJSAMP_420,
+        }[self.subsampling]
+        if self.optimize:
+            logger.debug("turbojpeg 백엔드는 optimize 옵션을 지원하지 않아 무시합니다.")
+
+    def encode(self, image: np.ndarray) -> Optional[bytes]:
+        module = self._module
+        if image.ndim == 2:
+            return self._jpeg.encode(image[:, :, np.newaxis], quality=self.quality,
+                                     pixel_format=module.TJPF_GRAY, jpeg_subsample=module.TJSAMP_GRAY)
+        return self._jpeg.encode(image, quality=self.quality,
+                                 pixel_format=module.TJPF_BGR, jpeg_subsample=self._subsample)
+
+    def supports_yuyv(self, shape) -> bool:
+        height, width = shape[:2]
+        return hasattr(self._jpeg, 'encode_from_yuv') and width % 2 == 0 and (
+            self.subsampling != '420' or height % 2 == 0)
+
+    def encode_yuyv(self, image: np.ndarray) -> Optional[bytes]:
+        """YUYV를 Y/U/V 평면으로 재배열만 하여 색 공간 변환 없이 JPEG로 압축합니다.
+
+        카메라 크로마가 이미 4:2:2이므로 '444' 설정도 4:2:2로 압축하고, '420'은 위아래 두 행의 크로마를 평균합니다.
+        """
+        module = self._module
+        height, width = image.shape[:2]
+        half_width = width // 2
+        vertical = 2 if self.subsampling == '420' else 1
+        chroma_height = height // vertical
+        luma_size = height * width
+        chroma_size = chroma_height * half_width
+        pool = BufferPool()
+        with pool.borrow((luma_size + 2 * chroma_size,), np.uint8) as planar:
+            np.copyto(planar[:luma_size].reshape(height, width), image[:, :, 0])
+            for index in (0, 1):  # U는 짝수 열, V는 홀수 열
+                start = luma_size + index * chroma_size
+                plane = planar[start:start + chroma_size].reshape(chroma_height, half_width)
+                chroma = image[:, index::2, 1]
+                if vertical == 1:
+                    np.copyto(plane, chroma)
+                    continue
+                with pool.borrow((chroma_height, half_width), np.uint16) as total:
+                    np.add(chroma[0::2], chroma[1::2], out=total, dtype=np.uint16)
+                    total += 1
+                    np.right_shift(total, 1, out=plane, casting='unsafe')
+            return self._jpeg.encode_from_yuv(
+                planar, height, width, quality=self.quality,
+                jpeg_subsample=module.TJSAMP_420 if vertical == 2 else module.TJSAMP_422, align=1)
+
+
+class WebPEncoder(ImageEncoder):
+    """cv2.imencode 기반 WebP 인코더"""
+
+    name = 'webp'
+    codec = 'webp'
+
+    @classmethod
+    def is_available(cls) -> bool:
+        try:
+            ret, _ = cv2.imencode('.webp', np.zeros((8, 8, 3), dtype=np.uint8))
+            return bool(ret)
+        except cv2.error:
+            return False
+
+    def __init__(self, options: Optional[Dict[str, Any]] = None):
+        super().__init__(options)
+        self._build_params()
+
+    def _build_params(self):
+        self._params = [cv2.IMWRITE_WEBP_QUALITY, self.quality]
+
+    def encode(self, image: np.ndarray) -> Optional[bytes]:
+        ret, buffer = cv2.imencode('.webp', image, self._params)
+        return buffer.tobytes() if ret else None
+
+
+class PNGEncoder(ImageEncoder):
+    """cv2.imencode 기반 PNG 인코더 (uint16 이미지는 16비트 PNG)"""
+
+    name = 'png'
+    codec = 'png'
+
+    def __init__(self, options: Optional[Dict[str, Any]] = None):
+        super().__init__(options)
+        self.compression = int(self.options.get('png_compression', 1))
+        self._params = [cv2.IMWRITE_PNG_COMPRESSION, self.compression]
+
+    def encode(self, image: np.ndarray) -> Optional[bytes]:
+        ret, buffer = cv2.imencode('.png', image, self._params)
+        return buffer.tobytes() if ret else None
+
+    def describe(self) -> Dict[str, Any]:
+        info = super().describe()
+        info["png_compression"] = self.compression
+        return info
+
+
+class RawEncoder(ImageEncoder):
+    """무압축 인코더 (픽셀 배열을 그대로 전송)"""
+
+    name = 'raw'
+    codec = 'raw'
+
+    def encode(self, image: np.ndarray) -> Optional[bytes]:
+        return np.ascontiguousarray(image).tobytes()
+
+
+ENCODER_BACKENDS: Dict[str, Type[ImageEncoder]] = {
+    OpenCVJpegEncoder.name: OpenCVJpegEncoder,
+    TurboJpegEncoder.name: TurboJpegEncoder,
+    WebPEncoder.name: WebPEncoder,
+    PNGEncoder.name: PNGEncoder,
+    RawEncoder.name: RawEncoder,
+}
+
+# 각 포맷을 만들 수 있는 백엔드 (앞쪽이 우선)
+FORMAT_BACKENDS: Dict[str, List[str]] = {
+    'jpeg': ['turbojpeg', 'opencv_jpeg'],
+    'webp': ['webp'],
+    'png': ['png'],
+    'png16': ['png'],
+    'raw': ['raw'],
+}
+
+
+def available_backends() -> List[str]:
+    """현재 환경에서 사용 가능한 백엔드 이름 목록"""
+    return [name for name, cls in ENCODER_BACKENDS.items() if cls.is_available()]
+
+
+def create_encoder(backend: str, options: Optional[Dict[str, Any]] = None) -> ImageEncoder:
+    """백엔드 이름으로 인코더를 생성합니다."""
+    cls = ENCODER_BACKENDS.get(backend)
+    if cls is None:
+        raise ValueError(f"Unknown encoder backend '{backend}' (supported: {', '.join(ENCODER_BACKENDS)})")
+    if not cls.is_available():
+        raise ValueError(f"Encoder backend '{backend}' is not available on this host")
+    return cls(options)
+
+
+def make_benchmark_image(width: int, height: int, channels: int = 3) -> np.ndarray:
+    """벤치마크용 합성 이미지 (부드러운 그라디언트 + 약한 노이즈)를 생성합니다."""
+    rng = np.random.default_rng(0)
+    x = np.linspace(0, 255, width, dtype=np.float32)[np.newaxis, :]
+    y = np.linspace(0, 255, height, dtype=np.float32)[:, np.newaxis]
+    base = (x * 0.6 + y * 0.4)
+    planes = [base, 255 - base, (x + y) * 0.5][:channels]
+    image = np.stack(planes, axis=-1) + rng.normal(0, 6, (height, width, channels))
+    image = np.clip(image, 0, 255).astype(np.uint8)
+    return image[:, :, 0] if channels == 1 else image
+
+
+def make_benchmark_yuyv(width: int, height: int) -> np.ndarray:
+    """벤치마크용 합성 YUYV 이미지 (H, W, 2)를 생성합니다. (밝기 그라디언트 + 약한 노이즈, 완만한 크로마)"""
+    image = np.empty((height, width - width % 2, 2), dtype=np.uint8)
+    image[:, :, 0] = make_benchmark_image(image.shape[1], height, channels=1)
+    image[:, 0::2, 1] = np.linspace(64, 192, image.shape[1] // 2)[np.newaxis, :]  # U
+    image[:, 1::2, 1] = np.linspace(160, 96, height)[:, np.newaxis]  # V
+    return image
+
+
+def _benchmark_encode(encoder: ImageEncoder, image: np.ndarray, yuyv: bool) -> Optional[bytes]:
+    """YUYV 입력이면 YUYV를 받는 백엔드는 그대로, 나머지는 BGR 변환 시간을 포함해 인코딩합니다."""
+    if not yuyv:
+        return encoder.encode(image)
+    if encoder.supports_yuyv(image.shape):
+        return encoder.encode_yuyv(image)
+    return encoder.encode(cv2.cvtColor(image, cv2.COLOR_YUV2BGR_YUYV))
+
+
+def benchmark_backends(image: np.ndarray, backends: List[str], options: Optional[Dict[str, Any]] = None,
+                       iterations: int = 10, yuyv: bool = False) -> List[Dict[str, Any]]:
+    """각 백엔드로 이미지를 반복 인코딩하여 평균 시간과 크기를 측정합니다. (yuyv: 입력이 YUYV 이미지)"""
+    results = []
+    for backend in backends:
+        try:
+            encoder = create_encoder(backend, options)
+            _benchmark_encode(encoder, image, yuyv)  # 워밍업
+            sizes = []
+            start = time.perf_counter()
+            for _ in range(iterations):
+                data = _benchmark_encode(encoder, image, yuyv)
+                sizes.append(len(data) if data else 0)
+            elapsed = time.perf_counter() - start
+        except Exception as e:
+            logger.info(f"인코더 백엔드 '{backend}' 벤치마크 건너뜀: {e}")
+            continue
+        results.append({
+            "backend": backend,
+            "codec": encoder.codec,
+            "avg_ms": elapsed * 1000.0 / iterations,
+            "avg_bytes": int(sum(sizes) / len(sizes)),
+        })
+    return results
+
+
+def select_fastest(results: List[Dict[str, Any]], target_bytes: int = 0) -> Optional[Dict[str, Any]]:
+    """목표 크기(target_bytes, 0이면 제한 없음)를 만족하는 가장 빠른 결과를 고릅니다.
+
+    목표 크기를 만족하는 백엔드가 없으면 가장 작은 결과를 반환합니다.
+    """
+    if not results:
+        return None
+    fitting = [r for r in results if not target_bytes or r["avg_bytes"] <= target_bytes]
+    if fitting:
+        return min(fitting, key=lambda r: r["avg_ms"])
+    return min(results, key=lambda r: r["avg_bytes"])
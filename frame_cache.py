@@ -0,0 +1,128 @@
+"""
+인코딩된 프레임 캐시
+한 번 인코딩한 프레임 바이트를 스트림 변형(variant)별로 보관하여
+Socket.IO, 바이너리 WebSocket 등 여러 전송 경로가 같은 결과를 재사용하게 합니다.
+"""
+
+import base64
+import threading
+from dataclasses import dataclass
+from typing import Optional, Dict, Callable, Any
+
+
+@dataclass
+class EncodedFrame:
+    """인코딩된 프레임 구조체"""
+    stream: str          # 'color', 'depth' 등
+    codec: str           # 'jpeg' 등
+    sequence: int        # 원본 FrameData의 순번
+    timestamp: float     # 캡처 시각 (epoch 초)
+    width: int
+    height: int
+    data: bytes
+    _base64: Optional[str] = None
+
+    def as_base64(self) -> str:
+        """base64 문자열을 반환합니다. (최초 호출 시 한 번만 변환)"""
+        if self._base64 is None:
+            self._base64 = base64.b64encode(self.data).decode('utf-8')
+        return self._base64
+
+
+class EncodedFrameCache:
+    """스트림 변형별 최신 인코딩 결과를 보관하는 싱글톤 클래스"""
+
+    _instance = None
+    _initialized = False
+
+    def __new__(cls):
+        if cls._instance is None:
+            cls._instance = super(EncodedFrameCache, cls).__new__(cls)
+        return cls._instance
+
+    def __init__(self):
+        if self._initialized:
+            return
+
+        self._entries: Dict[str, EncodedFrame] = {}
+        self._locks: Dict[str, threading.Lock] = {}
+        self._locks_guard = threading.Lock()
+
+        # 통계
+        self.hits = 0
+        self.misses = 0
+        self.pending = 0  # 대기/진행 중인 인코딩 수 (인코딩 큐 깊이, frame_encoder.encode_variant_async)
+        self.peak_pending = 0  # 마지막 take_peak_pending 이후 최대 pending
+
+        self._initialized = True
+
+    def _lock_for(self, variant: str) -> threading.Lock:
+        with self._locks_guard:
+            lock = self._locks.get(variant)
+            if lock is None:
+                lock = self._locks[variant] = threading.Lock()
+            return lock
+
+    def get_or_encode(self, variant: str, sequence: int,
+                      encode_fn: Callable[[], Optional[EncodedFrame]]) -> Optional[EncodedFrame]:
+        """해당 순번의 인코딩 결과가 있으면 재사용하고, 없으면 encode_fn으로 생성합니다."""
+        entry = self._entries.get(variant)
+        if entry is not None and entry.sequence == sequence:
+            self.hits += 1
+            return entry
+
+        # 같은 변형을 동시에 두 번 인코딩하지 않도록 변형별로 잠급니다.
+        with self._lock_for(variant):
+            entry = self._entries.get(variant)
+            if entry is not None and entry.sequence == sequence:
+                self.hits += 1
+                return entry
+
+            self.misses += 1
+            encoded = encode_fn()
+            if encoded is not None:
+                self._entries[variant] = encoded
+            return encoded
+
+    def enqueue(self) -> None:
+        """인코딩 작업이 큐에 들어갔음을 기록합니다."""
+        with self._locks_guard:
+            self.pending += 1
+            self.peak_pending = max(self.peak_pending, self.pending)
+
+    def dequeue(self) -> None:
+        """인코딩 작업이 끝났음을 기록합니다. (작업자 스레드에서 호출될 수 있음)"""
+        with self._locks_guard:
+            self.pending -= 1
+
+    def take_peak_pending(self) -> int:
+        """마지막 호출 이후의 최대 인코딩 큐 깊이를 반환하고 현재 깊이로 초기화합니다."""
+        with self._locks_guard:
+            peak, self.peak_pending = self.peak_pending, self.pending
+            return peak
+
+    def put(self, variant: str, encoded: EncodedFrame) -> None:
+        """이미 인코딩된 프레임을 캐시에 직접 저장합니다."""
+        self._entries[variant] = encoded
+
+    def get_latest(self, variant: str) -> Optional[EncodedFrame]:
+        """변형의 가장 최근 인코딩 결과를 반환합니다."""
+        return self._entries.get(variant)
+
+    def invalidate(self, variant: Optional[str] = None) -> None:
+        """캐시를 비웁니다. variant를 지정하면 해당 변형만 비웁니다."""
+        if variant is None:
+            self._entries.clear()
+        else:
+            self._entries.pop(variant, None)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """캐시 통계 반환"""
+        total = self.hits + self.misses
+        return {
+            "variants": sorted(self._entries.keys()),
+            "hits": self.hits,
+            "misses": self.misses,
+            "pending": self.pending,
+            "hit_rate": self.hits / total if total else 0.0,
+        }
@@ -0,0 +1,620 @@
+"""
+프레임 인코딩 모듈
+FrameData의 컬러/뎁스 이미지를 전송용 바이트로 인코딩하고,
+결과를 EncodedFrameCache에 저장하여 여러 클라이언트가 공유하도록 합니다.
+
+이미지 포맷별 인코더는 config.json의 "encoding" 섹션(스트림별)으로 설정합니다.
+    backend       : 'auto' 포맷에 사용할 백엔드 (opencv_jpeg, turbojpeg, webp, png, raw, auto)
+    jpeg_backend  : 'jpeg' 포맷에 사용할 백엔드 (opencv_jpeg, turbojpeg, auto)
+    quality, subsampling, optimize, png_compression
+    auto_candidates, auto_target_bytes, auto_iterations : 'auto' 벤치마크 설정
+"""
+
+import asyncio
+import io
+import logging
+import threading
+import time
+import numpy as np
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional, Dict, Callable, Any, Tuple, Deque
+from binary_protocol import POINT_XYZRGBA, QDEPTH_HEADER, MESH_HEADER, QUANT_MODES, pack_codes
+from buffer_pool import BufferPool
+from config import Config
+from frame_cache import EncodedFrame, EncodedFrameCache
+from metrics import Histogram, MetricsRegistry
+from realsense_manager import FrameData, RealSenseManager
+from depth_processing import (
+    deproject_depth, pool_depth_grid, build_depth_mesh, voxel_downsample, quantize_depth
+)
+from encoder_backends import (
+    ImageEncoder, FORMAT_BACKENDS, available_backends, create_encoder,
+    make_benchmark_image, make_benchmark_yuyv, benchmark_backends, select_fastest
+)
+from startup import lazy_import
+
+# OpenCV는 첫 인코딩 시점에 불러옵니다. (서버 시작 시간 단축)
+cv2 = lazy_import('cv2')
+
+logger = logging.getLogger(__name__)
+
+# --- 스트림 변형 이름 ---
+COLOR_JPEG = 'color:jpeg'
+COLOR_PNG = 'color:png'
+COLOR_WEBP = 'color:webp'
+COLOR_RAW = 'color:raw'  # BGR8 픽셀 그대로 (YUYV 수신 시에도 BGR로 변환하여 전송)
+COLOR_AUTO = 'color:auto'  # 설정/벤치마크로 선택된 백엔드
+COLOR_NPY = 'color:npy'
+DEPTH_JPEG = 'depth:jpeg'  # JET 컬러맵을 적용한 시각화용 뎁스
+DEPTH_WEBP = 'depth:webp'
+DEPTH_AUTO = 'depth:auto'
+DEPTH_PNG16 = 'depth:png16'  # 원본 16비트 뎁스 (무손실)
+DEPTH_NPY = 'depth:npy'
+# 범위 양자화 뎁스: QDEPTH_HEADER + 코드 비트 스트림 (depth_processing.pack_codes)
+DEPTH_QUANTIZED: Dict[str, Tuple[int, str]] = {
+    f"depth:q{bits}{'log' if mode == 'log' else ''}": (bits, mode)
+    for bits in (8, 10, 12) for mode in QUANT_MODES
+}
+METADATA_HEADER = 'metadata:header'  # 하드웨어 메타데이터 고정 길이 헤더 (FrameData.to_header_bytes)
+POINTCLOUD_XYZ32F = 'pointcloud:xyz32f'  # (N, 3) float32 little-endian, 미터
+POINTCLOUD_VOXEL = 'pointcloud:voxel'  # 복셀당 평균 점 1개, POINT_XYZRGBA 레코드 (16바이트)
+DEPTHGRID_F16 = 'depthgrid:f16'  # (grid_height, grid_width) float16 little-endian, 미터 (0 = 뎁스 없음)
+MESH_INDEXED = 'mesh:indexed'  # 메시 헤더 + 정점(float32 XYZ) + 삼각형 인덱스 (uint16/uint32)
+
+DEFAULT_AUTO_CANDIDATES = ['turbojpeg', 'opencv_jpeg', 'webp']
+
+# 복셀 다운샘플링 소요 시간 (초, 뎁스 변환 포함)
+VOXEL_TIMING = Histogram((0.001, 0.002, 0.005, 0.01, 0.02, 0.05, 0.1, 0.2))
+MetricsRegistry().add_histogram(
+    'rsunity_voxel_downsample_seconds', VOXEL_TIMING,
+    help='Time to deproject and voxel-downsample one depth frame',
+)
+
+# --- 인코더 상태 ---
+_encoders: Dict[Tuple[str, str], ImageEncoder] = {}
+_selection: Dict[str, Dict[str, Any]] = {}
+_encoders_lock = threading.Lock()
+_colormap_cache: Tuple[Tuple[int, bool, int], Optional[np.ndarray]] = ((-1, True, 1), None)
+_retired_colormaps: Deque[np.ndarray] = deque()
+
+# 전송 경로의 인코딩은 이벤트 루프 대신 전용 작업자 스레드 하나에서 순서대로 실행합니다.
+# (컬러맵 캐시 등 변형 간 공유 상태를 잠금 없이 유지하고, 밀린 작업 수를 인코딩 큐 깊이로 측정)
+_encode_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='rsunity-encode')
+
+# --- 과부하 시 품질 저하 상태 (overload_governor가 set_degradation으로 조정) ---
+# quality        : 손실 인코더 품질 상한 (None이면 설정값)
+# colorize_depth : False면 뎁스 시각화 이미지에 컬러맵을 적용하지 않고 8비트 그레이로 인코딩
+# decimation     : 시각화용 이미지(컬러, 컬러맵 뎁스)를 N배 축소 (1이면 원본)
+_degradation: Dict[str, Any] = {"quality": None, "colorize_depth": True, "decimation": 1}
+
+
+# --- 이미지 소스 ---
+# 소스는 (이미지, 임시 버퍼 여부)를 반환합니다. 임시 버퍼는 인코딩 후 BufferPool에 반환됩니다.
+ImageSource = Callable[[FrameData], Tuple[Optional[np.ndarray], bool]]
+
+
+def _decimate(image: np.ndarray) -> Tuple[np.ndarray, bool]:
+    """품질 저하 단계의 축소 비율을 적용합니다. 축소한 경우 풀 버퍼에 복사하여 반환합니다."""
+    step = _degradation["decimation"]
+    if step <= 1:
+        return image, False
+    view = image[::step, ::step]
+    decimated = BufferPool().acquire(view.shape, view.dtype)
+    np.copyto(decimated, view)
+    return decimated, True
+
+
+def _color_source(frame_data: FrameData) -> Tuple[Optional[np.ndarray], bool]:
+    if frame_data.color_frame is None:
+        return None, False
+    return _decimate(frame_data.color_frame)
+
+
+def _depth_raw_source(frame_data: FrameData) -> Tuple[Optional[np.ndarray], bool]:
+    return frame_data.depth_frame, False
+
+
+def _depth_colormap_source(frame_data: FrameData) -> Tuple[Optional[np.ndarray], bool]:
+    """뎁스를 8비트로 정규화하고 JET 컬러맵을 적용합니다. (프레임당 한 번만 계산)"""
+    global _colormap_cache
+    depth = frame_data.depth_frame
+    if depth is None:
+        return None, False
+
+    key = (frame_data.sequence, _degradation["colorize_depth"], _degradation["decimation"])
+    cached_key, cached = _colormap_cache
+    if cached_key == key and cached is not None:
+        return cached, False
+
+    pool = BufferPool()
+    source, temporary = _decimate(depth)
+    # Depth data is usually 16-bit, scale it for visualization
+    depth_visual = pool.acquire(source.shape, np.uint8)
+    cv2.normalize(source, depth_visual, 0, 255, cv2.NORM_MINMAX, dtype=cv2.CV_8U)
+    if temporary:
+        pool.release(source)
+    if _degradation["colorize_depth"]:
+        depth_visual_color = pool.acquire(source.shape + (3,), np.uint8)
+        cv2.applyColorMap(depth_visual, cv2.COLORMAP_JET, depth_visual_color)
+        pool.release(depth_visual)
+        depth_visual = depth_visual_color
+
+    _colormap_cache = (key, depth_visual)
+    _retire_colormap(cached)
+    return depth_visual, False
+
+
+def _retire_colormap(image: Optional[np.ndarray]):
+    """캐시에서 밀려난 컬러맵 버퍼를 한 프레임 늦게 풀에 반환합니다.
+    (직전 프레임을 아직 인코딩 중인 스레드가 있을 수 있으므로 바로 재사용하지 않습니다.)"""
+    if image is not None:
+        _retired_colormaps.append(image)
+    while len(_retired_colormaps) > 1:
+        BufferPool().release(_retired_colormaps.popleft())
+
+
+# 이미지 변형 -> (스트림, 이미지 소스, 포맷)
+IMAGE_VARIANTS: Dict[str, Tuple[str, ImageSource, str]] = {
+    COLOR_JPEG: ('color', _color_source, 'jpeg'),
+    COLOR_PNG: ('color', _color_source, 'png'),
+    COLOR_WEBP: ('color', _color_source, 'webp'),
+    COLOR_RAW: ('color', _color_source, 'raw'),
+    COLOR_AUTO: ('color', _color_source, 'auto'),
+    DEPTH_JPEG: ('depth', _depth_colormap_source, 'jpeg'),
+    DEPTH_WEBP: ('depth', _depth_colormap_source, 'webp'),
+    DEPTH_AUTO: ('depth', _depth_colormap_source, 'auto'),
+    DEPTH_PNG16: ('depth', _depth_raw_source, 'png16'),
+}
+
+
+# --- 인코더 설정 ---
+def _stream_options(stream: str) -> Dict[str, Any]:
+    return Config().get_encoding_config().get(stream, {})
+
+
+def _benchmark_and_select(stream: str, candidates, options: Dict[str, Any],
+                          width: int, height: int, yuyv: bool = False) -> Optional[Dict[str, Any]]:
+    """후보 백엔드를 현재 호스트에서 측정하여 가장 빠른 백엔드를 고릅니다.
+
+    yuyv이면 YUYV 입력 기준으로 측정합니다. (YUYV를 받지 못하는 백엔드는 BGR 변환 시간 포함)
+    """
+    available = set(available_backends())
+    candidates = [name for name in candidates if name in available]
+    image = make_benchmark_yuyv(width, height) if yuyv else make_benchmark_image(width, height)
+    results = benchmark_backends(image, candidates, options, int(options.get('auto_iterations', 10)), yuyv)
+    chosen = select_fastest(results, int(options.get('auto_target_bytes', 0)))
+    for result in results:
+        logger.info(
+            f"[{stream}] 인코더 벤치마크{' (YUYV 입력)' if yuyv else ''} {result['backend']}: "
+            f"{result['avg_ms']:.2f} ms, {result['avg_bytes']} bytes"
+        )
+    return {"chosen": chosen, "results": results} if chosen else None
+
+
+def configure_encoders(width: Optional[int] = None, height: Optional[int] = None) -> Dict[str, Dict[str, Any]]:
+    """설정에 따라 스트림/포맷별 인코더를 생성합니다. 'auto' 백엔드는 이 시점에 벤치마크합니다.
+
+    시간이 걸릴 수 있으므로 서버 시작 시 executor에서 호출하는 것을 권장합니다.
+    """
+    rs_config = Config().get_realsense_config()
+    width = width or rs_config.get('width', 424)
+    height = height or rs_config.get('height', 240)
+
+    encoders: Dict[Tuple[str, str], ImageEncoder] = {}
+    selection: Dict[str, Dict[str, Any]] = {}
+    for stream in ('color', 'depth'):
+        options = _stream_options(stream)
+        yuyv = stream == 'color' and rs_config.get('color_format', 'bgr8') == 'yuyv'
+
+        # 'jpeg' 포맷: 지정된 JPEG 백엔드, 'auto'면 사용 가능한 JPEG 백엔드 중 가장 빠른 것
+        jpeg_backend = options.get('jpeg_backend', 'auto')
+        if jpeg_backend == 'auto':
+            benchmark = _benchmark_and_select(stream, FORMAT_BACKENDS['jpeg'], options, width, height, yuyv)
+            jpeg_backend = benchmark["chosen"]["backend"] if benchmark else 'opencv_jpeg'
+        encoders[(stream, 'jpeg')] = create_encoder(jpeg_backend, options)
+
+        for fmt in ('png', 'webp', 'raw'):
+            try:
+                encoders[(stream, fmt)] = create_encoder(FORMAT_BACKENDS[fmt][0], options)
+            except ValueError as e:
+                logger.info(f"[{stream}] '{fmt}' 포맷 사용 불가: {e}")
+
+        # 'auto' 포맷: 지정된 백엔드, 'auto'면 목표 크기를 만족하는 가장 빠른 후보
+        backend = options.get('backend', 'auto')
+        benchmark = None
+        if backend == 'auto':
+            candidates = options.get('auto_candidates', DEFAULT_AUTO_CANDIDATES)
+            benchmark = _benchmark_and_select(stream, candidates, options, width, height, yuyv)
+            backend = benchmark["chosen"]["backend"] if benchmark else jpeg_backend
+        encoders[(stream, 'auto')] = (
+            encoders[(stream, 'jpeg')] if backend == jpeg_backend else create_encoder(backend, options)
+        )
+
+        selection[stream] = {
+            "jpeg": encoders[(stream, 'jpeg')].describe(),
+            "auto": encoders[(stream, 'auto')].describe(),
+            "benchmark": benchmark["results"] if benchmark else None,
+        }
+        logger.info(f"[{stream}] 인코더 선택: jpeg={jpeg_backend}, auto={backend}")
+
+    # 16비트 뎁스 PNG는 컬러맵 뎁스와 같은 PNG 옵션을 사용합니다.
+    encoders[('depth', 'png16')] = create_encoder('png', _stream_options('depth'))
+
+    with _encoders_lock:
+        _encoders.clear()
+        _encoders.update(encoders)
+        _selection.clear()
+        _selection.update(selection)
+        _apply_quality_limit()
+    return selection
+
+
+def _apply_quality_limit():
+    """현재 품질 상한을 모든 인코더에 적용합니다. (상한이 없으면 설정 품질로 복원)"""
+    limit = _degradation["quality"]
+    for encoder in set(_encoders.values()):
+        configured = int(encoder.options.get('quality', 95))
+        encoder.set_quality(configured if limit is None else min(configured, limit))
+
+
+def set_degradation(quality: Optional[int] = None, colorize_depth: bool = True, decimation: int = 1):
+    """과부하 시 인코딩 비용을 줄이기 위한 품질 저하 단계를 설정합니다. 다음 프레임부터 적용됩니다."""
+    with _encoders_lock:
+        _degradation.update(quality=quality, colorize_depth=colorize_depth, decimation=max(1, int(decimation)))
+        _apply_quality_limit()
+
+
+def get_degradation() -> Dict[str, Any]:
+    return dict(_degradation)
+
+
+def get_stream_encoder(stream: str, fmt: str) -> Optional[ImageEncoder]:
+    """스트림/포맷에 해당하는 인코더를 반환합니다. 아직 설정되지 않았다면 설정합니다."""
+    if not _encoders:
+        configure_encoders()
+    return _encoders.get((stream, fmt))
+
+
+def on_stream_profile_changed(changes: Dict[str, Any]):
+    """스트림 프로파일이 바뀌면 인코딩 캐시를 비우고, 해상도가 바뀐 경우 인코더를 다시 선택합니다."""
+    global _colormap_cache
+    EncodedFrameCache().invalidate()
+    _retire_colormap(_colormap_cache[1])
+    _colormap_cache = ((-1, True, 1), None)
+    while _retired_colormaps:
+        BufferPool().release(_retired_colormaps.popleft())
+    if 'width' in changes or 'height' in changes:
+        # 이전 해상도의 여유 버퍼를 해제합니다.
+        BufferPool().clear()
+        configure_encoders()
+
+
+def get_encoder_selection() -> Dict[str, Dict[str, Any]]:
+    """스트림별 인코더 선택 결과 (벤치마크 측정값 포함)"""
+    return dict(_selection)
+
+
+def _resolve_variant(variant: str) -> str:
+    """'auto' 변형이 'jpeg' 변형과 같은 인코더를 쓰면 'jpeg' 변형으로 합쳐 캐시를 공유합니다."""
+    entry = IMAGE_VARIANTS.get(variant)
+    if entry is None or entry[2] != 'auto':
+        return variant
+    stream = entry[0]
+    if get_stream_encoder(stream, 'auto') is get_stream_encoder(stream, 'jpeg'):
+        return f"{stream}:jpeg"
+    return variant
+
+
+# --- 인코딩 함수 ---
+def _encode_image_variant(variant: str, frame_data: FrameData) -> Optional[EncodedFrame]:
+    """이미지 변형을 설정된 인코더로 인코딩합니다."""
+    stream, source, fmt = IMAGE_VARIANTS[variant]
+    encoder = get_stream_encoder(stream, fmt)
+    yuyv = frame_data.color_yuyv if stream == 'color' else None
+    if (encoder is not None and yuyv is not None and _degradation["decimation"] == 1
+            and encoder.supports_yuyv(yuyv.shape)):
+        # 카메라 원본 YUYV를 받는 인코더는 BGR 변환(color_frame 접근) 없이 바로 압축합니다.
+        image, temporary, encode = yuyv, False, encoder.encode_yuyv
+    else:
+        image, temporary = source(frame_data)
+        encode = encoder.encode if encoder is not None else None
+    if image is None:
+        return None
+
+    if encoder is None:
+        logger.warning(f"No encoder available for {variant}.")
+        if temporary:
+            BufferPool().release(image)
+        return None
+
+    try:
+        data = encode(image)
+    finally:
+        if temporary:
+            BufferPool().release(image)
+    if data is None:
+        logger.warning(f"Failed to encode {variant} frame.")
+        return None
+
+    return EncodedFrame(
+        stream=stream,
+        codec='png16' if fmt == 'png16' else encoder.codec,
+        sequence=frame_data.sequence,
+        timestamp=frame_data.timestamp,
+        width=image.shape[1],
+        height=image.shape[0],
+        data=data,
+    )
+
+
+def _encode_npy(frame_data: FrameData, stream: str) -> Optional[EncodedFrame]:
+    """이미지를 NumPy .npy 포맷으로 직렬화합니다."""
+    image = frame_data.color_frame if stream == 'color' else frame_data.depth_frame
+    if image is None:
+        return None
+
+    buffer = io.BytesIO()
+    np.save(buffer, image, allow_pickle=False)
+    return EncodedFrame(
+        stream=stream,
+        codec='npy',
+        sequence=frame_data.sequence,
+        timestamp=frame_data.timestamp,
+        width=image.shape[1],
+        height=image.shape[0],
+        data=buffer.getvalue(),
+    )
+
+
+def encode_pointcloud_xyz32f(frame_data: FrameData) -> Optional[EncodedFrame]:
+    """뎁스 프레임을 포인트 클라우드로 변환하여 float32 XYZ 바이트로 직렬화합니다."""
+    depth = frame_data.depth_frame
+    rs_manager = RealSenseManager()
+    if depth is None or rs_manager.depth_intrinsics is None:
+        return None
+
+    with BufferPool().borrow((depth.size, 3), np.float32) as buffer:
+        points = deproject_depth(depth, rs_manager.depth_scale, rs_manager.depth_intrinsics, out=buffer)
+        data = points.astype('<f4', copy=False).tobytes()
+    # width/height는 원본 뎁스 해상도이며, 포인트 개수는 len(data) // 12 입니다.
+    return EncodedFrame(
+        stream='pointcloud',
+        codec='xyz32f',
+        sequence=frame_data.sequence,
+        timestamp=frame_data.timestamp,
+        width=depth.shape[1],
+        height=depth.shape[0],
+        data=data,
+    )
+
+
+def encode_pointcloud_voxel(frame_data: FrameData) -> Optional[EncodedFrame]:
+    """뎁스 프레임을 포인트 클라우드로 변환한 뒤 복셀 격자(depth_processing.voxel_size)로 다운샘플링합니다.
+
+    컬러 프레임이 뎁스와 같은 해상도이면 같은 픽셀의 색을 평균하여 함께 보냅니다. (정렬(align)은 하지 않음)
+    """
+    depth = frame_data.depth_frame
+    rs_manager = RealSenseManager()
+    if depth is None or rs_manager.depth_intrinsics is None:
+        return None
+
+    voxel_size = float(Config().get_depth_processing_config().get('voxel_size', 0.02))
+    color = frame_data.color_frame
+    if color is not None and color.shape[:2] != depth.shape:
+        color = None
+
+    start = time.perf_counter()
+    pool = BufferPool()
+    with pool.borrow((depth.size, 3), np.float32) as point_buffer, \
+            pool.borrow((depth.size, 3), np.uint8) as color_buffer, \
+            pool.borrow((depth.size,), np.bool_) as valid:
+        points = deproject_depth(depth, rs_manager.depth_scale, rs_manager.depth_intrinsics, out=point_buffer)
+        colors = None
+        if color is not None:
+            # deproject_depth와 같은 순서(뎁스 0 제외)로 BGR -> RGB 색을 모읍니다.
+            np.greater(depth.reshape(-1), 0, out=valid)
+            colors = np.compress(valid, color.reshape(-1, 3)[:, ::-1], axis=0, out=color_buffer[:len(points)])
+        voxels, voxel_colors = voxel_downsample(points, voxel_size, colors)
+        input_points = len(points)
+
+    records = np.empty(len(voxels), dtype=POINT_XYZRGBA)
+    records['x'], records['y'], records['z'] = voxels[:, 0], voxels[:, 1], voxels[:, 2]
+    if voxel_colors is not None:
+        records['r'], records['g'], records['b'] = voxel_colors[:, 0], voxel_colors[:, 1], voxel_colors[:, 2]
+        records['a'] = 255
+    else:
+        records['r'] = records['g'] = records['b'] = records['a'] = 0
+
+    elapsed = time.perf_counter() - start
+    VOXEL_TIMING.observe(elapsed)
+    metrics = MetricsRegistry()
+    metrics.set_gauge('rsunity_voxel_points', input_points, help='Points before/after voxel downsampling',
+                      labels={'stage': 'input'})
+    metrics.set_gauge('rsunity_voxel_points', len(records), help='Points before/after voxel downsampling',
+                      labels={'stage': 'output'})
+    logger.debug(f"복셀 다운샘플링: {input_points} -> {len(records)}점, {elapsed * 1000:.1f}ms")
+
+    # width/height는 원본 뎁스 해상도이며, 점 개수는 len(data) // 16 입니다.
+    return EncodedFrame(
+        stream='pointcloud',
+        codec='xyzrgba',
+        sequence=frame_data.sequence,
+        timestamp=frame_data.timestamp,
+        width=depth.shape[1],
+        height=depth.shape[0],
+        data=records.tobytes(),
+    )
+
+
+def encode_depth_quantized(frame_data: FrameData, bits: int, mode: str) -> Optional[EncodedFrame]:
+    """뎁스를 depth_processing.quant_near_m~quant_far_m 범위의 bits비트 코드로 양자화하여 빈틈없이 묶습니다."""
+    depth = frame_data.depth_frame
+    rs_manager = RealSenseManager()
+    if depth is None or rs_manager.depth_scale is None:
+        return None
+
+    options = Config().get_depth_processing_config()
+    near = float(options.get('quant_near_m', 0.2))
+    far = float(options.get('quant_far_m', 5.0))
+    with BufferPool().borrow(depth.shape, np.uint8 if bits == 8 else np.uint16) as codes:
+        quantize_depth(depth, rs_manager.depth_scale, bits, mode, near, far, out=codes)
+        data = pack_codes(codes, bits)
+    return EncodedFrame(
+        stream='depth',
+        codec='qdepth',
+        sequence=frame_data.sequence,
+        timestamp=frame_data.timestamp,
+        width=depth.shape[1],
+        height=depth.shape[0],
+        data=QDEPTH_HEADER.pack(bits, QUANT_MODES.index(mode), near, far) + data,
+    )
+
+
+def encode_depth_grid_f16(frame_data: FrameData) -> Optional[EncodedFrame]:
+    """뎁스 프레임을 config.json depth_processing 설정의 저해상도 격자로 줄여 float16 바이트로 직렬화합니다."""
+    depth = frame_data.depth_frame
+    rs_manager = RealSenseManager()
+    if depth is None or rs_manager.depth_scale is None:
+        return None
+
+    options = Config().get_depth_processing_config()
+    grid = pool_depth_grid(
+        depth, rs_manager.depth_scale,
+        int(options.get('grid_width', 64)), int(options.get('grid_height', 48)),
+        options.get('grid_method', 'min'),
+    )
+    return EncodedFrame(
+        stream='depthgrid',
+        codec='f16',
+        sequence=frame_data.sequence,
+        timestamp=frame_data.timestamp,
+        width=grid.shape[1],
+        height=grid.shape[0],
+        data=grid.astype('<f2', copy=False).tobytes(),
+    )
+
+
+def encode_mesh_indexed(frame_data: FrameData) -> Optional[EncodedFrame]:
+    """뎁스 프레임을 삼각형 메시(경계 삼각형 제외)로 변환하여 정점/인덱스 버퍼로 직렬화합니다.
+
+    페이로드: MESH_HEADER + vertex_count * 12바이트 float32 XYZ + triangle_count * 3 * index_size바이트 인덱스
+    """
+    depth = frame_data.depth_frame
+    rs_manager = RealSenseManager()
+    if depth is None or rs_manager.depth_intrinsics is None:
+        return None
+
+    options = Config().get_depth_processing_config()
+    step = int(options.get('mesh_step', 4))
+    vertices, indices = build_depth_mesh(
+        depth, rs_manager.depth_scale, rs_manager.depth_intrinsics,
+        step=step, max_depth_jump=float(options.get('mesh_max_depth_jump', 0.1)),
+    )
+    header = MESH_HEADER.pack(len(vertices), len(indices), indices.dtype.itemsize)
+    index_dtype = '<u2' if indices.dtype.itemsize == 2 else '<u4'
+    # width/height는 정점 격자 크기입니다.
+    return EncodedFrame(
+        stream='mesh',
+        codec='mesh',
+        sequence=frame_data.sequence,
+        timestamp=frame_data.timestamp,
+        width=len(range(0, depth.shape[1], step)),
+        height=len(range(0, depth.shape[0], step)),
+        data=b''.join((header, vertices.astype('<f4', copy=False).tobytes(),
+                       indices.astype(index_dtype, copy=False).tobytes())),
+    )
+
+
+def encode_metadata_header(frame_data: FrameData) -> Optional[EncodedFrame]:
+    """프레임 메타데이터(하드웨어 프레임 번호, 센서 타임스탬프, 노출 등)를 고정 길이 헤더로 직렬화합니다."""
+    return EncodedFrame(
+        stream='metadata',
+        codec='rsfm',
+        sequence=frame_data.sequence,
+        timestamp=frame_data.timestamp,
+        width=0,
+        height=0,
+        data=frame_data.to_header_bytes(),
+    )
+
+
+VARIANT_ENCODERS: Dict[str, Callable[[FrameData], Optional[EncodedFrame]]] = {
+    **{variant: (lambda frame_data, v=variant: _encode_image_variant(v, frame_data))
+       for variant in IMAGE_VARIANTS},
+    COLOR_NPY: lambda frame_data: _encode_npy(frame_data, 'color'),
+    DEPTH_NPY: lambda frame_data: _encode_npy(frame_data, 'depth'),
+    **{variant: (lambda frame_data, b=bits, m=mode: encode_depth_quantized(frame_data, b, m))
+       for variant, (bits, mode) in DEPTH_QUANTIZED.items()},
+    POINTCLOUD_XYZ32F: encode_pointcloud_xyz32f,
+    POINTCLOUD_VOXEL: encode_pointcloud_voxel,
+    DEPTHGRID_F16: encode_depth_grid_f16,
+    MESH_INDEXED: encode_mesh_indexed,
+    METADATA_HEADER: encode_metadata_header,
+}
+
+
+def encode_variant(variant: str, frame_data: FrameData, use_cache: bool = True) -> Optional[EncodedFrame]:
+    """스트림 변형을 인코딩합니다. 같은 프레임이 이미 인코딩되었다면 캐시를 재사용합니다.
+
+    기록(history)에서 꺼낸 지난 프레임처럼 다시 요청될 가능성이 낮은 프레임은
+    use_cache=False로 인코딩하여 최신 프레임의 캐시 항목을 덮어쓰지 않게 합니다.
+    """
+    if variant not in VARIANT_ENCODERS:
+        raise ValueError(f"Unknown stream variant: {variant}")
+    if frame_data is None:
+        return None
+    if frame_data.relayed:
+        return _relayed_variant(variant, frame_data)
+
+    variant = _resolve_variant(variant)
+    encoder = VARIANT_ENCODERS[variant]
+    if not use_cache:
+        return encoder(frame_data)
+    return EncodedFrameCache().get_or_encode(
+        variant, frame_data.sequence, lambda: encoder(frame_data)
+    )
+
+
+def _relayed_variant(variant: str, frame_data: FrameData) -> Optional[EncodedFrame]:
+    """릴레이 프레임은 상위 서버에서 받아 캐시에 넣은 결과만 반환합니다.
+
+    받지 않은 변형을 여기서 인코딩하면 픽셀 없는 프레임으로 인코더 설정('auto' 벤치마크 포함)이
+    시작되므로, 캐시에 없으면 None을 반환합니다. (구독은 RelaySource.check_subscription에서 걸러짐)
+    """
+    entry = EncodedFrameCache().get_latest(variant)
+    if entry is None or entry.sequence != frame_data.sequence:
+        return None
+    return entry
+
+
+async def encode_variant_async(variant: str, frame_data: FrameData, use_cache: bool = True) -> Optional[EncodedFrame]:
+    """encode_variant를 인코딩 스레드에서 실행합니다.
+
+    대기/진행 중인 작업은 EncodedFrameCache.pending(인코딩 큐 깊이)으로 집계되며,
+    호출한 코루틴이 취소되어도 스레드의 인코딩이 끝날 때까지 큐에 남습니다.
+    프레임도 같은 동안 임대(RealSenseManager.lease_frame)하여 인코딩 중에 버퍼가 재사용되지 않게 합니다.
+    버퍼가 이미 재사용된 프레임(recycled)은 인코딩하지 않고 None을 반환합니다.
+    """
+    if variant not in VARIANT_ENCODERS:
+        raise ValueError(f"Unknown stream variant: {variant}")
+    if frame_data is None:
+        return None
+    if frame_data.relayed:
+        return _relayed_variant(variant, frame_data)
+
+    rs_manager = RealSenseManager()
+    leased = rs_manager.lease_frame(frame_data)
+    if not leased and frame_data.recycled:
+        return None
+    cache = EncodedFrameCache()
+    cache.enqueue()
+
+    def done(_):
+        cache.dequeue()
+        if leased:
+            rs_manager.release_frame(frame_data)
+
+    future = _encode_executor.submit(encode_variant, variant, frame_data, use_cache)
+    future.add_done_callback(done)
+    return await asyncio.wrap_future(future)
@@ -0,0 +1,185 @@
+"""
+프레임 기록 링 버퍼
+librealsense 버퍼에서 복사한(소유한) 최근 프레임 N개를 보관하여,
+클라이언트와 처리 단계가 창(window) 안의 임의 프레임을 순번 또는 타임스탬프로 조회할 수 있게 합니다.
+
+    - 프레임 배열은 BufferPool 버퍼이며, 밀려난 프레임의 버퍼는 풀로 반환되어 다음 프레임에 재사용됩니다.
+    - 프레임을 사용하는 쪽(클라이언트 전송 루프, 인코딩 스레드 등)은 임대하고 release로 반환합니다.
+      조회와 임대는 lease_latest, get(lease=True)처럼 잠금 안에서 함께 해야 그 사이에 밀려나지 않습니다.
+    - 임대 중에 밀려난 프레임은 보관만 하다가 마지막 임대가 반환될 때 버퍼를 풀로 돌려줍니다.
+      버퍼를 돌려준 프레임은 frame.recycled가 True가 되며 더 이상 임대할 수 없습니다.
+    - 보관 한도는 프레임 수(max_frames)와 메모리(max_bytes, 0이면 무제한) 중 먼저 도달하는 쪽입니다.
+"""
+
+import bisect
+import threading
+from collections import deque
+from typing import Optional, Dict, Any, Deque
+from buffer_pool import BufferPool
+
+
+def frame_nbytes(frame) -> int:
+    """프레임이 소유한 이미지 배열의 총 바이트 수"""
+    arrays = (getattr(frame, name) for name in frame.ARRAY_FIELDS)
+    return sum(array.nbytes for array in arrays if array is not None)
+
+
+class FrameRing:
+    """최근 프레임을 순번 순서로 보관하는 링 버퍼 (스레드 안전)"""
+
+    def __init__(self, max_frames: int = 30, max_bytes: int = 0):
+        self.max_frames = max(1, int(max_frames))
+        self.max_bytes = max(0, int(max_bytes))
+        self._frames: Deque = deque()
+        # 추가 시점의 프레임별 바이트 수 (나중에 지연 변환된 BGR 버퍼는 한도 계산에 포함하지 않음)
+        self._sizes: Deque[int] = deque()
+        self._bytes = 0
+        # id(프레임) -> 임대 수 (링 안의 프레임과 임대 중에 밀려난 프레임)
+        self._leases: Dict[int, int] = {}
+        # 임대 중에 밀려나 마지막 반환을 기다리는 프레임
+        self._retired: Dict[int, Any] = {}
+        self._lock = threading.Lock()
+
+        # 통계
+        self.evicted = 0
+        self.recycled = 0
+
+    def append(self, frame) -> None:
+        """프레임을 추가하고 한도를 넘는 오래된 프레임을 밀어냅니다. 순번은 증가해야 합니다."""
+        with self._lock:
+            size = frame_nbytes(frame)
+            self._frames.append(frame)
+            self._sizes.append(size)
+            self._leases[id(frame)] = 0
+            self._bytes += size
+            while len(self._frames) > 1 and (
+                len(self._frames) > self.max_frames
+                or (self.max_bytes and self._bytes > self.max_bytes)
+            ):
+                self._evict()
+
+    def _evict(self):
+        self._bytes -= self._sizes.popleft()
+        self.evicted += 1
+        self._retire(self._frames.popleft())
+
+    def _retire(self, frame):
+        """링에서 빠진 프레임: 임대 중이면 반환을 기다리고, 아니면 바로 버퍼를 재사용합니다."""
+        key = id(frame)
+        if self._leases[key]:
+            self._retired[key] = frame
+        else:
+            del self._leases[key]
+            self._recycle(frame)
+
+    def _recycle(self, frame):
+        """프레임의 버퍼를 풀로 반환합니다."""
+        frame.recycled = True
+        pool = BufferPool()
+        recycled = False
+        for name in frame.ARRAY_FIELDS:
+            array = getattr(frame, name)
+            if array is not None:
+                pool.release(array)
+                recycled = True
+        if recycled:
+            self.recycled += 1
+
+    def _lease(self, frame):
+        """(잠금 안에서) 링이 관리하는 프레임의 임대 수를 늘리고 프레임을 반환합니다."""
+        if frame is not None:
+            self._leases[id(frame)] += 1
+        return frame
+
+    def acquire(self, frame) -> bool:
+        """이미 가지고 있는 프레임을 한 번 더 임대합니다. (인코딩 스레드에 넘길 때 등)
+
+        링이 관리하지 않는 프레임이면 False입니다. 추가된 적 없는 프레임(측정용 등)과
+        이미 버퍼가 재사용된 프레임(frame.recycled)은 recycled 속성으로 구분합니다.
+        """
+        with self._lock:
+            if id(frame) not in self._leases:
+                return False
+            self._lease(frame)
+            return True
+
+    def release(self, frame) -> None:
+        """acquire한 임대를 반환합니다. 밀려난 프레임의 마지막 임대이면 버퍼를 풀로 돌려줍니다."""
+        with self._lock:
+            key = id(frame)
+            if not self._leases.get(key):
+                return
+            self._leases[key] -= 1
+            if not self._leases[key] and key in self._retired:
+                del self._leases[key]
+                self._recycle(self._retired.pop(key))
+
+    def clear(self) -> None:
+        with self._lock:
+            while self._frames:
+                self._bytes -= self._sizes.popleft()
+                self._retire(self._frames.popleft())
+
+    def get(self, sequence: int, lease: bool = False):
+        """순번으로 프레임을 조회합니다. 창 밖이면 None (lease=True이면 임대하여 반환)"""
+        with self._lock:
+            return self._lease(self._find(sequence)) if lease else self._find(sequence)
+
+    def _find(self, sequence: int):
+        if not self._frames:
+            return None
+        # 순번이 연속이면 바로 인덱싱하고, 아니면 이진 탐색합니다.
+        index = sequence - self._frames[0].sequence
+        if 0 <= index < len(self._frames) and self._frames[index].sequence == sequence:
+            return self._frames[index]
+        sequences = [frame.sequence for frame in self._frames]
+        index = bisect.bisect_left(sequences, sequence)
+        if index < len(sequences) and sequences[index] == sequence:
+            return self._frames[index]
+        return None
+
+    def get_nearest(self, timestamp: float, tolerance: Optional[float] = None, lease: bool = False):
+        """타임스탬프가 가장 가까운 프레임을 조회합니다. tolerance(초)보다 멀면 None (lease=True이면 임대하여 반환)"""
+        with self._lock:
+            frame = self._find_nearest(timestamp, tolerance)
+            return self._lease(frame) if lease else frame
+
+    def _find_nearest(self, timestamp: float, tolerance: Optional[float]):
+        if not self._frames:
+            return None
+        timestamps = [frame.timestamp for frame in self._frames]
+        index = bisect.bisect_left(timestamps, timestamp)
+        candidates = [i for i in (index - 1, index) if 0 <= i < len(timestamps)]
+        best = min(candidates, key=lambda i: abs(timestamps[i] - timestamp))
+        if tolerance is not None and abs(timestamps[best] - timestamp) > tolerance:
+            return None
+        return self._frames[best]
+
+    def latest(self):
+        with self._lock:
+            return self._frames[-1] if self._frames else None
+
+    def lease_latest(self, after_sequence: Optional[int] = None):
+        """최신 프레임을 임대하여 반환합니다. 순번이 after_sequence 이하이거나 비어 있으면 None"""
+        with self._lock:
+            if not self._frames:
+                return None
+            frame = self._frames[-1]
+            if after_sequence is not None and frame.sequence <= after_sequence:
+                return None
+            return self._lease(frame)
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "frames": len(self._frames),
+                "bytes": self._bytes,
+                "first_sequence": self._frames[0].sequence if self._frames else None,
+                "last_sequence": self._frames[-1].sequence if self._frames else None,
+                "max_frames": self.max_frames,
+                "max_bytes": self.max_bytes,
+                "evicted": self.evicted,
+                "recycled": self.recycled,
+                "leased": sum(1 for count in self._leases.values() if count),
+                "retired": len(self._retired),
+            }
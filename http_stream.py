@@ -0,0 +1,198 @@
+"""
+HTTP 모니터링 엔드포인트
+브라우저/대시보드용 MJPEG 스트림과 스냅샷을 제공합니다.
+모든 응답은 EncodedFrameCache의 인코딩 결과를 재사용하므로
+모니터를 추가해도 인코딩 비용은 늘지 않고 네트워크 비용만 늘어납니다.
+
+    GET /mjpeg/color, /mjpeg/depth          multipart/x-mixed-replace MJPEG (?priority=low 지원)
+    GET /snapshot/{stream}?format=jpeg|png16|npy   (ETag = 프레임 순번, depthgrid는 format=f16)
+        &seq=<순번> 또는 &t=<타임스탬프>로 기록 창 안의 지난 프레임을 조회할 수 있습니다.
+"""
+
+import logging
+import time
+from aiohttp import web
+from frame_encoder import (
+    COLOR_JPEG, DEPTH_JPEG, COLOR_PNG, DEPTH_PNG16, COLOR_NPY, DEPTH_NPY, DEPTHGRID_F16, encode_variant_async
+)
+from motion_gate import MotionGate
+from overload_governor import OverloadGovernor
+from realsense_manager import RealSenseManager
+from relay import RelaySource
+from subscriptions import Subscription, SubscriptionRegistry, PRIORITIES, DEFAULT_PRIORITY, HARDWARE_STREAMS
+
+logger = logging.getLogger(__name__)
+
+MJPEG_BOUNDARY = 'frame'
+
+MJPEG_VARIANTS = {
+    'color': COLOR_JPEG,
+    'depth': DEPTH_JPEG,
+}
+
+# (stream, format) -> (variant, content-type)
+SNAPSHOT_VARIANTS = {
+    ('color', 'jpeg'): (COLOR_JPEG, 'image/jpeg'),
+    ('depth', 'jpeg'): (DEPTH_JPEG, 'image/jpeg'),
+    ('color', 'png'): (COLOR_PNG, 'image/png'),
+    ('depth', 'png16'): (DEPTH_PNG16, 'image/png'),
+    ('color', 'npy'): (COLOR_NPY, 'application/octet-stream'),
+    ('depth', 'npy'): (DEPTH_NPY, 'application/octet-stream'),
+    ('depthgrid', 'f16'): (DEPTHGRID_F16, 'application/octet-stream'),
+}
+
+# 새 프레임 대기 타임아웃 (초)
+FRAME_WAIT_TIMEOUT = 1.0
+SNAPSHOT_TIMEOUT = 3.0
+
+
+async def mjpeg_handler(request: web.Request) -> web.StreamResponse:
+    """MJPEG(multipart/x-mixed-replace) 스트림 핸들러"""
+    stream = request.match_info['stream']
+    variant = MJPEG_VARIANTS.get(stream)
+    if variant is None:
+        raise web.HTTPNotFound(text=f"Unknown stream: {stream}")
+    priority = request.query.get('priority', DEFAULT_PRIORITY)
+    if priority not in PRIORITIES:
+        raise web.HTTPBadRequest(text=f"Unknown priority: {priority}")
+    try:
+        RelaySource().check_variants({stream: variant})
+    except ValueError as e:
+        raise web.HTTPBadRequest(text=str(e))
+
+    response = web.StreamResponse(headers={
+        'Content-Type': f'multipart/x-mixed-replace; boundary={MJPEG_BOUNDARY}',
+        'Cache-Control': 'no-cache, no-store, must-revalidate',
+        'Pragma': 'no-cache',
+    })
+    await response.prepare(request)
+
+    rs_manager = RealSenseManager()
+    registry = SubscriptionRegistry()
+    consumer_id = f"mjpeg:{id(response)}"
+    subscription = Subscription(streams={stream: 'jpeg'}, priority=priority)
+    registry.subscribe(consumer_id, subscription)
+    await rs_manager.add_consumer(consumer_id, subscription.hardware_streams())
+    logger.info(f"MJPEG client connected: {request.remote} stream={stream}")
+
+    governor = OverloadGovernor()
+    motion_gate = MotionGate()
+    last_sequence = 0
+    last_sent_at = float('-inf')
+    try:
+        while True:
+            frame_data = await rs_manager.lease_new_frame(last_sequence, FRAME_WAIT_TIMEOUT)
+            if frame_data is None:
+                continue
+            with rs_manager.leased_frame(frame_data):
+                if last_sequence:
+                    governor.report_client_backlog(consumer_id, frame_data.sequence - last_sequence - 1)
+                last_sequence = frame_data.sequence
+                if governor.should_pause(subscription) or not motion_gate.should_send(frame_data, last_sent_at):
+                    continue
+
+                encoded = await encode_variant_async(variant, frame_data)
+                if encoded is None:
+                    continue
+
+                part_header = (
+                    f"--{MJPEG_BOUNDARY}\r\n"
+                    f"Content-Type: image/jpeg\r\n"
+                    f"Content-Length: {len(encoded.data)}\r\n"
+                    f"X-Frame-Sequence: {encoded.sequence}\r\n\r\n"
+                ).encode('ascii')
+                await response.write(part_header + encoded.data + b"\r\n")
+                last_sent_at = time.monotonic()
+    except (ConnectionResetError, RuntimeError):
+        # 클라이언트가 연결을 끊으면 write에서 예외가 발생합니다.
+        pass
+    finally:
+        registry.unsubscribe(consumer_id)
+        await rs_manager.remove_consumer(consumer_id)
+        logger.info(f"MJPEG client disconnected: {request.remote} stream={stream}")
+
+    return response
+
+
+async def _get_snapshot_frame(request: web.Request, stream: str):
+    """스냅샷에 사용할 프레임을 임대하여 반환합니다. 해당 스트림이 캡처 중이 아니면 잠시 캡처를 켭니다.
+
+    호출자는 사용 후 RealSenseManager.release_frame으로 반환합니다.
+    """
+    rs_manager = RealSenseManager()
+    frame_data = rs_manager.lease_latest_frame()
+    hardware = HARDWARE_STREAMS[stream]
+    if rs_manager.is_running and hardware <= rs_manager.active_streams and frame_data is not None:
+        return frame_data
+
+    last_sequence = 0
+    if frame_data is not None:
+        last_sequence = frame_data.sequence
+        rs_manager.release_frame(frame_data)
+    consumer_id = f"snapshot:{id(request)}"
+    await rs_manager.add_consumer(consumer_id, hardware)
+    try:
+        return await rs_manager.lease_new_frame(last_sequence, SNAPSHOT_TIMEOUT)
+    finally:
+        await rs_manager.remove_consumer(consumer_id)
+
+
+def _get_history_frame(request: web.Request):
+    """?seq= 또는 ?t= 로 지정한 기록 프레임을 임대하여 반환합니다. 창 밖이면 404"""
+    rs_manager = RealSenseManager()
+    try:
+        if 'seq' in request.query:
+            frame_data = rs_manager.get_frame(int(request.query['seq']), lease=True)
+        else:
+            frame_data = rs_manager.get_frame_at(float(request.query['t']), lease=True)
+    except ValueError:
+        raise web.HTTPBadRequest(text="seq must be an integer and t a UNIX timestamp.")
+    if frame_data is None:
+        raise web.HTTPNotFound(text=f"Frame is outside the history window: {rs_manager.frame_history.get_stats()}")
+    return frame_data
+
+
+async def snapshot_handler(request: web.Request) -> web.Response:
+    """단일 프레임 스냅샷 핸들러 (ETag = 프레임 순번)"""
+    stream = request.match_info['stream']
+    fmt = request.query.get('format', 'jpeg')
+    entry = SNAPSHOT_VARIANTS.get((stream, fmt))
+    if entry is None:
+        supported = ', '.join(f"{s}?format={f}" for s, f in SNAPSHOT_VARIANTS)
+        raise web.HTTPNotFound(text=f"Unsupported snapshot: {stream}?format={fmt} (supported: {supported})")
+    variant, content_type = entry
+    try:
+        RelaySource().check_variants({stream: variant})
+    except ValueError as e:
+        raise web.HTTPBadRequest(text=str(e))
+
+    historical = 'seq' in request.query or 't' in request.query
+    if historical:
+        frame_data = _get_history_frame(request)
+    else:
+        frame_data = await _get_snapshot_frame(request, stream)
+    if frame_data is None:
+        raise web.HTTPServiceUnavailable(text="No frame available.")
+
+    try:
+        etag = f'"{frame_data.sequence}"'
+        if request.headers.get('If-None-Match') == etag:
+            return web.Response(status=304, headers={'ETag': etag})
+
+        encoded = await encode_variant_async(variant, frame_data, use_cache=not historical)
+    finally:
+        RealSenseManager().release_frame(frame_data)
+    if encoded is None:
+        raise web.HTTPServiceUnavailable(text=f"Stream '{stream}' is not available.")
+
+    return web.Response(body=encoded.data, content_type=content_type, headers={
+        'ETag': etag,
+        'Cache-Control': 'no-cache',
+        'X-Frame-Timestamp': str(encoded.timestamp),
+    })
+
+
+def setup_routes(app: web.Application):
+    """aiohttp 앱에 MJPEG/스냅샷 경로를 등록합니다."""
+    app.router.add_get('/mjpeg/{stream}', mjpeg_handler)
+    app.router.add_get('/snapshot/{stream}', snapshot_handler)
@@ -0,0 +1,192 @@
+"""
+이벤트 루프 지연 모니터
+주기적으로 짧게 sleep하여 예정보다 늦게 깨어난 시간(지연)을 히스토그램으로 기록하고,
+별도 감시 스레드가 루프가 임계값 이상 멈춰 있으면 그 순간 루프 스레드의 스택을 로그로 남깁니다.
+(어떤 동기 호출이 루프를 막고 있는지 바로 확인할 수 있습니다.)
+
+config.json의 server 섹션:
+    event_loop               : 'asyncio' (기본), 'uvloop', 'auto' (uvloop가 설치되어 있으면 사용)
+    loop_lag_interval_ms     : 지연 측정 간격
+    loop_block_threshold_ms  : 스택을 기록할 차단 시간
+"""
+
+import asyncio
+import logging
+import sys
+import threading
+import time
+import traceback
+from typing import Optional, Dict, Any, Coroutine
+from config import Config
+from metrics import Histogram, MetricsRegistry
+
+logger = logging.getLogger(__name__)
+
+EVENT_LOOPS = ('asyncio', 'uvloop', 'auto')
+
+# 지연 히스토그램 버킷 (초)
+LAG_BUCKETS = (0.001, 0.002, 0.005, 0.01, 0.02, 0.05, 0.1, 0.2, 0.5, 1.0, 2.0)
+
+
+def is_uvloop_available() -> bool:
+    """uvloop가 설치되어 있는지 여부"""
+    try:
+        import uvloop  # noqa: F401
+        return True
+    except ImportError:
+        return False
+
+
+def resolve_event_loop(name: str) -> str:
+    """설정값을 실제로 사용할 루프 이름('asyncio' 또는 'uvloop')으로 변환합니다."""
+    if name not in EVENT_LOOPS:
+        raise ValueError(f"Unknown event loop '{name}' (supported: {', '.join(EVENT_LOOPS)})")
+    if name == 'asyncio':
+        return 'asyncio'
+    if is_uvloop_available():
+        return 'uvloop'
+    if name == 'uvloop':
+        logger.warning("uvloop가 설치되어 있지 않아 기본 asyncio 루프를 사용합니다. (pip install uvloop)")
+    return 'asyncio'
+
+
+def run_event_loop(main: Coroutine, name: str = 'asyncio'):
+    """지정한 이벤트 루프 구현으로 코루틴을 실행합니다."""
+    if resolve_event_loop(name) == 'uvloop':
+        import uvloop
+        if hasattr(asyncio, 'Runner'):
+            with asyncio.Runner(loop_factory=uvloop.new_event_loop) as runner:
+                return runner.run(main)
+        asyncio.set_event_loop_policy(uvloop.EventLoopPolicy())
+    return asyncio.run(main)
+
+
+def describe_running_loop() -> str:
+    """현재 실행 중인 루프 구현 이름 (예: 'uvloop.Loop', 'asyncio.unix_events._UnixSelectorEventLoop')"""
+    loop = asyncio.get_running_loop()
+    return f"{type(loop).__module__}.{type(loop).__name__}"
+
+
+class LoopLagMonitor:
+    """이벤트 루프 지연을 측정하고 차단 시 스택을 기록하는 싱글톤 클래스"""
+
+    _instance = None
+    _initialized = False
+
+    def __new__(cls):
+        if cls._instance is None:
+            cls._instance = super(LoopLagMonitor, cls).__new__(cls)
+        return cls._instance
+
+    def __init__(self):
+        if self._initialized:
+            return
+
+        server_config = Config().get_server_config()
+        self.interval = float(server_config.get('loop_lag_interval_ms', 50)) / 1000.0
+        self.block_threshold = float(server_config.get('loop_block_threshold_ms', 250)) / 1000.0
+
+        self.histogram = Histogram(LAG_BUCKETS)
+        self.max_lag = 0.0
+        self.peak_lag = 0.0  # 마지막 take_peak_lag 이후 최대 지연
+        self.blocked_events = 0
+        MetricsRegistry().add_histogram(
+            'rsunity_event_loop_lag_seconds', self.histogram,
+            help='Event loop wake-up delay measured by the lag sampler',
+        )
+
+        self._heartbeat = time.monotonic()
+        self._loop_thread_id: Optional[int] = None
+        self._task: Optional[asyncio.Task] = None
+        self._watchdog: Optional[threading.Thread] = None
+        self._stop_event = threading.Event()
+
+        self._initialized = True
+
+    def reset(self):
+        """측정값을 초기화합니다."""
+        self.histogram.reset()
+        self.max_lag = 0.0
+        self.peak_lag = 0.0
+        self.blocked_events = 0
+
+    def take_peak_lag(self) -> float:
+        """마지막 호출 이후의 최대 지연(초)을 반환하고 초기화합니다. (과부하 제어의 측정 구간 신호)"""
+        peak, self.peak_lag = self.peak_lag, 0.0
+        return peak
+
+    async def _sample(self):
+        loop = asyncio.get_running_loop()
+        try:
+            while True:
+                scheduled = loop.time()
+                await asyncio.sleep(self.interval)
+                lag = max(0.0, loop.time() - scheduled - self.interval)
+                self._heartbeat = time.monotonic()
+                self.histogram.observe(lag)
+                if lag > self.max_lag:
+                    self.max_lag = lag
+                if lag > self.peak_lag:
+                    self.peak_lag = lag
+                if lag >= self.block_threshold:
+                    logger.warning(f"이벤트 루프가 {lag * 1000:.0f}ms 동안 차단되었습니다.")
+        except asyncio.CancelledError:
+            pass
+
+    def _watch(self):
+        """(감시 스레드) 루프가 임계값 이상 응답하지 않으면 루프 스레드의 현재 스택을 기록합니다."""
+        reported = False
+        while not self._stop_event.wait(self.block_threshold / 2):
+            stalled = time.monotonic() - self._heartbeat - self.interval
+            if stalled < self.block_threshold:
+                reported = False
+                continue
+            if reported:
+                continue
+            reported = True
+            self.blocked_events += 1
+            MetricsRegistry().inc_counter(
+                'rsunity_event_loop_blocked_total', help='Event loop stalls longer than the block threshold'
+            )
+            frame = sys._current_frames().get(self._loop_thread_id)
+            stack = ''.join(traceback.format_stack(frame)) if frame is not None else '(stack unavailable)\n'
+            logger.warning(
+                f"이벤트 루프가 {stalled * 1000:.0f}ms 이상 응답하지 않습니다. 루프 스레드 스택:\n{stack}"
+            )
+
+    def start(self):
+        """현재 루프에서 측정을 시작합니다."""
+        if self._task is not None and not self._task.done():
+            return
+        self._loop_thread_id = threading.get_ident()
+        self._heartbeat = time.monotonic()
+        self._task = asyncio.create_task(self._sample())
+
+        self._stop_event.clear()
+        self._watchdog = threading.Thread(target=self._watch, name='loop-watchdog', daemon=True)
+        self._watchdog.start()
+        logger.info(f"이벤트 루프 모니터 시작: {describe_running_loop()}, "
+                    f"측정 간격 {self.interval * 1000:.0f}ms, 차단 임계값 {self.block_threshold * 1000:.0f}ms")
+
+    async def stop(self):
+        self._stop_event.set()
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        if self._watchdog is not None:
+            self._watchdog.join(timeout=1.0)
+            self._watchdog = None
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "samples": self.histogram.count,
+            "mean_ms": self.histogram.sum / self.histogram.count * 1000 if self.histogram.count else 0.0,
+            "p50_ms": self.histogram.quantile(0.5) * 1000,
+            "p99_ms": self.histogram.quantile(0.99) * 1000,
+            "max_ms": self.max_lag * 1000,
+            "blocked_events": self.blocked_events,
+        }
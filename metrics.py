@@ -0,0 +1,188 @@
+"""
+서버 지표(metrics) 수집
+게이지/카운터를 한 곳에 모아 Prometheus 텍스트 형식(GET /metrics)으로 내보냅니다.
+
+    metrics = MetricsRegistry()
+    metrics.set_gauge('rsunity_overload_level', 2, help='...')
+    metrics.inc_counter('rsunity_overload_transitions_total', labels={'to': 'decimate'})
+    metrics.add_histogram('rsunity_event_loop_lag_seconds', Histogram((0.001, 0.01, 0.1, 1.0)))
+"""
+
+import bisect
+import threading
+from typing import Dict, Any, Optional, Callable, List, Tuple, Sequence
+from aiohttp import web
+
+LabelKey = Tuple[Tuple[str, str], ...]
+
+
+def _label_key(labels: Optional[Dict[str, Any]]) -> LabelKey:
+    return tuple(sorted((str(k), str(v)) for k, v in (labels or {}).items()))
+
+
+def _escape(value: str) -> str:
+    return value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _format_labels(key: LabelKey) -> str:
+    if not key:
+        return ''
+    return '{' + ','.join(f'{name}="{_escape(value)}"' for name, value in key) + '}'
+
+
+class Histogram:
+    """누적 버킷 히스토그램 (Prometheus histogram과 같은 의미)"""
+
+    def __init__(self, buckets: Sequence[float]):
+        self.buckets = tuple(sorted(buckets))
+        self._counts = [0] * (len(self.buckets) + 1)  # 마지막 칸은 +Inf
+        self.sum = 0.0
+        self.count = 0
+        self._lock = threading.Lock()
+
+    def observe(self, value: float):
+        with self._lock:
+            self._counts[bisect.bisect_left(self.buckets, value)] += 1
+            self.sum += value
+            self.count += 1
+
+    def reset(self):
+        with self._lock:
+            self._counts = [0] * (len(self.buckets) + 1)
+            self.sum = 0.0
+            self.count = 0
+
+    def cumulative(self) -> List[Tuple[float, int]]:
+        """[(상한, 누적 개수), ...] 마지막 상한은 inf"""
+        with self._lock:
+            counts = list(self._counts)
+        total = 0
+        result = []
+        for bound, count in zip(self.buckets + (float('inf'),), counts):
+            total += count
+            result.append((bound, total))
+        return result
+
+    def quantile(self, q: float) -> float:
+        """q 분위수가 속한 버킷의 상한 (관측값이 없으면 0)"""
+        cumulative = self.cumulative()
+        total = cumulative[-1][1]
+        if total == 0:
+            return 0.0
+        target = q * total
+        for bound, count in cumulative:
+            if count >= target:
+                return bound
+        return float('inf')
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "count": self.count,
+            "sum": self.sum,
+            "buckets": {('+Inf' if bound == float('inf') else f"{bound:g}"): count
+                        for bound, count in self.cumulative()},
+        }
+
+
+class MetricsRegistry:
+    """게이지/카운터 값을 보관하는 싱글톤 클래스"""
+
+    _instance = None
+    _initialized = False
+
+    def __new__(cls):
+        if cls._instance is None:
+            cls._instance = super(MetricsRegistry, cls).__new__(cls)
+        return cls._instance
+
+    def __init__(self):
+        if self._initialized:
+            return
+
+        # 이름 -> (종류, 설명, {레이블: 값})
+        self._metrics: Dict[str, Tuple[str, str, Dict[LabelKey, float]]] = {}
+        # 이름 -> (설명, 히스토그램)
+        self._histograms: Dict[str, Tuple[str, Histogram]] = {}
+        # 내보내기 직전에 호출되어 게이지를 갱신하는 함수들
+        self._collectors: List[Callable[['MetricsRegistry'], None]] = []
+        self._lock = threading.Lock()
+
+        self._initialized = True
+
+    def _series(self, name: str, kind: str, help: str) -> Dict[LabelKey, float]:
+        metric = self._metrics.get(name)
+        if metric is None:
+            metric = self._metrics[name] = (kind, help, {})
+        return metric[2]
+
+    def set_gauge(self, name: str, value: float, help: str = '', labels: Optional[Dict[str, Any]] = None):
+        """게이지 값을 설정합니다."""
+        with self._lock:
+            self._series(name, 'gauge', help)[_label_key(labels)] = float(value)
+
+    def inc_counter(self, name: str, amount: float = 1.0, help: str = '',
+                    labels: Optional[Dict[str, Any]] = None):
+        """카운터를 증가시킵니다."""
+        with self._lock:
+            series = self._series(name, 'counter', help)
+            key = _label_key(labels)
+            series[key] = series.get(key, 0.0) + amount
+
+    def add_histogram(self, name: str, histogram: Histogram, help: str = ''):
+        """히스토그램을 등록합니다. 관측은 histogram.observe()로 직접 합니다."""
+        with self._lock:
+            self._histograms[name] = (help, histogram)
+
+    def add_collector(self, collector: Callable[['MetricsRegistry'], None]):
+        """내보내기 직전에 호출할 수집 함수를 등록합니다."""
+        self._collectors.append(collector)
+
+    def _collect(self):
+        for collector in self._collectors:
+            collector(self)
+
+    def render(self) -> str:
+        """Prometheus 텍스트 형식(0.0.4)으로 변환합니다."""
+        self._collect()
+        lines = []
+        with self._lock:
+            for name in sorted(self._metrics):
+                kind, help, series = self._metrics[name]
+                if help:
+                    lines.append(f"# HELP {name} {help}")
+                lines.append(f"# TYPE {name} {kind}")
+                for key, value in series.items():
+                    lines.append(f"{name}{_format_labels(key)} {value:g}")
+            for name in sorted(self._histograms):
+                help, histogram = self._histograms[name]
+                if help:
+                    lines.append(f"# HELP {name} {help}")
+                lines.append(f"# TYPE {name} histogram")
+                for bound, count in histogram.cumulative():
+                    le = '+Inf' if bound == float('inf') else f"{bound:g}"
+                    lines.append(f'{name}_bucket{{le="{le}"}} {count}')
+                lines.append(f"{name}_sum {histogram.sum:g}")
+                lines.append(f"{name}_count {histogram.count}")
+        return '\n'.join(lines) + '\n'
+
+    def snapshot(self) -> Dict[str, Any]:
+        """{이름: {레이블 문자열: 값}} 형태의 현재 값"""
+        self._collect()
+        with self._lock:
+            snapshot: Dict[str, Any] = {
+                name: {_format_labels(key): value for key, value in series.items()}
+                for name, (_, _, series) in self._metrics.items()
+            }
+            for name, (_, histogram) in self._histograms.items():
+                snapshot[name] = histogram.to_dict()
+            return snapshot
+
+
+async def metrics_handler(request: web.Request) -> web.Response:
+    """GET /metrics"""
+    return web.Response(text=MetricsRegistry().render(), content_type='text/plain', charset='utf-8')
+
+
+def setup_routes(app: web.Application):
+    """aiohttp 앱에 지표 경로를 등록합니다."""
+    app.router.add_get('/metrics', metrics_handler)
@@ -0,0 +1,146 @@
+"""
+움직임 기반 전송 제어 (motion gate)
+연속 프레임의 축소 썸네일(컬러는 그레이, 뎁스는 원본 단위)을 벡터화된 절대 차이로 비교하여
+장면이 정지해 있으면 인코딩/전송을 건너뛰고, 움직임이 시작되면 바로 다음 프레임부터 다시 전송합니다.
+정지 중에도 heartbeat_s마다 한 프레임은 항상 전송합니다.
+
+    - 비교 기준은 마지막으로 변화가 감지된 프레임의 썸네일이므로, 아주 느린 변화도 누적되면 감지됩니다.
+    - 판정은 프레임(순번)당 한 번만 계산되어 모든 클라이언트가 공유하고, heartbeat는 클라이언트별로 계산됩니다.
+
+config.json의 motion_gate 섹션:
+    enabled         : 사용 여부 (기본 False)
+    thumbnail_width : 썸네일 가로 크기 (세로는 비율 유지)
+    color_delta     : 컬러(그레이 0~255) 픽셀이 변한 것으로 보는 차이
+    depth_delta_m   : 뎁스 픽셀이 변한 것으로 보는 차이 (미터)
+    changed_ratio   : 변한 픽셀 비율이 이 값을 넘으면 움직임으로 판정
+    hold_s          : 움직임이 멈춘 뒤에도 전송을 유지하는 시간
+    heartbeat_s     : 정지 중 전송 간격
+"""
+
+import logging
+import threading
+import time
+import numpy as np
+from typing import Optional, Dict, Any
+from config import Config
+from metrics import MetricsRegistry
+from realsense_manager import FrameData, RealSenseManager
+from startup import lazy_import
+
+# OpenCV는 첫 썸네일 계산 시점에 불러옵니다. (서버 시작 시간 단축)
+cv2 = lazy_import('cv2')
+
+logger = logging.getLogger(__name__)
+
+
+class MotionGate:
+    """장면 변화 여부에 따라 프레임 전송을 조절하는 싱글톤 클래스"""
+
+    _instance = None
+    _initialized = False
+
+    def __new__(cls):
+        if cls._instance is None:
+            cls._instance = super(MotionGate, cls).__new__(cls)
+        return cls._instance
+
+    def __init__(self):
+        if self._initialized:
+            return
+
+        self.options = Config().get_motion_gate_config()
+        self.enabled = bool(self.options.get('enabled', False))
+        self.active = True
+        self._lock = threading.Lock()
+        self._references: Dict[str, np.ndarray] = {}
+        self._last_sequence: Optional[int] = None
+        self._last_motion_at = float('-inf')
+
+        # 통계
+        self.evaluated = 0
+        self.motion_frames = 0
+
+        self._initialized = True
+
+    # --- 썸네일 ---
+    def _thumbnail_size(self, shape) -> tuple:
+        width = max(1, int(self.options.get('thumbnail_width', 32)))
+        height = max(1, round(shape[0] * width / shape[1]))
+        return width, height
+
+    def _color_thumbnail(self, frame_data: FrameData) -> np.ndarray:
+        if frame_data.color_yuyv is not None:
+            # YUYV의 Y 채널이 곧 그레이 이미지이므로 BGR로 변환하지 않고 축소합니다.
+            luma = frame_data.color_yuyv[:, :, 0]
+            return cv2.resize(luma, self._thumbnail_size(luma.shape), interpolation=cv2.INTER_AREA)
+        image = frame_data.color_frame
+        small = cv2.resize(image, self._thumbnail_size(image.shape), interpolation=cv2.INTER_AREA)
+        return cv2.cvtColor(small, cv2.COLOR_BGR2GRAY)
+
+    def _depth_thumbnail(self, depth: np.ndarray) -> np.ndarray:
+        # 뎁스 0(무효)이 주변과 섞이지 않도록 최근접 보간을 사용합니다.
+        small = cv2.resize(depth, self._thumbnail_size(depth.shape), interpolation=cv2.INTER_NEAREST)
+        return small.astype(np.int32)
+
+    def _changed(self, stream: str, thumbnail: np.ndarray, delta: float) -> bool:
+        reference = self._references.get(stream)
+        if reference is None or reference.shape != thumbnail.shape:
+            return True
+        changed = np.count_nonzero(np.abs(thumbnail - reference) > delta)
+        return changed > float(self.options.get('changed_ratio', 0.02)) * thumbnail.size
+
+    # --- 판정 ---
+    def update(self, frame_data: FrameData) -> bool:
+        """프레임의 움직임 여부를 갱신하고, 전송을 유지해야 하는 상태(active)인지 반환합니다. (순번당 한 번 계산)"""
+        with self._lock:
+            if frame_data.sequence == self._last_sequence:
+                return self.active
+            self._last_sequence = frame_data.sequence
+            self.evaluated += 1
+
+            thumbnails = {}
+            if frame_data.has_color:
+                thumbnails['color'] = (self._color_thumbnail(frame_data).astype(np.int16),
+                                       float(self.options.get('color_delta', 12)))
+            if frame_data.depth_frame is not None:
+                depth_scale = RealSenseManager().depth_scale or 0.001
+                thumbnails['depth'] = (self._depth_thumbnail(frame_data.depth_frame),
+                                       float(self.options.get('depth_delta_m', 0.05)) / depth_scale)
+
+            now = time.monotonic()
+            if any(self._changed(stream, thumbnail, delta) for stream, (thumbnail, delta) in thumbnails.items()):
+                self._references = {stream: thumbnail for stream, (thumbnail, _) in thumbnails.items()}
+                self._last_motion_at = now
+                self.motion_frames += 1
+
+            active = now - self._last_motion_at <= float(self.options.get('hold_s', 0.5))
+            if active != self.active:
+                logger.info("움직임 감지: 전송을 재개합니다." if active
+                            else "장면이 정지하여 heartbeat 간격으로만 전송합니다.")
+                MetricsRegistry().set_gauge('rsunity_motion_active', int(active),
+                                            help='1 while motion gate considers the scene in motion')
+            self.active = active
+            return active
+
+    def should_send(self, frame_data: FrameData, last_sent_at: float) -> bool:
+        """이 프레임을 클라이언트에 보내야 하는지 여부. last_sent_at은 클라이언트의 마지막 전송 시각(time.monotonic)"""
+        if not self.enabled:
+            return True
+        if not frame_data.has_color and frame_data.depth_frame is None:
+            # 픽셀 없이 인코딩 결과만 있는 프레임(릴레이 모드)은 상위 서버에서 이미 판정되었습니다.
+            return True
+        if self.update(frame_data):
+            return True
+        if time.monotonic() - last_sent_at >= float(self.options.get('heartbeat_s', 1.0)):
+            return True
+        MetricsRegistry().inc_counter('rsunity_motion_suppressed_total',
+                                      help='Client frames skipped because the scene was static')
+        return False
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "enabled": self.enabled,
+            "active": self.active,
+            "evaluated": self.evaluated,
+            "motion_frames": self.motion_frames,
+        }
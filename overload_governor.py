@@ -0,0 +1,211 @@
+"""
+과부하 제어 (overload governor)
+이벤트 루프 지연, 인코딩 큐 깊이, CPU 사용률, 클라이언트 적체를 주기적으로 측정하고,
+부하가 높으면 정해진 순서대로 한 단계씩 품질을 낮추어 지연이 쌓이지 않게 합니다.
+
+    단계 0 normal                 : 설정값 그대로
+    단계 1 reduce_quality         : 손실 인코더 품질을 degraded_quality로 제한
+    단계 2 drop_depth_colorization: 뎁스 시각화 이미지를 컬러맵 없이 그레이로 인코딩
+    단계 3 decimate               : 시각화용 이미지를 decimation배 축소
+    단계 4 reduce_fps             : frame_stride개 중 1개 프레임만 게시
+    단계 5 pause_low_priority     : priority가 'low'인 클라이언트 전송 일시 중지
+
+각 단계는 이전 단계의 저하를 모두 포함합니다. 복구는 더 긴 연속 구간(recover_samples)과
+더 낮은 압력(recover_ratio)을 요구하는 히스테리시스로 한 단계씩 진행됩니다.
+모든 단계 전환은 로그로 남고 /metrics로 내보내집니다.
+"""
+
+import asyncio
+import logging
+import time
+from typing import Dict, Any, Optional
+from config import Config
+from frame_cache import EncodedFrameCache
+from frame_encoder import set_degradation
+from loop_monitor import LoopLagMonitor
+from metrics import MetricsRegistry
+from realsense_manager import RealSenseManager
+from subscriptions import Subscription
+
+logger = logging.getLogger(__name__)
+
+LEVELS = (
+    'normal',
+    'reduce_quality',
+    'drop_depth_colorization',
+    'decimate',
+    'reduce_fps',
+    'pause_low_priority',
+)
+LEVEL_PAUSE_LOW_PRIORITY = LEVELS.index('pause_low_priority')
+
+
+class OverloadGovernor:
+    """부하 신호를 측정하여 품질 저하 단계를 조정하는 싱글톤 클래스"""
+
+    _instance = None
+    _initialized = False
+
+    def __new__(cls):
+        if cls._instance is None:
+            cls._instance = super(OverloadGovernor, cls).__new__(cls)
+        return cls._instance
+
+    def __init__(self):
+        if self._initialized:
+            return
+
+        self.options = Config().get_governor_config()
+        self.level = 0
+        self.signals: Dict[str, float] = {}
+        self.pressure = 0.0
+        self._over_samples = 0
+        self._under_samples = 0
+        self._client_backlog: Dict[Any, int] = {}
+        self._task: Optional[asyncio.Task] = None
+
+        self._initialized = True
+
+    # --- 클라이언트 보고 ---
+    def report_client_backlog(self, client_id, skipped_frames: int):
+        """클라이언트가 전송하지 못하고 건너뛴 프레임 수를 보고합니다. (측정 구간 내 최댓값 사용)"""
+        if skipped_frames > self._client_backlog.get(client_id, 0):
+            self._client_backlog[client_id] = skipped_frames
+
+    def should_pause(self, subscription: Optional[Subscription]) -> bool:
+        """현재 단계에서 이 구독의 전송을 일시 중지해야 하는지 여부"""
+        return (
+            self.level >= LEVEL_PAUSE_LOW_PRIORITY
+            and subscription is not None
+            and subscription.priority == 'low'
+        )
+
+    # --- 단계 적용 ---
+    def _apply_level(self, level: int):
+        options = self.options
+        set_degradation(
+            quality=int(options.get('degraded_quality', 60)) if level >= 1 else None,
+            colorize_depth=level < 2,
+            decimation=int(options.get('decimation', 2)) if level >= 3 else 1,
+        )
+        RealSenseManager().set_frame_stride(int(options.get('frame_stride', 2)) if level >= 4 else 1)
+
+    def set_level(self, level: int, reason: str = 'manual'):
+        """단계를 변경하고 전환을 기록합니다."""
+        level = max(0, min(len(LEVELS) - 1, level))
+        if level == self.level:
+            return
+        previous, self.level = self.level, level
+        self._apply_level(level)
+        self._over_samples = self._under_samples = 0
+
+        log = logger.warning if level > previous else logger.info
+        log(f"과부하 단계 변경: {LEVELS[previous]} -> {LEVELS[level]} "
+            f"({reason}, pressure={self.pressure:.2f}, signals={self._format_signals()})")
+        metrics = MetricsRegistry()
+        metrics.inc_counter(
+            'rsunity_overload_transitions_total',
+            help='Overload governor level transitions',
+            labels={'from': LEVELS[previous], 'to': LEVELS[level]},
+        )
+        self._export_metrics()
+
+    # --- 측정 ---
+    def _format_signals(self) -> str:
+        return ', '.join(f"{name}={value:.2f}" for name, value in self.signals.items())
+
+    def _evaluate(self, signals: Dict[str, float]):
+        """한 측정 구간의 신호로 단계를 조정합니다."""
+        options = self.options
+        limits = {
+            'loop_lag_ms': float(options.get('max_loop_lag_ms', 50)),
+            'cpu': float(options.get('max_cpu', 0.85)),
+            'encode_queue': float(options.get('max_encode_queue', 4)),
+            'client_backlog': float(options.get('max_client_backlog', 2)),
+        }
+        self.signals = signals
+        self.pressure = max(signals[name] / limit for name, limit in limits.items() if limit > 0)
+
+        if self.pressure >= 1.0:
+            self._over_samples += 1
+            self._under_samples = 0
+        elif self.pressure < float(options.get('recover_ratio', 0.6)):
+            self._under_samples += 1
+            self._over_samples = 0
+        else:
+            self._over_samples = self._under_samples = 0
+
+        if self._over_samples >= int(options.get('escalate_samples', 3)) and self.level < len(LEVELS) - 1:
+            self.set_level(self.level + 1, 'overload')
+        elif self._under_samples >= int(options.get('recover_samples', 10)) and self.level > 0:
+            self.set_level(self.level - 1, 'recovered')
+        self._export_metrics()
+
+    def _export_metrics(self):
+        metrics = MetricsRegistry()
+        metrics.set_gauge('rsunity_overload_level', self.level, help='Overload governor level (0 = normal)')
+        metrics.set_gauge('rsunity_overload_pressure', self.pressure,
+                          help='Highest signal / limit ratio in the last interval')
+        for name, value in self.signals.items():
+            metrics.set_gauge('rsunity_overload_signal', value, help='Overload governor input signals',
+                              labels={'signal': name})
+
+    async def _run(self):
+        interval = float(self.options.get('interval_s', 1.0))
+        cache = EncodedFrameCache()
+        lag_monitor = LoopLagMonitor()
+        cache.take_peak_pending()
+        lag_monitor.take_peak_lag()
+        try:
+            while True:
+                wall_start = time.perf_counter()
+                cpu_start = time.process_time()
+                await asyncio.sleep(interval)
+                wall = time.perf_counter() - wall_start
+                # 코어 1개 기준 (1.0 = 코어 1개). 전체 코어로 나누면 단일 스레드 포화가 드러나지 않습니다.
+                cpu = (time.process_time() - cpu_start) / wall
+                # 인코딩 스레드에 대기/진행 중인 작업 수의 구간 내 최댓값
+                max_queue = cache.take_peak_pending()
+                # 이벤트 루프 지연은 LoopLagMonitor가 측정한 구간 내 최댓값을 사용합니다.
+                max_lag = lag_monitor.take_peak_lag()
+
+                backlog, self._client_backlog = self._client_backlog, {}
+                self._evaluate({
+                    'loop_lag_ms': max_lag * 1000.0,
+                    'cpu': cpu,
+                    'encode_queue': float(max_queue),
+                    'client_backlog': float(max(backlog.values(), default=0)),
+                })
+        except asyncio.CancelledError:
+            pass
+        except Exception as e:
+            logger.error(f"과부하 제어 오류: {e}", exc_info=True)
+
+    def start(self):
+        """측정 태스크를 시작합니다. (설정에서 비활성화된 경우 무시)"""
+        if not self.options.get('enabled', True):
+            logger.info("과부하 제어가 비활성화되어 있습니다.")
+            return
+        if self._task is None or self._task.done():
+            self._export_metrics()
+            # 루프 지연 신호는 지연 모니터가 측정합니다. (이미 시작되어 있으면 무시됩니다.)
+            LoopLagMonitor().start()
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        self.set_level(0, 'stopped')
+
+    def get_status(self) -> Dict[str, Any]:
+        return {
+            "level": self.level,
+            "state": LEVELS[self.level],
+            "pressure": self.pressure,
+            "signals": dict(self.signals),
+        }
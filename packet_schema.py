@@ -0,0 +1,109 @@
+"""
+Socket.IO 패킷 스키마
+frame_data / status 이벤트 페이로드를 만드는 곳입니다.
+
+직렬화 방식은 클라이언트가 접속한 Socket.IO 경로로 정해지며, 페이로드 함수는 compact 인자로 받습니다.
+    JSON    (/socket.io, 항상 사용 가능)   : 이미지 바이트는 base64 문자열, 메타데이터는 중첩 dict
+    msgpack (server.msgpack_path, compact) : 이미지 바이트는 그대로(bin) 보내고, 메타데이터는 아래 필드 순서의
+                                             배열로 평탄화하여 직렬화 CPU와 메시지 크기를 줄입니다.
+config.json의 server.serializer가 'msgpack'이면 JSON 경로 옆에 msgpack 경로를 함께 엽니다. (msgpack 패키지 필요)
+
+msgpack 클라이언트에게는 연결 직후 'schema' 이벤트로 각 배열의 필드 순서(schema())를 보냅니다.
+"""
+
+import logging
+from typing import Optional, Dict, Any, List, Union
+from frame_cache import EncodedFrame
+from realsense_manager import FrameData, IMUData, StreamMetadata
+
+logger = logging.getLogger(__name__)
+
+SERIALIZERS = ('json', 'msgpack')
+DEFAULT_MSGPACK_PATH = 'socket.io-msgpack'
+
+# 평탄화 배열의 필드 순서
+FRAME_FIELDS = ('data', 'width', 'height', 'format')
+IMU_FIELDS = ('gyro_x', 'gyro_y', 'gyro_z', 'accel_x', 'accel_y', 'accel_z', 'temperature', 'timestamp')
+METADATA_FIELDS = ('sequence', 'timestamp', 'host_timestamp', 'host_monotonic', 'color', 'depth')
+STREAM_METADATA_FIELDS = StreamMetadata.__slots__
+STATUS_FIELDS = ('message', 'streams', 'profile', 'state')
+
+
+def is_msgpack_available() -> bool:
+    """msgpack 패키지가 설치되어 있는지 여부"""
+    try:
+        import msgpack  # noqa: F401
+        return True
+    except ImportError:
+        return False
+
+
+def resolve_serializer(serializer: str) -> str:
+    """server.serializer 설정을 검증하고 실제로 사용할 이름('json' 또는 'msgpack')을 반환합니다."""
+    if serializer not in SERIALIZERS:
+        raise ValueError(f"Unknown serializer '{serializer}' (supported: {', '.join(SERIALIZERS)})")
+    if serializer == 'msgpack' and not is_msgpack_available():
+        logger.warning("msgpack이 설치되어 있지 않아 msgpack 경로 없이 JSON 직렬화만 사용합니다. (pip install msgpack)")
+        serializer = 'json'
+    return serializer
+
+
+def schema() -> Dict[str, List[str]]:
+    """평탄화 배열의 필드 순서 (msgpack 클라이언트에게 'schema' 이벤트로 전송)"""
+    return {
+        'frame': list(FRAME_FIELDS),
+        'imu': list(IMU_FIELDS),
+        'metadata': list(METADATA_FIELDS),
+        'stream_metadata': list(STREAM_METADATA_FIELDS),
+        'status': list(STATUS_FIELDS),
+    }
+
+
+def frame_entry(encoded: Optional[EncodedFrame], fmt: str, compact: bool = False) -> Union[Dict[str, Any], List[Any]]:
+    """인코딩된 스트림 하나의 페이로드. 인코딩 결과가 없으면 data는 None"""
+    if encoded is None:
+        values = (None, 0, 0, fmt)
+    else:
+        # msgpack은 바이트를 bin 타입으로 그대로 보내므로 base64 변환이 필요 없습니다.
+        data = encoded.data if compact else encoded.as_base64()
+        values = (data, encoded.width, encoded.height, encoded.codec)
+    return list(values) if compact else dict(zip(FRAME_FIELDS, values))
+
+
+def imu_entry(imu: Optional[IMUData], compact: bool = False) -> Union[Dict[str, Any], List[Any], None]:
+    if imu is None:
+        return None
+    if compact:
+        return [*imu.gyroscope, *imu.accelerometer, imu.temperature, imu.timestamp]
+    return {
+        'gyroscope': {'x': imu.gyroscope[0], 'y': imu.gyroscope[1], 'z': imu.gyroscope[2]},
+        'accelerometer': {'x': imu.accelerometer[0], 'y': imu.accelerometer[1], 'z': imu.accelerometer[2]},
+        'temperature': imu.temperature,
+    }
+
+
+def _stream_metadata_entry(meta: Optional[StreamMetadata]) -> Optional[List[Any]]:
+    return list(meta.to_dict().values()) if meta is not None else None
+
+
+def metadata_entry(frame_data: FrameData, compact: bool = False) -> Union[Dict[str, Any], List[Any]]:
+    if not compact:
+        return frame_data.metadata_dict()
+    return [
+        frame_data.sequence,
+        frame_data.timestamp,
+        frame_data.host_timestamp,
+        frame_data.host_monotonic,
+        _stream_metadata_entry(frame_data.color_meta),
+        _stream_metadata_entry(frame_data.depth_meta),
+    ]
+
+
+def status(message: str, compact: bool = False, **fields) -> Union[Dict[str, Any], List[Any]]:
+    """status 이벤트 페이로드 (fields: STATUS_FIELDS 중 streams, profile, state)"""
+    unknown = set(fields) - set(STATUS_FIELDS)
+    if unknown:
+        raise ValueError(f"Unknown status fields: {', '.join(sorted(unknown))}")
+    if compact:
+        return [message, *(fields.get(name) for name in STATUS_FIELDS[1:])]
+    return {'message': message, **fields}
@@ -0,0 +1,156 @@
+"""
+스트림 프로파일 자동 선택 (calibration)
+장치가 지원하는 프로파일 중 후보를 골라 이 호스트에서 캡처/인코딩 비용을 측정하고,
+config.json의 auto_profile 예산(CPU 사용률, 지연) 안에서 가장 높은 해상도/FPS를 선택합니다.
+
+    - 후보는 설정된 모든 스트림(color/depth)이 지원하는 (width, height, fps) 조합입니다.
+    - 픽셀 처리량(width * height * fps)이 큰 것부터 측정하고 예산을 만족하는 첫 후보에서 멈춥니다.
+    - 예산을 만족하는 후보가 없으면 측정한 후보 중 가장 가벼운 것을 사용합니다.
+    - 선택 결과와 측정값은 로그와 profile_calibration.json에 기록됩니다.
+"""
+
+import json
+import logging
+import os
+from datetime import datetime
+from typing import Dict, Any, List, Optional
+from config import Config
+from realsense_manager import RealSenseManager, FrameData
+from frame_encoder import encode_variant, COLOR_JPEG, DEPTH_JPEG
+
+logger = logging.getLogger(__name__)
+
+RESULT_PATH = os.path.join(os.path.dirname(__file__), 'profile_calibration.json')
+
+# 측정 시 프레임마다 인코딩하는 기본 변형 (구독 정보가 없는 기존 클라이언트 기준)
+CALIBRATION_VARIANTS = (COLOR_JPEG, DEPTH_JPEG)
+
+_last_result: Optional[Dict[str, Any]] = None
+
+
+def build_candidates(supported_profiles: List[Dict[str, Any]], streams, min_fps: int = 0,
+                     max_candidates: int = 0) -> List[Dict[str, int]]:
+    """모든 스트림이 지원하는 (width, height, fps) 조합을 처리량 내림차순으로 반환합니다."""
+    streams = set(streams) & {'color', 'depth'}
+    if not streams:
+        return []
+
+    per_stream = {
+        stream: {(p['width'], p['height'], p['fps']) for p in supported_profiles if p['stream'] == stream}
+        for stream in streams
+    }
+    common = set.intersection(*per_stream.values())
+    candidates = sorted(
+        (combo for combo in common if combo[2] >= min_fps),
+        key=lambda combo: (combo[0] * combo[1] * combo[2], combo[2]),
+        reverse=True,
+    )
+    if max_candidates > 0:
+        candidates = candidates[:max_candidates]
+    return [{"width": w, "height": h, "fps": fps} for w, h, fps in candidates]
+
+
+def estimate_latency_ms(measurement: Dict[str, Any]) -> float:
+    """프레임 간격과 프레임당 인코딩 시간을 더한 지연 추정값 (ms)"""
+    fps = measurement.get('measured_fps') or measurement['fps']
+    return 1000.0 / fps + measurement.get('process_ms_per_frame', 0.0)
+
+
+def fits_budget(measurement: Dict[str, Any], cpu_budget: float, latency_budget_ms: float) -> bool:
+    """측정값이 CPU/지연 예산과 요청 FPS(90% 이상)를 만족하는지 확인합니다."""
+    if not measurement.get('ok'):
+        return False
+    return (
+        measurement['cpu_load'] <= cpu_budget
+        and estimate_latency_ms(measurement) <= latency_budget_ms
+        and measurement['measured_fps'] >= measurement['fps'] * 0.9
+    )
+
+
+def _encode_for_calibration(frame_data: FrameData):
+    for variant in CALIBRATION_VARIANTS:
+        encode_variant(variant, frame_data)
+
+
+def _save_result(result: Dict[str, Any]):
+    try:
+        with open(RESULT_PATH, 'w') as f:
+            json.dump(result, f, indent=4)
+    except Exception as e:
+        logger.warning(f"프로파일 보정 결과 저장 실패: {e}")
+
+
+async def calibrate_stream_profile(options: Optional[Dict[str, Any]] = None) -> Optional[Dict[str, Any]]:
+    """후보 프로파일을 측정하여 예산에 맞는 프로파일을 적용합니다. 적용할 후보가 없으면 None을 반환합니다."""
+    global _last_result
+
+    options = {**Config().get_auto_profile_config(), **(options or {})}
+    cpu_budget = float(options.get('cpu_budget', 0.5))
+    latency_budget_ms = float(options.get('latency_budget_ms', 100))
+
+    rs_manager = RealSenseManager()
+    candidates = build_candidates(
+        rs_manager.supported_profiles,
+        rs_manager.configured_streams,
+        min_fps=int(options.get('min_fps', 0)),
+        max_candidates=int(options.get('max_candidates', 0)),
+    )
+    if not candidates:
+        logger.warning("프로파일 보정: 측정할 후보가 없어 설정값을 유지합니다.")
+        return None
+
+    logger.info(f"프로파일 보정 시작: 후보 {len(candidates)}개, "
+                f"CPU 예산 {cpu_budget:.2f}, 지연 예산 {latency_budget_ms:.0f}ms")
+    started = datetime.now()
+    measurements = await rs_manager.measure_profiles(
+        candidates,
+        frames=int(options.get('frames', 30)),
+        warmup_frames=int(options.get('warmup_frames', 10)),
+        process_fn=_encode_for_calibration,
+        accept_fn=lambda m: fits_budget(m, cpu_budget, latency_budget_ms),
+    )
+    for measurement in measurements:
+        if measurement.get('ok'):
+            measurement['latency_ms'] = estimate_latency_ms(measurement)
+            measurement['fits_budget'] = fits_budget(measurement, cpu_budget, latency_budget_ms)
+
+    measured = [m for m in measurements if m.get('ok')]
+    chosen = next((m for m in measured if m['fits_budget']), None)
+    if chosen is None and measured:
+        # 예산을 만족하는 후보가 없으면 가장 가벼운 후보를 사용합니다.
+        chosen = min(measured, key=lambda m: m['cpu_load'])
+        logger.warning("프로파일 보정: 예산을 만족하는 후보가 없어 가장 가벼운 프로파일을 사용합니다.")
+
+    if chosen is None:
+        logger.error("프로파일 보정: 모든 후보 측정에 실패하여 설정값으로 복원합니다.")
+        await rs_manager.restart_pipeline()
+        return None
+
+    result = await rs_manager.reconfigure(
+        width=chosen['width'],
+        height=chosen['height'],
+        fps=chosen['fps'],
+        persist=bool(options.get('persist', False)),
+    )
+    if not result['changed']:
+        # 측정 후 파이프라인은 마지막 측정 프로파일 상태이므로 설정값으로 다시 시작합니다.
+        await rs_manager.restart_pipeline()
+
+    _last_result = {
+        "timestamp": started.isoformat(),
+        "elapsed_s": (datetime.now() - started).total_seconds(),
+        "cpu_budget": cpu_budget,
+        "latency_budget_ms": latency_budget_ms,
+        "chosen": {key: chosen[key] for key in ('width', 'height', 'fps')},
+        "fits_budget": chosen['fits_budget'],
+        "measurements": measurements,
+    }
+    _save_result(_last_result)
+    logger.info(f"프로파일 보정 완료: {chosen['width']}x{chosen['height']}@{chosen['fps']} "
+                f"(CPU {chosen['cpu_load']:.2f}, 지연 {chosen['latency_ms']:.1f}ms)")
+    return _last_result
+
+
+def get_calibration_result() -> Optional[Dict[str, Any]]:
+    """마지막 보정 결과 (없으면 None)"""
+    return _last_result
@@ -4,15 +4,30 @@ RealSense D435i 카메라와 IMU 데이터 관리 클래스
 """
 
 import asyncio
-import cv2
 import numpy as np
-import pyrealsense2 as rs
-from typing import Optional, Dict, Any, Tuple
+from contextlib import contextmanager
+from typing import Optional, Dict, Any, Tuple, Set, List, Callable
 from dataclasses import dataclass
 from datetime import datetime
 import json
 import logging
+import math
+import threading
+import time
+from binary_protocol import (
+    FRAME_HEADER, STREAM_HEADER, FRAME_HEADER_MAGIC, FRAME_HEADER_VERSION, NO_FRAME_NUMBER,
+    TIMESTAMP_DOMAINS, UNKNOWN_DOMAIN
+)
+from buffer_pool import BufferPool
 from config import Config
+from frame_ring import FrameRing
+from metrics import Histogram, MetricsRegistry
+from startup import StartupTracker, lazy_import
+
+# pyrealsense2는 import에 시간이 걸리므로 장치 초기화 시점(백그라운드)에 불러옵니다.
+rs = lazy_import('pyrealsense2')
+# OpenCV는 YUYV 컬러를 처음 BGR로 변환할 때 불러옵니다.
+cv2 = lazy_import('cv2')
 
 logger = logging.getLogger(__name__)
 
@@ -24,13 +39,145 @@ class IMUData:
     accelerometer: Tuple[float, float, float]  # x, y, z (m/s²)
     temperature: float
 
-@dataclass
+# StreamMetadata 속성 -> librealsense 메타데이터 키 (rs.frame_metadata_value 이름)
+_METADATA_FIELDS = (
+    ('sensor_timestamp', 'sensor_timestamp'),
+    ('exposure', 'actual_exposure'),
+    ('gain', 'gain_level'),
+    ('laser_power', 'frame_laser_power'),
+)
+# 호스트 시계 기준이라 캡처 시각으로 바로 쓸 수 있는 타임스탬프 도메인
+HOST_CLOCK_DOMAINS = ('global_time', 'system_time')
+
+# 컬러 수신 포맷 (realsense.color_format, rs.format 이름)
+COLOR_FORMATS = ('bgr8', 'yuyv')
+# YUYV -> BGR 지연 변환이 같은 프레임에서 두 번 일어나지 않도록 보호합니다.
+_color_convert_lock = threading.Lock()
+
+# 유휴 정책 상태: hot(전체 FPS 캡처), warm(낮은 FPS 캡처), cold(파이프라인 중지)
+IDLE_STATES = ('hot', 'warm', 'cold')
+
+# 소비자 등록(시작 요청)부터 그 뒤 첫 프레임 게시까지의 시간
+TIME_TO_FIRST_FRAME = Histogram((0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.0, 5.0))
+MetricsRegistry().add_histogram('rsunity_time_to_first_frame_seconds', TIME_TO_FIRST_FRAME,
+                                help='Time from a consumer start request to the next published frame')
+
+
+class StreamMetadata:
+    """librealsense 프레임 메타데이터 (없는 값은 -1 또는 NaN)"""
+
+    __slots__ = ('frame_number', 'sensor_timestamp', 'timestamp', 'timestamp_domain',
+                 'exposure', 'gain', 'laser_power')
+
+    def __init__(self, frame_number: int = -1, sensor_timestamp: int = -1, timestamp: float = float('nan'),
+                 timestamp_domain: str = '', exposure: float = float('nan'), gain: float = float('nan'),
+                 laser_power: float = float('nan')):
+        self.frame_number = frame_number          # 하드웨어 프레임 번호
+        self.sensor_timestamp = sensor_timestamp  # 센서(노출 중간 시점) 타임스탬프 (us)
+        self.timestamp = timestamp                # SDK 프레임 타임스탬프 (ms, timestamp_domain 기준)
+        self.timestamp_domain = timestamp_domain
+        self.exposure = exposure
+        self.gain = gain
+        self.laser_power = laser_power
+
+    def pack(self) -> bytes:
+        return STREAM_HEADER.pack(
+            self.frame_number if self.frame_number >= 0 else NO_FRAME_NUMBER,
+            self.sensor_timestamp, self.timestamp, self.exposure, self.gain, self.laser_power,
+            TIMESTAMP_DOMAINS.get(self.timestamp_domain, UNKNOWN_DOMAIN),
+        )
+
+    def to_dict(self) -> Dict[str, Any]:
+        """JSON용 dict (없는 값은 None)"""
+        values = {name: getattr(self, name) for name in self.__slots__}
+        return {
+            name: None if (isinstance(value, float) and math.isnan(value)) or value == -1 else value
+            for name, value in values.items()
+        }
+
+
 class FrameData:
-    """프레임 데이터 구조체"""
-    timestamp: float
-    color_frame: Optional[np.ndarray]
-    depth_frame: Optional[np.ndarray]
-    imu_data: Optional[IMUData]
+    """프레임 데이터 구조체 (프레임마다 생성되므로 __slots__로 가볍게 유지)
+
+    timestamp는 캡처 시각(초, epoch)입니다. SDK 타임스탬프가 호스트 시계 기준(global_time, system_time)이면
+    그 값을, 아니면 프레임을 받은 호스트 시각을 사용합니다.
+
+    color_format이 'yuyv'이면 컬러는 카메라 원본 color_yuyv((H, W, 2), Y/U/Y/V 순)로 들어오고,
+    color_frame(BGR)은 처음 접근할 때 한 번만 변환하여 보관합니다.
+
+    relayed는 릴레이 모드(relay.RelaySource)에서 게시한 픽셀 없는 프레임입니다.
+    인코딩 결과는 상위 서버에서 받아 캐시에 들어 있으며, 이 서버에서 인코딩하지 않습니다.
+    """
+
+    __slots__ = ('timestamp', '_color_bgr', 'color_yuyv', 'depth_frame', 'imu_data', 'sequence',
+                 'host_timestamp', 'host_monotonic', 'color_meta', 'depth_meta', 'relayed', 'recycled')
+
+    # BufferPool 버퍼를 담는 이미지 속성 (FrameRing이 밀려난 프레임의 버퍼를 반환할 때 사용)
+    ARRAY_FIELDS = ('_color_bgr', 'color_yuyv', 'depth_frame')
+
+    def __init__(self, timestamp: float, color_frame: Optional[np.ndarray], depth_frame: Optional[np.ndarray],
+                 imu_data: Optional[IMUData], sequence: int = 0, host_timestamp: Optional[float] = None,
+                 host_monotonic: Optional[float] = None, color_meta: Optional[StreamMetadata] = None,
+                 depth_meta: Optional[StreamMetadata] = None, color_yuyv: Optional[np.ndarray] = None,
+                 relayed: bool = False):
+        self.timestamp = timestamp
+        self._color_bgr = color_frame
+        self.color_yuyv = color_yuyv
+        self.depth_frame = depth_frame
+        self.imu_data = imu_data
+        self.sequence = sequence  # 프레임 순번 (인코딩 캐시/바이너리 헤더에서 사용)
+        self.host_timestamp = host_timestamp if host_timestamp is not None else timestamp  # 수신 시각 (초, epoch)
+        self.host_monotonic = host_monotonic if host_monotonic is not None else time.monotonic()
+        self.color_meta = color_meta
+        self.depth_meta = depth_meta
+        self.relayed = relayed
+        self.recycled = False  # 기록 링이 버퍼를 풀로 돌려준 뒤 True (배열을 더 읽으면 안 됨)
+
+    @property
+    def color_frame(self) -> Optional[np.ndarray]:
+        """BGR 컬러 이미지. YUYV로 받은 프레임은 처음 접근할 때 BufferPool 버퍼로 변환합니다."""
+        if self._color_bgr is None and self.color_yuyv is not None:
+            with _color_convert_lock:
+                if self._color_bgr is None:
+                    bgr = BufferPool().acquire(self.color_yuyv.shape[:2] + (3,), np.uint8)
+                    cv2.cvtColor(self.color_yuyv, cv2.COLOR_YUV2BGR_YUYV, dst=bgr)
+                    self._color_bgr = bgr
+                    MetricsRegistry().inc_counter('rsunity_color_conversions_total',
+                                                  help='YUYV color frames converted to BGR on the host')
+        return self._color_bgr
+
+    @property
+    def has_color(self) -> bool:
+        """컬러 프레임이 있는지 여부 (YUYV 변환을 일으키지 않음)"""
+        return self._color_bgr is not None or self.color_yuyv is not None
+
+    def release_color_conversion(self) -> None:
+        """지연 변환한 BGR 버퍼를 풀에 반환합니다. (기록 링을 거치지 않는 측정용 프레임)"""
+        if self._color_bgr is not None and self.color_yuyv is not None:
+            BufferPool().release(self._color_bgr)
+            self._color_bgr = None
+
+    def to_header_bytes(self) -> bytes:
+        """프레임 메타데이터를 고정 길이(binary_protocol.FRAME_HEADER_SIZE) 바이너리 헤더로 직렬화합니다."""
+        flags = (1 if self.color_meta is not None else 0) | (2 if self.depth_meta is not None else 0)
+        empty = StreamMetadata()
+        return (
+            FRAME_HEADER.pack(FRAME_HEADER_MAGIC, FRAME_HEADER_VERSION, flags, 0,
+                               self.sequence, self.host_timestamp, self.host_monotonic)
+            + (self.color_meta or empty).pack()
+            + (self.depth_meta or empty).pack()
+        )
+
+    def metadata_dict(self) -> Dict[str, Any]:
+        return {
+            "sequence": self.sequence,
+            "timestamp": self.timestamp,
+            "host_timestamp": self.host_timestamp,
+            "host_monotonic": self.host_monotonic,
+            "color": self.color_meta.to_dict() if self.color_meta else None,
+            "depth": self.depth_meta.to_dict() if self.depth_meta else None,
+        }
+
 
 class RealSenseManager:
     """RealSense D435i 관리 싱글톤 클래스"""
@@ -49,6 +196,9 @@ class RealSenseManager:
         
         self.config = Config()
         self.rs_config = self.config.get_realsense_config()
+        self.color_format = self.rs_config.get('color_format', 'bgr8')
+        if self.color_format not in COLOR_FORMATS:
+            raise ValueError(f"Unknown color_format '{self.color_format}' (supported: {', '.join(COLOR_FORMATS)})")
         
         # RealSense 파이프라인
         self.pipeline = None
@@ -57,6 +207,34 @@ class RealSenseManager:
         # 데이터 저장소
         self.latest_frame_data: Optional[FrameData] = None
         self.latest_imu_data: Optional[IMUData] = None
+        self._frame_sequence = 0
+        self._new_frame_event = asyncio.Event()
+        
+        # 데이터를 소비하는 클라이언트 (Socket.IO sid, WebSocket 연결 등) -> 필요한 하드웨어 스트림
+        self._consumers: Dict[Any, Set[str]] = {}
+        self._pipeline_lock = asyncio.Lock()
+        self._reconfigure_listeners: List[Callable[[Dict[str, Any]], None]] = []
+        
+        # 장치/스트림 정보
+        self._serial_number = None
+        self.configured_streams: Set[str] = set()  # 설정 파일에서 허용된 스트림
+        self.active_streams: Set[str] = set()  # 현재 하드웨어에서 켜진 스트림
+        self.depth_scale = 0.001  # D400 시리즈 기본값 (1 unit = 1mm)
+        self.supported_profiles: List[Dict[str, Any]] = []
+        self._calibration_sequence = -1
+        self._captured_frames = 0
+        self._metadata_support: Dict[str, List[Tuple[str, Any]]] = {}  # 스트림별 지원 메타데이터 (파이프라인 시작 시 초기화)
+        self._last_frame_numbers: Dict[str, int] = {}
+        self.dropped_hw_frames: Dict[str, int] = {'color': 0, 'depth': 0}
+        self.frame_stride = 1  # N이면 N개 중 1개 프레임만 게시
+        
+        # 최근 프레임 기록 (SDK 버퍼에서 복사한 소유 버퍼)
+        self.frame_history = FrameRing(
+            max_frames=self.rs_config.get('history_frames', 30),
+            max_bytes=int(self.rs_config.get('history_mb', 0) * 1024 * 1024),
+        )
+        self.color_intrinsics = None
+        self.depth_intrinsics = None
         
         # 상태 플래그
         self.is_running = False
@@ -66,26 +244,52 @@ class RealSenseManager:
         self._frame_task: Optional[asyncio.Task] = None
         self._imu_task: Optional[asyncio.Task] = None
         
+        # 유휴 정책 (소비자가 없을 때 hot -> warm -> cold)
+        self.idle_config = self.config.get_idle_config()
+        self.idle_state = 'hot'
+        self.pipeline_fps: Optional[int] = None  # 파이프라인이 실제로 실행 중인 FPS
+        self._idle_task: Optional[asyncio.Task] = None
+        self._first_frame_waiters: List[Tuple[float, str]] = []  # (요청 시각, 요청 당시 유휴 상태)
+        
         self._initialized = True
     
     async def initialize(self) -> bool:
-        """RealSense 초기화"""
+        """RealSense 초기화
+
+        장치 조회/파이프라인 시작/워밍업은 블로킹 SDK 호출이므로 실행기 스레드에서 수행하여
+        이벤트 루프(이미 열린 HTTP/Socket.IO 서버)를 막지 않습니다.
+        """
+        loop = asyncio.get_event_loop()
         try:
-            logger.info("RealSense D435i 초기화 시작...")
-            
-            # --- 설정 로드 ---
-            cfg = self.rs_config
-            enable_color = cfg.get('enable_color', True)
-            enable_depth = cfg.get('enable_depth', True)
-            # IMU 기능은 불안정하므로, 문제가 해결될 때까지 강제로 비활성화합니다.
-            enable_imu = False
-            
-            width = cfg.get('width', 424)
-            height = cfg.get('height', 240)
-            fps = cfg.get('fps', 15)
-            
-            logger.info(f"설정: Color={enable_color}, Depth={enable_depth}, IMU={enable_imu}, {width}x{height}@{fps}fps")
+            if not await loop.run_in_executor(None, self._initialize_device):
+                return False
+        except Exception as e:
+            logger.error(f"RealSense 초기화 실패: {str(e)}", exc_info=True)
+            return False
+        
+        self.is_connected = True
+        logger.info("RealSense D435i 초기화 완료")
+        return True
+    
+    def _initialize_device(self) -> bool:
+        """장치를 찾아 파이프라인을 시작하고 워밍업 프레임을 버립니다. (실행기 스레드에서 호출)"""
+        tracker = StartupTracker()
+        logger.info("RealSense D435i 초기화 시작...")
+        
+        # --- 설정 로드 ---
+        cfg = self.rs_config
+        enable_color = cfg.get('enable_color', True)
+        enable_depth = cfg.get('enable_depth', True)
+        # IMU 기능은 불안정하므로, 문제가 해결될 때까지 강제로 비활성화합니다.
+        enable_imu = False
+        
+        width = cfg.get('width', 424)
+        height = cfg.get('height', 240)
+        fps = cfg.get('fps', 15)
+        
+        logger.info(f"설정: Color={enable_color}, Depth={enable_depth}, IMU={enable_imu}, {width}x{height}@{fps}fps")
 
+        with tracker.phase('device'):
             # RealSense 컨텍스트 생성
             ctx = rs.context()
             devices = ctx.query_devices()
@@ -102,73 +306,487 @@ class RealSenseManager:
             logger.info(f"시리얼 번호: {device.get_info(rs.camera_info.serial_number)}")
             logger.info(f"펌웨어 버전: {device.get_info(rs.camera_info.firmware_version)}")
             
-            # 파이프라인 생성
-            self.pipeline = rs.pipeline()
-            self.config_rs = rs.config()
-            
             # 장치 선택 (시리얼 번호로)
-            serial_number = device.get_info(rs.camera_info.serial_number)
-            self.config_rs.enable_device(serial_number)
+            self._serial_number = device.get_info(rs.camera_info.serial_number)
             
-            # 스트림 설정 (설정에 따라 조건부로 활성화)
+            # 뎁스 스케일 (raw 값 -> 미터)
             try:
-                if not enable_color and not enable_depth and not enable_imu:
-                    logger.error("모든 스트림이 비활성화되어 있습니다. 하나 이상을 활성화해야 합니다.")
-                    return False
-                
-                if enable_color:
-                    self.config_rs.enable_stream(rs.stream.color, width, height, rs.format.bgr8, fps)
-                    logger.info("컬러 스트림 설정 완료")
-
-                if enable_depth:
-                    self.config_rs.enable_stream(rs.stream.depth, width, height, rs.format.z16, fps)
-                    logger.info("뎁스 스트림 설정 완료")
-                
-                # IMU 스트림은 강제로 비활성화됨
-                if enable_imu:
-                    logger.warning("설정 파일에서 IMU가 활성화되어 있지만, 안정성을 위해 강제로 비활성화되었습니다.")
-                cfg['enable_imu'] = False
-
+                self.depth_scale = device.first_depth_sensor().get_depth_scale()
             except Exception as e:
-                logger.error(f"스트림 설정 중 오류 발생: {str(e)}", exc_info=True)
-                return False
+                logger.warning(f"뎁스 스케일 가져오기 실패, 기본값 사용: {str(e)}")
             
-            # 파이프라인 시작 (안정적인 방식으로 복원)
-            try:
-                profile = self.pipeline.start(self.config_rs)
-                logger.info("파이프라인 시작 성공")
-            except Exception as e:
-                logger.error(f"파이프라인 시작 실패: {str(e)}", exc_info=True)
+            # 장치가 지원하는 스트림 프로파일 조회
+            self.supported_profiles = self._query_supported_profiles(device)
+            logger.info(f"지원 스트림 프로파일: {len(self.supported_profiles)}개")
+        
+        # 스트림 설정 (설정에 따라 조건부로 활성화)
+        if not enable_color and not enable_depth and not enable_imu:
+            logger.error("모든 스트림이 비활성화되어 있습니다. 하나 이상을 활성화해야 합니다.")
+            return False
+        
+        self.configured_streams = set()
+        if enable_color:
+            self.configured_streams.add('color')
+        if enable_depth:
+            self.configured_streams.add('depth')
+        
+        # IMU 스트림은 강제로 비활성화됨
+        if cfg.get('enable_imu', False):
+            logger.warning("설정 파일에서 IMU가 활성화되어 있지만, 안정성을 위해 강제로 비활성화되었습니다.")
+        cfg['enable_imu'] = False
+        
+        with tracker.phase('pipeline'):
+            if not self._start_pipeline(self.configured_streams):
                 return False
-            
-            # 스트림 프로파일 정보 가져오기 (선택사항)
+        
+        with tracker.phase('warmup'):
+            self._warm_up(int(cfg.get('warmup_frames', 15)))
+        return True
+    
+    def _warm_up(self, frames: int) -> int:
+        """파이프라인 시작 직후의 프레임(자동 노출 수렴 전, 첫 프레임 지연)을 버립니다. 버린 프레임 수를 반환합니다."""
+        discarded = 0
+        for _ in range(max(0, frames)):
             try:
+                self.pipeline.wait_for_frames(5000)
+            except RuntimeError as e:
+                logger.warning(f"워밍업 프레임 대기 실패: {str(e)}")
+                break
+            discarded += 1
+        if discarded:
+            logger.info(f"워밍업 프레임 {discarded}개를 버렸습니다.")
+        return discarded
+    
+    def _query_supported_profiles(self, device) -> List[Dict[str, Any]]:
+        """장치의 모든 센서에서 컬러(color_format)/뎁스(z16) 비디오 프로파일을 조회합니다."""
+        wanted = {
+            (rs.stream.color, getattr(rs.format, self.color_format)): 'color',
+            (rs.stream.depth, rs.format.z16): 'depth',
+        }
+        profiles = []
+        try:
+            for sensor in device.query_sensors():
+                for profile in sensor.get_stream_profiles():
+                    stream = wanted.get((profile.stream_type(), profile.format()))
+                    if stream is None or not profile.is_video_stream_profile():
+                        continue
+                    video = profile.as_video_stream_profile()
+                    entry = {"stream": stream, "width": video.width(), "height": video.height(), "fps": profile.fps()}
+                    if entry not in profiles:
+                        profiles.append(entry)
+        except Exception as e:
+            logger.warning(f"스트림 프로파일 조회 실패: {str(e)}")
+        return profiles
+    
+    def _start_pipeline(self, streams: Set[str], width: Optional[int] = None,
+                        height: Optional[int] = None, fps: Optional[int] = None) -> bool:
+        """지정한 스트림만 활성화하여 하드웨어 파이프라인을 시작합니다. (크기/FPS 생략 시 설정값)"""
+        cfg = self.rs_config
+        width = width or cfg.get('width', 424)
+        height = height or cfg.get('height', 240)
+        fps = fps or cfg.get('fps', 15)
+        
+        # 파이프라인 생성
+        self.pipeline = rs.pipeline()
+        self.config_rs = rs.config()
+        self.config_rs.enable_device(self._serial_number)
+        
+        try:
+            if 'color' in streams:
+                self.config_rs.enable_stream(rs.stream.color, width, height,
+                                             getattr(rs.format, self.color_format), fps)
+                logger.info(f"컬러 스트림 설정 완료 ({self.color_format})")
+
+            if 'depth' in streams:
+                self.config_rs.enable_stream(rs.stream.depth, width, height, rs.format.z16, fps)
+                logger.info("뎁스 스트림 설정 완료")
+        except Exception as e:
+            logger.error(f"스트림 설정 중 오류 발생: {str(e)}", exc_info=True)
+            return False
+        
+        # 파이프라인 시작 (안정적인 방식으로 복원)
+        try:
+            profile = self.pipeline.start(self.config_rs)
+            logger.info("파이프라인 시작 성공")
+        except Exception as e:
+            logger.error(f"파이프라인 시작 실패: {str(e)}", exc_info=True)
+            return False
+        
+        self.active_streams = set(streams)
+        self.pipeline_fps = fps
+        self._read_stream_profiles(profile)
+        self._metadata_support.clear()
+        self._last_frame_numbers.clear()
+        return True
+    
+    def _read_stream_profiles(self, profile):
+        """스트림 프로파일에서 내부 파라미터(intrinsics)를 읽어 저장합니다."""
+        self.color_intrinsics = None
+        self.depth_intrinsics = None
+        try:
+            if 'color' in self.active_streams:
                 color_profile = profile.get_stream(rs.stream.color)
+                self.color_intrinsics = color_profile.as_video_stream_profile().get_intrinsics()
+                logger.info(f"컬러 스트림 해상도: {self.color_intrinsics.width}x{self.color_intrinsics.height}")
+            
+            if 'depth' in self.active_streams:
                 depth_profile = profile.get_stream(rs.stream.depth)
-                
-                color_intrinsics = color_profile.as_video_stream_profile().get_intrinsics()
-                depth_intrinsics = depth_profile.as_video_stream_profile().get_intrinsics()
-                
-                logger.info(f"컬러 스트림 해상도: {color_intrinsics.width}x{color_intrinsics.height}")
-                logger.info(f"뎁스 스트림 해상도: {depth_intrinsics.width}x{depth_intrinsics.height}")
-                
-                # 해상도가 다르면 경고
-                if color_intrinsics.width != depth_intrinsics.width or color_intrinsics.height != depth_intrinsics.height:
-                    logger.warning("컬러와 뎁스 해상도가 다릅니다!")
-                    logger.warning(f"컬러: {color_intrinsics.width}x{color_intrinsics.height}")
-                    logger.warning(f"뎁스: {depth_intrinsics.width}x{depth_intrinsics.height}")
-                
-            except Exception as e:
-                logger.warning(f"스트림 프로파일 정보 가져오기 실패: {str(e)}")
-                # 프로파일 정보가 없어도 계속 진행
+                self.depth_intrinsics = depth_profile.as_video_stream_profile().get_intrinsics()
+                logger.info(f"뎁스 스트림 해상도: {self.depth_intrinsics.width}x{self.depth_intrinsics.height}")
             
-            self.is_connected = True
-            logger.info("RealSense D435i 초기화 완료")
-            return True
+            # 해상도가 다르면 경고
+            color, depth = self.color_intrinsics, self.depth_intrinsics
+            if color and depth and (color.width != depth.width or color.height != depth.height):
+                logger.warning("컬러와 뎁스 해상도가 다릅니다!")
+                logger.warning(f"컬러: {color.width}x{color.height}")
+                logger.warning(f"뎁스: {depth.width}x{depth.height}")
             
         except Exception as e:
-            logger.error(f"RealSense 초기화 실패: {str(e)}", exc_info=True)
-            return False
+            logger.warning(f"스트림 프로파일 정보 가져오기 실패: {str(e)}")
+            # 프로파일 정보가 없어도 계속 진행
+    
+    def _desired_streams(self) -> Set[str]:
+        """현재 소비자 수요와 설정을 만족하는 하드웨어 스트림 조합 (수요가 없으면 설정된 전체)"""
+        if not self._consumers:
+            return set(self.configured_streams)
+        demand = set().union(*self._consumers.values())
+        return (demand & self.configured_streams) or set(self.configured_streams)
+    
+    async def _restart_pipeline(self, streams: Set[str], fps: Optional[int] = None) -> bool:
+        """처리 태스크를 멈추고 지정한 스트림으로 파이프라인을 다시 시작합니다. (_pipeline_lock 안에서 호출)
+        
+        fps를 생략하면 설정값(전체 FPS)으로 시작합니다.
+        """
+        was_running = self.is_running
+        if was_running:
+            await self.stop_streaming()
+        
+        loop = asyncio.get_event_loop()
+        if self.pipeline:
+            try:
+                await loop.run_in_executor(None, self.pipeline.stop)
+            except Exception as e:
+                logger.warning(f"파이프라인 중지 중 오류: {str(e)}")
+        
+        started = await loop.run_in_executor(None, self._start_pipeline, streams, None, None, fps)
+        if started and was_running:
+            await self.start_streaming()
+        return started
+    
+    async def _apply_stream_demand(self):
+        """소비자들이 요구하는 스트림만 켜지도록 하드웨어 파이프라인을 재구성합니다."""
+        if not self.is_connected or not self._consumers:
+            return
+        
+        desired = self._desired_streams()
+        if desired == self.active_streams:
+            return
+        
+        async with self._pipeline_lock:
+            logger.info(f"스트림 수요 변경: {sorted(self.active_streams)} -> {sorted(desired)}. 파이프라인을 재구성합니다.")
+            was_running = self.is_running
+            if not await self._restart_pipeline(desired):
+                logger.error("요청한 스트림 조합으로 파이프라인을 시작하지 못했습니다. 전체 스트림으로 복구합니다.")
+                if not await self._restart_pipeline(self.configured_streams):
+                    self.is_connected = False
+                    return
+                if was_running and not self.is_running:
+                    await self.start_streaming()
+    
+    async def restart_pipeline(self) -> bool:
+        """현재 설정과 수요에 맞게 파이프라인을 다시 시작합니다."""
+        async with self._pipeline_lock:
+            started = await self._restart_pipeline(self._desired_streams())
+            if started:
+                self._set_idle_state('hot')
+            if started and self._consumers and not self.is_running:
+                await self.start_streaming()
+        if started and not self._consumers:
+            self._schedule_idle()
+        return started
+    
+    # --- 유휴 정책 ---
+    def _set_idle_state(self, state: str):
+        if state != self.idle_state:
+            logger.info(f"유휴 상태 전환: {self.idle_state} -> {state}")
+            MetricsRegistry().inc_counter('rsunity_idle_transitions_total', help='Idle policy state transitions',
+                                          labels={'state': state})
+        self.idle_state = state
+        for name in IDLE_STATES:
+            MetricsRegistry().set_gauge('rsunity_idle_state', int(name == state),
+                                        help='Current idle policy state (hot/warm/cold)', labels={'state': name})
+    
+    def _schedule_idle(self):
+        """마지막 소비자가 떠났을 때 hot -> warm -> cold 타이머를 시작합니다."""
+        self._cancel_idle()
+        if self.is_connected:
+            self._idle_task = asyncio.create_task(self._idle_timer())
+    
+    def _cancel_idle(self):
+        if self._idle_task is not None:
+            self._idle_task.cancel()
+            self._idle_task = None
+    
+    async def _idle_timer(self):
+        cfg = self.idle_config
+        try:
+            if self.idle_state == 'hot':
+                await asyncio.sleep(float(cfg.get('hot_hold_s', 5.0)))
+                warm_fps = int(cfg.get('warm_fps', 6) or 0)
+                if warm_fps > 0:
+                    await self._enter_warm(warm_fps)
+            warm_hold_s = cfg.get('warm_hold_s', 60.0)
+            if warm_hold_s is None:
+                return
+            if self.idle_state == 'warm':
+                await asyncio.sleep(float(warm_hold_s))
+            await self._enter_cold()
+        except asyncio.CancelledError:
+            pass
+        except Exception as e:
+            logger.error(f"유휴 상태 전환 중 오류: {str(e)}", exc_info=True)
+    
+    def _supports_fps(self, fps: int) -> bool:
+        """현재 해상도에서 켜진 모든 스트림이 해당 FPS를 지원하는지 여부"""
+        cfg = self.rs_config
+        size = (cfg.get('width', 424), cfg.get('height', 240))
+        supported = {(p["stream"], p["width"], p["height"], p["fps"]) for p in self.supported_profiles}
+        return all((stream, *size, fps) in supported for stream in self.active_streams)
+    
+    async def _enter_warm(self, warm_fps: int):
+        """캡처 FPS를 낮춰 자동 노출을 수렴 상태로 유지합니다. (처리 태스크는 낮은 FPS로 계속 실행)"""
+        async with self._pipeline_lock:
+            if self._consumers or self.idle_state != 'hot':
+                return
+            if self.pipeline_fps is not None and warm_fps < self.pipeline_fps:
+                if self._supports_fps(warm_fps):
+                    if not await self._restart_pipeline(self.active_streams, warm_fps):
+                        logger.warning(f"warm FPS({warm_fps})로 시작하지 못해 전체 FPS로 복구합니다.")
+                        await self._restart_pipeline(self.active_streams)
+                        return
+                else:
+                    logger.warning(f"장치가 현재 해상도에서 {warm_fps}fps를 지원하지 않아 warm 상태에서도 "
+                                   f"{self.pipeline_fps}fps로 캡처합니다.")
+            if not self.is_running:
+                await self.start_streaming()
+            self._set_idle_state('warm')
+    
+    async def _enter_cold(self):
+        """처리 태스크와 하드웨어 파이프라인을 멈춥니다."""
+        async with self._pipeline_lock:
+            if self._consumers or self.idle_state == 'cold':
+                return
+            if self.is_running:
+                await self.stop_streaming()
+            if self.pipeline:
+                try:
+                    await asyncio.get_event_loop().run_in_executor(None, self.pipeline.stop)
+                except Exception as e:
+                    logger.warning(f"파이프라인 중지 중 오류: {str(e)}")
+                self.pipeline = None
+            self._set_idle_state('cold')
+    
+    async def _wake(self) -> bool:
+        """warm/cold 상태에서 전체 FPS 파이프라인으로 돌아옵니다. (hot이면 아무것도 하지 않음)"""
+        self._cancel_idle()
+        async with self._pipeline_lock:
+            if self.idle_state == 'hot':
+                return True
+            previous = self.idle_state
+            started_at = time.perf_counter()
+            if not await self._restart_pipeline(self._desired_streams()):
+                logger.error(f"{previous} 상태에서 파이프라인을 다시 시작하지 못했습니다.")
+                return False
+            if previous == 'cold':
+                # 파이프라인이 꺼져 있었으므로 자동 노출이 수렴할 때까지 프레임을 버립니다.
+                await asyncio.get_event_loop().run_in_executor(
+                    None, self._warm_up, int(self.rs_config.get('warmup_frames', 15))
+                )
+            logger.info(f"{previous} -> hot 복귀 ({(time.perf_counter() - started_at) * 1000:.0f} ms)")
+            self._set_idle_state('hot')
+            return True
+    
+    def _resolve_first_frame_waiters(self):
+        """게시된 프레임을 기다리던 시작 요청의 time-to-first-frame을 기록합니다."""
+        now = time.perf_counter()
+        for requested_at, state in self._first_frame_waiters:
+            elapsed = now - requested_at
+            TIME_TO_FIRST_FRAME.observe(elapsed)
+            MetricsRegistry().set_gauge('rsunity_time_to_first_frame_last_seconds', elapsed,
+                                        help='Most recent time-to-first-frame by idle state at request time',
+                                        labels={'from_state': state})
+            logger.info(f"첫 프레임까지 {elapsed * 1000:.0f} ms (요청 시 상태: {state})")
+        self._first_frame_waiters.clear()
+    
+    def _measure_profile(self, width: int, height: int, fps: int, frames: int, warmup_frames: int,
+                         process_fn: Optional[Callable[[FrameData], None]]) -> Dict[str, Any]:
+        """(executor에서 실행) 지정 프로파일로 파이프라인을 시작하여 캡처/처리 비용을 측정합니다."""
+        result = {"width": width, "height": height, "fps": fps, "ok": False}
+        if self.pipeline:
+            try:
+                self.pipeline.stop()
+            except Exception:
+                pass
+        if not self._start_pipeline(self.configured_streams, width, height, fps):
+            return result
+        
+        process_seconds = 0.0
+        try:
+            for _ in range(warmup_frames):
+                self.pipeline.wait_for_frames()
+            
+            cpu_start = time.process_time()
+            wall_start = time.perf_counter()
+            for _ in range(frames):
+                frameset = self.pipeline.wait_for_frames()
+                if process_fn is not None:
+                    color_frame = frameset.get_color_frame()
+                    depth_frame = frameset.get_depth_frame()
+                    frame_data = FrameData(
+                        timestamp=datetime.now().timestamp(),
+                        depth_frame=np.asanyarray(depth_frame.get_data()) if depth_frame else None,
+                        imu_data=None,
+                        sequence=self._calibration_sequence,
+                        **self._color_fields(np.asanyarray(color_frame.get_data()) if color_frame else None),
+                    )
+                    # 측정용 프레임은 음수 순번을 사용하여 실제 프레임 캐시와 겹치지 않게 합니다.
+                    self._calibration_sequence -= 1
+                    process_start = time.perf_counter()
+                    try:
+                        process_fn(frame_data)
+                    finally:
+                        frame_data.release_color_conversion()
+                    process_seconds += time.perf_counter() - process_start
+        except RuntimeError as e:
+            # 프레임 타임아웃 등: 이 후보는 실패로 기록하고 다음 후보를 측정합니다.
+            logger.warning(f"프로파일 측정 실패 ({width}x{height}@{fps}): {str(e)}")
+            result["error"] = str(e)
+            return result
+        wall_seconds = time.perf_counter() - wall_start
+        cpu_seconds = time.process_time() - cpu_start
+        
+        measured_fps = frames / wall_seconds if wall_seconds > 0 else 0.0
+        result.update({
+            "ok": True,
+            "measured_fps": measured_fps,
+            "cpu_ms_per_frame": cpu_seconds * 1000.0 / frames,
+            "process_ms_per_frame": process_seconds * 1000.0 / frames,
+            # 프로세스 전체 CPU 사용률 (1.0 = 코어 1개), librealsense 내부 스레드 포함
+            "cpu_load": cpu_seconds / wall_seconds if wall_seconds > 0 else 0.0,
+        })
+        return result
+    
+    async def measure_profiles(self, candidates: List[Dict[str, int]], frames: int = 30, warmup_frames: int = 10,
+                               process_fn: Optional[Callable[[FrameData], None]] = None,
+                               accept_fn: Optional[Callable[[Dict[str, Any]], bool]] = None) -> List[Dict[str, Any]]:
+        """후보 프로파일을 차례로 실행하여 측정합니다. accept_fn이 True를 반환하면 그 후보에서 멈춥니다.
+        
+        측정 중에는 프레임 처리가 중지되며, 끝난 뒤 파이프라인은 마지막 측정 프로파일 상태로 남습니다.
+        (restart_pipeline 또는 reconfigure로 원하는 프로파일을 적용하세요.)
+        """
+        if not self.is_connected:
+            raise ValueError("RealSense가 연결되지 않았습니다.")
+        
+        loop = asyncio.get_event_loop()
+        measurements = []
+        async with self._pipeline_lock:
+            if self.is_running:
+                await self.stop_streaming()
+            for candidate in candidates:
+                measurement = await loop.run_in_executor(
+                    None, self._measure_profile, candidate["width"], candidate["height"], candidate["fps"],
+                    frames, warmup_frames, process_fn
+                )
+                logger.info(f"프로파일 측정: {measurement}")
+                measurements.append(measurement)
+                if measurement["ok"] and accept_fn is not None and accept_fn(measurement):
+                    break
+        return measurements
+    
+    def add_reconfigure_listener(self, listener: Callable[[Dict[str, Any]], None]):
+        """프로파일 변경 후 호출될 리스너를 등록합니다.
+        
+        리스너는 {항목: (이전 값, 새 값)} 형태의 변경 내역을 받으며 executor에서 실행됩니다.
+        """
+        self._reconfigure_listeners.append(listener)
+    
+    def get_stream_profile(self) -> Dict[str, Any]:
+        """현재 스트림 프로파일 반환"""
+        cfg = self.rs_config
+        return {
+            "width": cfg.get('width', 424),
+            "height": cfg.get('height', 240),
+            "fps": cfg.get('fps', 15),
+            "streams": sorted(self.configured_streams),
+            "active_streams": sorted(self.active_streams),
+        }
+    
+    async def reconfigure(self, width: Optional[int] = None, height: Optional[int] = None,
+                          fps: Optional[int] = None, streams: Optional[Set[str]] = None,
+                          persist: bool = False) -> Dict[str, Any]:
+        """실행 중에 해상도/FPS/스트림 조합을 변경합니다. 클라이언트 연결은 유지됩니다.
+        
+        변경된 항목에 해당하는 파이프라인과 캐시만 다시 만들며,
+        새 프로파일로 시작하지 못하면 이전 프로파일로 복구하고 ValueError를 발생시킵니다.
+        """
+        if not self.is_connected:
+            raise ValueError("RealSense가 연결되지 않았습니다.")
+        
+        old_profile = self.get_stream_profile()
+        settings = {
+            "width": int(width) if width is not None else old_profile["width"],
+            "height": int(height) if height is not None else old_profile["height"],
+            "fps": int(fps) if fps is not None else old_profile["fps"],
+        }
+        new_streams = set(streams) if streams is not None else set(self.configured_streams)
+        if new_streams - {'color', 'depth'}:
+            raise ValueError(f"지원하지 않는 스트림: {sorted(new_streams - {'color', 'depth'})}")
+        if not new_streams:
+            raise ValueError("하나 이상의 스트림을 활성화해야 합니다.")
+        
+        changes = {key: (old_profile[key], value) for key, value in settings.items() if old_profile[key] != value}
+        if new_streams != self.configured_streams:
+            changes["streams"] = (old_profile["streams"], sorted(new_streams))
+        if not changes:
+            return {"changed": {}, "profile": old_profile, "elapsed_ms": 0.0}
+        
+        logger.info(f"스트림 프로파일 변경 요청: {changes}")
+        started_at = time.perf_counter()
+        old_streams = set(self.configured_streams)
+        
+        async with self._pipeline_lock:
+            was_running = self.is_running
+            self.rs_config.update(settings)
+            self.configured_streams = new_streams
+            
+            if not await self._restart_pipeline(self._desired_streams()):
+                logger.error("새 프로파일로 파이프라인을 시작하지 못했습니다. 이전 프로파일로 복구합니다.")
+                self.rs_config.update({key: old_profile[key] for key in settings})
+                self.configured_streams = old_streams
+                if not await self._restart_pipeline(self._desired_streams()):
+                    self.is_connected = False
+                elif was_running and not self.is_running:
+                    await self.start_streaming()
+                raise ValueError(f"장치가 요청한 프로파일을 지원하지 않습니다: {settings}, streams={sorted(new_streams)}")
+            # 새 프로파일은 전체 FPS로 시작하므로 warm/cold에서 변경했다면 hot부터 유휴 정책을 다시 밟습니다.
+            self._set_idle_state('hot')
+        if not self._consumers:
+            self._schedule_idle()
+        
+        if persist:
+            self.config.save_config()
+        
+        # 변경에 영향을 받는 캐시/인코더 재생성
+        loop = asyncio.get_event_loop()
+        for listener in self._reconfigure_listeners:
+            try:
+                await loop.run_in_executor(None, listener, changes)
+            except Exception as e:
+                logger.error(f"프로파일 변경 리스너 오류: {str(e)}", exc_info=True)
+        
+        elapsed_ms = (time.perf_counter() - started_at) * 1000.0
+        logger.info(f"스트림 프로파일 변경 완료 ({elapsed_ms:.0f} ms): {self.get_stream_profile()}")
+        return {"changed": changes, "profile": self.get_stream_profile(), "elapsed_ms": elapsed_ms}
     
     async def start_streaming(self):
         """스트리밍 시작"""
@@ -205,6 +823,55 @@ class RealSenseManager:
         
         logger.info("스트리밍 태스크 중지 완료. (카메라 하드웨어는 계속 활성 상태)")
     
+    async def add_consumer(self, consumer_id, streams: Optional[Set[str]] = None) -> None:
+        """데이터 소비자를 등록하고, 첫 소비자라면 스트리밍을 시작합니다.
+        
+        streams는 소비자가 필요로 하는 하드웨어 스트림('color', 'depth')이며,
+        None이면 설정된 모든 스트림을 요구하는 것으로 간주합니다.
+        """
+        if consumer_id not in self._consumers:
+            self._first_frame_waiters.append((time.perf_counter(), self.idle_state))
+        self._consumers[consumer_id] = set(streams) if streams is not None else set(self.configured_streams)
+        if not self.is_connected:
+            # 장치 초기화(백그라운드) 중에 등록된 소비자는 start_pending_consumers에서 시작합니다.
+            logger.info(f"장치 준비 중이므로 소비자 {consumer_id}를 대기 목록에 등록합니다.")
+            return
+        if not await self._wake():
+            return
+        await self._apply_stream_demand()
+        if not self.is_running:
+            logger.info("첫 소비자가 등록되어 스트리밍을 시작합니다.")
+            await self.start_streaming()
+    
+    async def start_pending_consumers(self) -> None:
+        """장치 초기화 전에 등록된 소비자가 있으면 스트림 구성을 맞추고 스트리밍을 시작합니다."""
+        if not self.is_connected:
+            return
+        self._set_idle_state('hot')
+        if not self._consumers:
+            self._schedule_idle()
+            return
+        await self._apply_stream_demand()
+        if not self.is_running:
+            logger.info(f"대기 중이던 소비자 {len(self._consumers)}개를 위해 스트리밍을 시작합니다.")
+            await self.start_streaming()
+    
+    async def remove_consumer(self, consumer_id) -> None:
+        """데이터 소비자를 해제합니다. 남은 소비자가 없으면 유휴 정책(hot -> warm -> cold)을 시작합니다."""
+        if self._consumers.pop(consumer_id, None) is not None:
+            await self._apply_stream_demand()
+            if not self._consumers:
+                logger.info("활성 소비자가 없어 유휴 정책을 시작합니다.")
+                self._schedule_idle()
+    
+    def set_frame_stride(self, stride: int) -> None:
+        """캡처한 프레임 중 stride개마다 하나만 게시합니다. (1이면 모든 프레임)"""
+        self.frame_stride = max(1, int(stride))
+    
+    def has_consumers(self) -> bool:
+        """등록된 소비자가 있는지 반환"""
+        return bool(self._consumers)
+    
     async def _process_all_frames(self):
         """(통합) 프레임 및 IMU 데이터 처리 비동기 태스크"""
         try:
@@ -212,25 +879,40 @@ class RealSenseManager:
                 frames = await asyncio.get_event_loop().run_in_executor(
                     None, self.pipeline.wait_for_frames
                 )
-
-                # --- 이미지 프레임 처리 ---
+                host_monotonic = time.monotonic()
+                host_timestamp = time.time()
                 color_frame = frames.get_color_frame()
-                color_image = np.asanyarray(color_frame.get_data()) if color_frame else None
-
                 depth_frame = frames.get_depth_frame()
-                depth_image = np.asanyarray(depth_frame.get_data()) if depth_frame else None
+                color_meta = self._read_metadata('color', color_frame)
+                depth_meta = self._read_metadata('depth', depth_frame)
+
+                self._captured_frames += 1
+                if self._captured_frames % self.frame_stride:
+                    # 과부하 시 일부 프레임을 게시하지 않아 하위 처리의 FPS를 낮춥니다.
+                    continue
+
+                # --- 이미지 프레임 처리 ---
+                # SDK 프레임 풀이 고갈되지 않도록 즉시 소유 버퍼로 복사하고 SDK 프레임은 놓아줍니다.
+                color_image = self._copy_frame(color_frame)
+                depth_image = self._copy_frame(depth_frame)
+                del frames, color_frame, depth_frame
                 
                 # --- IMU 프레임 처리 (비활성화) ---
                 # IMU 데이터는 항상 None으로 설정됩니다.
                 self.latest_imu_data = None
 
                 # --- 최종 데이터 객체 생성 ---
-                self.latest_frame_data = FrameData(
-                    timestamp=datetime.now().timestamp(),
-                    color_frame=color_image,
+                self.publish_frame(FrameData(
+                    timestamp=self._capture_time(depth_meta or color_meta, host_timestamp),
+                    **self._color_fields(color_image),
                     depth_frame=depth_image,
-                    imu_data=self.latest_imu_data
-                )
+                    imu_data=self.latest_imu_data,
+                    sequence=self.next_sequence(),
+                    host_timestamp=host_timestamp,
+                    host_monotonic=host_monotonic,
+                    color_meta=color_meta,
+                    depth_meta=depth_meta,
+                ))
                 
                 # 프레임 처리 간격 조절
                 await asyncio.sleep(1.0 / self.rs_config.get('fps', 15))
@@ -240,10 +922,151 @@ class RealSenseManager:
         except Exception as e:
             logger.error(f"프레임 처리 중 오류: {str(e)}", exc_info=True)
     
+    def _read_metadata(self, stream: str, frame) -> Optional[StreamMetadata]:
+        """프레임의 하드웨어 메타데이터를 읽고, 하드웨어 프레임 번호로 누락 프레임을 집계합니다."""
+        if not frame:
+            return None
+        
+        supported = self._metadata_support.get(stream)
+        if supported is None:
+            # 지원 여부는 파이프라인마다 한 번만 확인합니다.
+            keys = ((name, getattr(rs.frame_metadata_value, key)) for name, key in _METADATA_FIELDS)
+            supported = self._metadata_support[stream] = [
+                (name, key) for name, key in keys if frame.supports_frame_metadata(key)
+            ]
+        
+        domain = frame.get_frame_timestamp_domain()
+        meta = StreamMetadata(
+            frame_number=frame.get_frame_number(),
+            timestamp=frame.get_timestamp(),
+            timestamp_domain=getattr(domain, 'name', str(domain)).split('.')[-1],
+        )
+        for name, key in supported:
+            setattr(meta, name, frame.get_frame_metadata(key))
+        
+        last = self._last_frame_numbers.get(stream)
+        if last is not None and meta.frame_number > last + 1:
+            dropped = meta.frame_number - last - 1
+            self.dropped_hw_frames[stream] += dropped
+            MetricsRegistry().inc_counter(
+                'rsunity_hw_frame_drops_total', dropped,
+                help='Frames skipped by the device or SDK (hardware frame number gaps)',
+                labels={'stream': stream},
+            )
+        self._last_frame_numbers[stream] = meta.frame_number
+        return meta
+    
+    @staticmethod
+    def _capture_time(meta: Optional[StreamMetadata], host_timestamp: float) -> float:
+        """SDK 타임스탬프가 호스트 시계 기준이면 캡처 시각(초)으로, 아니면 수신 시각을 사용합니다."""
+        if meta is not None and meta.timestamp_domain in HOST_CLOCK_DOMAINS and not math.isnan(meta.timestamp):
+            return meta.timestamp / 1000.0
+        return host_timestamp
+    
+    def _color_fields(self, image: Optional[np.ndarray]) -> Dict[str, Optional[np.ndarray]]:
+        """컬러 이미지를 color_format에 맞는 FrameData 인자로 나눕니다."""
+        if self.color_format == 'yuyv':
+            return {'color_frame': None, 'color_yuyv': image}
+        return {'color_frame': image}
+
+    def _copy_frame(self, frame) -> Optional[np.ndarray]:
+        """SDK 프레임 데이터를 BufferPool 버퍼로 복사합니다."""
+        if not frame:
+            return None
+        view = np.asanyarray(frame.get_data())
+        owned = BufferPool().acquire(view.shape, view.dtype)
+        np.copyto(owned, view)
+        return owned
+    
     def get_latest_frame_data(self) -> Optional[FrameData]:
         """최신 프레임 데이터 반환"""
         return self.latest_frame_data
     
+    def get_frame(self, sequence: int, lease: bool = False) -> Optional[FrameData]:
+        """기록 창 안의 프레임을 순번으로 조회합니다. (창 밖이면 None, lease=True이면 임대하여 반환)"""
+        return self.frame_history.get(sequence, lease)
+    
+    def get_frame_at(self, timestamp: float, tolerance: Optional[float] = None,
+                     lease: bool = False) -> Optional[FrameData]:
+        """기록 창 안에서 타임스탬프가 가장 가까운 프레임을 조회합니다. (lease=True이면 임대하여 반환)"""
+        return self.frame_history.get_nearest(timestamp, tolerance, lease)
+    
+    def lease_latest_frame(self) -> Optional[FrameData]:
+        """최신 프레임을 임대하여 반환합니다. (없으면 None)"""
+        return self.frame_history.lease_latest()
+    
+    def lease_frame(self, frame_data: FrameData) -> bool:
+        """이미 임대한 프레임을 한 번 더 임대합니다. (작업자 스레드에 넘길 때 등)
+        
+        기록 링이 관리하지 않는 프레임이면 False입니다. 버퍼가 이미 재사용된 프레임은
+        frame_data.recycled가 True이므로 사용하지 말고 건너뛰어야 합니다.
+        """
+        return self.frame_history.acquire(frame_data)
+    
+    def release_frame(self, frame_data: FrameData):
+        """임대한 프레임을 반환합니다. (임대하지 않은 프레임은 무시)"""
+        self.frame_history.release(frame_data)
+    
+    @contextmanager
+    def leased_frame(self, frame_data: FrameData):
+        """임대한 프레임(lease_new_frame 등)을 with 블록이 끝날 때 반환합니다."""
+        try:
+            yield frame_data
+        finally:
+            self.release_frame(frame_data)
+    
+    def next_sequence(self) -> int:
+        """다음 프레임 순번을 발급합니다."""
+        self._frame_sequence += 1
+        return self._frame_sequence
+    
+    def publish_frame(self, frame_data: FrameData):
+        """프레임을 최신 프레임으로 게시하고 기록에 추가한 뒤 대기자를 깨웁니다.
+        
+        릴레이 모드(relay.RelaySource)에서는 상위 서버에서 받은 인코딩 결과를 캐시에 넣은 뒤
+        픽셀 데이터 없는 FrameData를 이 메서드로 게시합니다.
+        """
+        self.latest_frame_data = frame_data
+        self.frame_history.append(frame_data)
+        self._notify_new_frame()
+        if self._first_frame_waiters:
+            self._resolve_first_frame_waiters()
+    
+    def _notify_new_frame(self):
+        """새 프레임을 기다리는 모든 대기자를 깨웁니다."""
+        event = self._new_frame_event
+        self._new_frame_event = asyncio.Event()
+        event.set()
+    
+    async def wait_for_new_frame(self, last_sequence: int, timeout: Optional[float] = None) -> Optional[FrameData]:
+        """last_sequence 이후의 새 프레임이 도착할 때까지 대기합니다. (타임아웃 시 None)
+        
+        반환된 프레임은 임대되지 않았으므로 기록에서 밀려나면 버퍼가 재사용될 수 있습니다.
+        픽셀을 읽는 쪽은 lease_new_frame을 사용하세요.
+        """
+        frame_data = self.latest_frame_data
+        if frame_data is not None and frame_data.sequence > last_sequence:
+            return frame_data
+        
+        try:
+            await asyncio.wait_for(self._new_frame_event.wait(), timeout)
+        except asyncio.TimeoutError:
+            return None
+        return self.latest_frame_data
+    
+    async def lease_new_frame(self, last_sequence: int, timeout: Optional[float] = None) -> Optional[FrameData]:
+        """last_sequence 이후의 새 프레임을 기다려 임대한 상태로 반환합니다. (타임아웃 시 None)
+        
+        조회와 임대가 기록 링의 잠금 안에서 함께 일어나므로, 반환된 프레임의 버퍼는
+        release_frame(또는 leased_frame)으로 반환할 때까지 재사용되지 않습니다.
+        """
+        frame_data = self.frame_history.lease_latest(last_sequence)
+        if frame_data is not None:
+            return frame_data
+        if await self.wait_for_new_frame(last_sequence, timeout) is None:
+            return None
+        return self.frame_history.lease_latest(last_sequence)
+    
     def get_latest_imu_data(self) -> Optional[IMUData]:
         """최신 IMU 데이터 반환"""
         return self.latest_imu_data
@@ -255,7 +1078,7 @@ class RealSenseManager:
         
         data = {
             "timestamp": self.latest_frame_data.timestamp,
-            "has_color": self.latest_frame_data.color_frame is not None,
+            "has_color": self.latest_frame_data.has_color,
             "has_depth": self.latest_frame_data.depth_frame is not None,
             "has_imu": self.latest_frame_data.imu_data is not None
         }
@@ -274,6 +1097,7 @@ class RealSenseManager:
     async def cleanup(self):
         """모든 리소스를 정리하고 파이프라인을 안전하게 중지합니다."""
         logger.info("RealSense 리소스 정리 시작...")
+        self._cancel_idle()
         
         # 1. 스트리밍 태스크가 실행 중이라면 먼저 중지합니다.
         if self.is_running:
@@ -0,0 +1,250 @@
+"""
+릴레이(엣지) 모드
+카메라 호스트(보통 작은 ARM 보드)가 감당할 수 있는 클라이언트 수는 많지 않으므로,
+다른 서버가 상위 서버의 바이너리 WebSocket(/ws) 스트림을 한 번만 구독하여 자기 클라이언트에게 다시 보냅니다.
+
+    - 받은 페이로드는 디코딩/재인코딩 없이 그대로 EncodedFrameCache에 넣고, 픽셀 데이터 없는 FrameData를 게시합니다.
+      Socket.IO 룸, /ws, MJPEG, 스냅샷은 카메라 모드와 같은 경로로 캐시된 바이트를 전송합니다.
+    - 상위 서버는 릴레이를 클라이언트 하나로만 보므로 시청자가 늘어도 카메라 호스트의 부하는 일정합니다.
+    - 릴레이도 같은 /ws를 제공하므로 릴레이 뒤에 릴레이를 이어 붙일 수 있습니다.
+    - 캡처 시각(capture_ts)은 홉을 지나도 원본 값을 유지하고 전송 시각(send_ts)은 홉마다 새로 찍히므로,
+      각 릴레이는 자기 홉 지연(수신 - 상위 전송)과 누적 지연(수신 - 캡처)을 /metrics로 보고합니다.
+      (호스트 간 시계가 NTP 등으로 맞춰져 있어야 정확합니다)
+
+config.json의 relay 섹션을 참고하세요. 비디오 코덱(h264, vp8) 스트림은 릴레이하지 않습니다.
+릴레이의 클라이언트는 relay.streams로 받는 스트림/포맷만 구독할 수 있습니다. (check_subscription)
+"""
+
+import asyncio
+import logging
+import time
+from typing import Optional, Dict, Any, Tuple
+from urllib.parse import urlencode
+import aiohttp
+from binary_protocol import unpack_header
+from config import Config
+from frame_cache import EncodedFrame, EncodedFrameCache
+from metrics import Histogram, MetricsRegistry
+from realsense_manager import FrameData, RealSenseManager
+from subscriptions import Subscription, parse_subscription
+
+logger = logging.getLogger(__name__)
+
+HOP_LATENCY = Histogram((0.001, 0.002, 0.005, 0.01, 0.02, 0.05, 0.1, 0.2, 0.5))
+CAPTURE_AGE = Histogram((0.005, 0.01, 0.02, 0.05, 0.1, 0.2, 0.5, 1.0))
+MetricsRegistry().add_histogram('rsunity_relay_hop_latency_seconds', HOP_LATENCY,
+                                help='Upstream send to relay receive time for this hop')
+MetricsRegistry().add_histogram('rsunity_relay_capture_age_seconds', CAPTURE_AGE,
+                                help='Camera capture to relay receive time (all hops up to this relay)')
+
+# 메시지 수신 타임아웃 (초). 이 서버의 클라이언트가 남아 있는지 주기적으로 확인하기 위함
+RECEIVE_TIMEOUT = 1.0
+
+
+class RelaySource:
+    """상위 서버 스트림을 받아 로컬 프레임으로 게시하는 싱글톤 클래스"""
+
+    _instance = None
+    _initialized = False
+
+    def __new__(cls):
+        if cls._instance is None:
+            cls._instance = super(RelaySource, cls).__new__(cls)
+        return cls._instance
+
+    def __init__(self):
+        if self._initialized:
+            return
+
+        self.options = Config().get_relay_config()
+        self.enabled = bool(self.options.get('enabled', False))
+        self.connected = False
+        self._task: Optional[asyncio.Task] = None
+        self._variants: Dict[str, str] = {}  # 스트림 -> 로컬 캐시 변형
+
+        # 같은 상위 순번의 메시지(스트림별 1개)를 모아 한 프레임으로 게시합니다.
+        self._pending_sequence: Optional[int] = None
+        self._pending: Dict[str, Tuple[Dict[str, Any], bytes]] = {}
+
+        # 통계
+        self.frames = 0
+        self.incomplete_frames = 0
+        self.bytes = 0
+        self.last_hop_latency: Optional[float] = None
+        self.last_capture_age: Optional[float] = None
+
+        self._initialized = True
+
+    def _subscription(self) -> Subscription:
+        subscription = parse_subscription({
+            'streams': self.options.get('streams'),
+            'priority': self.options.get('priority', 'high'),
+        })
+        if subscription.video_variants():
+            raise ValueError("Video codec streams (h264, vp8) cannot be relayed.")
+        if not subscription.variants():
+            raise ValueError("Relay needs at least one encoded stream.")
+        return subscription
+
+    def check_variants(self, variants: Dict[str, str]) -> None:
+        """릴레이 모드에서 상위 서버로부터 받지 않는 {스트림: 변형}이 있으면 ValueError를 발생시킵니다."""
+        if not self.enabled:
+            return
+        relayed = self._variants or self._subscription().variants()
+        missing = sorted(variant for stream, variant in variants.items() if relayed.get(stream) != variant)
+        if missing:
+            raise ValueError(f"Not available from this relay: {', '.join(missing)} "
+                             f"(available: {', '.join(sorted(relayed.values()))})")
+
+    def check_subscription(self, subscription: Subscription) -> None:
+        """릴레이가 제공할 수 없는 구독이면 ValueError를 발생시킵니다. (카메라 모드에서는 항상 통과)"""
+        if not self.enabled:
+            return
+        if subscription.video_variants():
+            raise ValueError("Video codec streams (h264, vp8) are not available from a relay.")
+        if 'imu' in subscription.streams:
+            raise ValueError("IMU data is not available from a relay.")
+        self.check_variants(subscription.variants())
+
+    def upstream_url(self, subscription: Subscription) -> str:
+        streams = ','.join(f"{stream}:{fmt}" for stream, fmt in subscription.streams.items())
+        query = urlencode({'streams': streams, 'priority': subscription.priority})
+        return f"{self.options.get('upstream', 'ws://127.0.0.1:8080/ws')}?{query}"
+
+    async def start(self):
+        """릴레이 태스크를 시작합니다. (잘못된 relay.streams 설정은 ValueError)"""
+        subscription = self._subscription()
+        self._variants = subscription.variants()
+        if self._task is None:
+            self._task = asyncio.create_task(self._run(self.upstream_url(subscription)))
+            logger.info(f"릴레이 모드: {self.upstream_url(subscription)} -> 스트림 {sorted(self._variants)}")
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def _set_connected(self, connected: bool):
+        self.connected = connected
+        MetricsRegistry().set_gauge('rsunity_relay_connected', int(connected),
+                                    help='1 while the relay is subscribed to its upstream server')
+
+    async def _run(self, url: str):
+        """이 서버에 클라이언트가 있는 동안 상위 서버에 연결을 유지합니다."""
+        rs_manager = RealSenseManager()
+        reconnect_s = float(self.options.get('reconnect_s', 2.0))
+        async with aiohttp.ClientSession() as session:
+            while True:
+                if not rs_manager.has_consumers():
+                    await asyncio.sleep(RECEIVE_TIMEOUT)
+                    continue
+                try:
+                    async with session.ws_connect(url, heartbeat=10.0) as ws:
+                        self._set_connected(True)
+                        logger.info(f"상위 서버에 연결되었습니다: {url}")
+                        await self._receive(ws, rs_manager)
+                        logger.info("이 서버에 클라이언트가 없어 상위 서버 연결을 끊습니다.")
+                except (aiohttp.ClientError, asyncio.TimeoutError, ConnectionError) as e:
+                    logger.warning(f"상위 서버 연결 실패/끊김 ({e}). {reconnect_s:g}초 후 다시 연결합니다.")
+                    await asyncio.sleep(reconnect_s)
+                finally:
+                    self._set_connected(False)
+                    self._flush(rs_manager)
+
+    async def _receive(self, ws: aiohttp.ClientWebSocketResponse, rs_manager: RealSenseManager):
+        idle_disconnect_s = float(self.options.get('idle_disconnect_s', 10.0))
+        idle_since: Optional[float] = None
+        while True:
+            if rs_manager.has_consumers():
+                idle_since = None
+            elif idle_since is None:
+                idle_since = time.monotonic()
+            elif time.monotonic() - idle_since >= idle_disconnect_s:
+                return
+
+            try:
+                msg = await ws.receive(timeout=RECEIVE_TIMEOUT)
+            except asyncio.TimeoutError:
+                continue
+            if msg.type == aiohttp.WSMsgType.BINARY:
+                self._on_message(msg.data, rs_manager)
+            elif msg.type in (aiohttp.WSMsgType.CLOSE, aiohttp.WSMsgType.CLOSED, aiohttp.WSMsgType.ERROR):
+                raise ConnectionError(f"upstream closed ({ws.close_code})")
+
+    def _on_message(self, message: bytes, rs_manager: RealSenseManager):
+        received_at = time.time()
+        try:
+            header, payload = unpack_header(message)
+        except ValueError as e:
+            logger.warning(f"잘못된 상위 메시지: {e}")
+            return
+
+        variant = self._variants.get(header['stream'])
+        if variant is None:
+            return
+        if self._pending_sequence is not None and header['sequence'] != self._pending_sequence:
+            # 상위에서 일부 스트림을 보내지 않은 프레임(인코딩 실패, 움직임 제어 등)은 받은 것만 게시합니다.
+            self.incomplete_frames += 1
+            self._flush(rs_manager)
+
+        hop_latency = received_at - header['send_timestamp']
+        capture_age = received_at - header['capture_timestamp']
+        HOP_LATENCY.observe(max(0.0, hop_latency))
+        CAPTURE_AGE.observe(max(0.0, capture_age))
+        self.last_hop_latency = hop_latency
+        self.last_capture_age = capture_age
+        self.bytes += len(payload)
+
+        self._pending_sequence = header['sequence']
+        self._pending[variant] = (header, bytes(payload))
+        if len(self._pending) == len(self._variants):
+            self._flush(rs_manager)
+
+    def _flush(self, rs_manager: RealSenseManager):
+        """모은 메시지를 로컬 순번의 인코딩 결과로 캐시에 넣고 프레임을 게시합니다."""
+        if not self._pending:
+            return
+        sequence = rs_manager.next_sequence()
+        cache = EncodedFrameCache()
+        capture_timestamp = 0.0
+        for variant, (header, data) in self._pending.items():
+            capture_timestamp = header['capture_timestamp']
+            cache.put(variant, EncodedFrame(
+                stream=header['stream'],
+                codec=header['codec'],
+                sequence=sequence,
+                timestamp=capture_timestamp,  # 원본 캡처 시각 유지 (다음 홉의 누적 지연 계산용)
+                width=header['width'],
+                height=header['height'],
+                data=data,
+            ))
+        self._pending = {}
+        self._pending_sequence = None
+
+        rs_manager.publish_frame(FrameData(
+            timestamp=capture_timestamp,
+            color_frame=None,
+            depth_frame=None,
+            imu_data=None,
+            sequence=sequence,
+            host_timestamp=time.time(),
+            host_monotonic=time.monotonic(),
+            relayed=True,
+        ))
+        self.frames += 1
+        MetricsRegistry().inc_counter('rsunity_relay_frames_total', help='Frames received from the upstream server')
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "enabled": self.enabled,
+            "connected": self.connected,
+            "frames": self.frames,
+            "incomplete_frames": self.incomplete_frames,
+            "bytes": self.bytes,
+            "last_hop_latency_ms": self.last_hop_latency * 1000.0 if self.last_hop_latency is not None else None,
+            "last_capture_age_ms": self.last_capture_age * 1000.0 if self.last_capture_age is not None else None,
+        }
@@ -0,0 +1,193 @@
+"""
+Socket.IO 룸 기반 프레임 브로드캐스트
+같은 구독(스트림/포맷/우선순위)을 가진 클라이언트를 하나의 Socket.IO 룸으로 묶고,
+룸마다 하나의 작업이 새 프레임마다 한 번 깨어나 페이로드를 한 번 만들어 룸 전체에 보냅니다.
+(클라이언트 수가 늘어도 타이머/작업 수는 구독 조합 수만큼만 늘어납니다.)
+
+    - 패킷은 룸 단위로 한 번만 직렬화됩니다. (python-socketio가 수신자별 패킷을 재사용)
+    - engine.io 송신 큐가 max_client_queue를 넘은 느린 클라이언트는 큐가 빠질 때까지 그 프레임을 건너뜁니다.
+      (항상 최신 프레임만 받으며, 건너뛴 프레임 수는 과부하 제어에 보고됩니다.)
+"""
+
+import asyncio
+import logging
+import time
+from dataclasses import dataclass, field
+from typing import Optional, Dict, Any, Callable, Awaitable, Set, List
+from config import Config
+from metrics import MetricsRegistry
+from motion_gate import MotionGate
+from overload_governor import OverloadGovernor
+from realsense_manager import RealSenseManager, FrameData
+from subscriptions import Subscription
+
+logger = logging.getLogger(__name__)
+
+# 새 프레임 대기 타임아웃 (초). 룸이 비었는지 주기적으로 확인하기 위함
+FRAME_WAIT_TIMEOUT = 1.0
+ROOM_PREFIX = 'frames:'
+
+PayloadBuilder = Callable[[FrameData, Subscription], Awaitable[Optional[Dict[str, Any]]]]
+
+
+@dataclass
+class BroadcastRoom:
+    """구독 시그니처 하나에 해당하는 룸"""
+    name: str
+    subscription: Subscription
+    members: Set[str] = field(default_factory=set)
+    skipped: Dict[str, int] = field(default_factory=dict)  # 느린 클라이언트별 연속으로 건너뛴 프레임 수
+    task: Optional[asyncio.Task] = None
+    frames_sent: int = 0
+
+
+class BroadcastScheduler:
+    """구독 시그니처별 룸과 브로드캐스트 작업을 관리합니다."""
+
+    def __init__(self, sio, build_payload: PayloadBuilder, event: str = 'frame_data'):
+        self.sio = sio
+        self.build_payload = build_payload
+        self.event = event
+        self.max_client_queue = int(Config().get_server_config().get('max_client_queue', 2))
+        self._rooms: Dict[str, BroadcastRoom] = {}
+        self._membership: Dict[str, str] = {}  # sid -> 룸 이름
+
+    # --- 멤버십 ---
+    def is_streaming(self, sid) -> bool:
+        return sid in self._membership
+
+    async def join(self, sid, subscription: Subscription):
+        """클라이언트를 구독에 해당하는 룸에 넣습니다. 다른 룸에 있었다면 옮깁니다."""
+        name = ROOM_PREFIX + subscription.signature()
+        if self._membership.get(sid) == name:
+            return
+        await self.leave(sid)
+
+        room = self._rooms.get(name)
+        if room is None:
+            room = self._rooms[name] = BroadcastRoom(name=name, subscription=subscription)
+            logger.info(f"브로드캐스트 룸 생성: {name}")
+        room.members.add(sid)
+        self._membership[sid] = name
+        await self.sio.enter_room(sid, name)
+        if room.task is None or room.task.done():
+            room.task = asyncio.create_task(self._run(room))
+        self._export_metrics()
+
+    async def leave(self, sid):
+        """클라이언트를 룸에서 뺍니다. 룸이 비면 브로드캐스트 작업을 멈춥니다."""
+        name = self._membership.pop(sid, None)
+        if name is None:
+            return
+        room = self._rooms.get(name)
+        await self.sio.leave_room(sid, name)
+        if room is None:
+            return
+        room.members.discard(sid)
+        room.skipped.pop(sid, None)
+        if not room.members:
+            del self._rooms[name]
+            await self._cancel(room)
+            logger.info(f"브로드캐스트 룸 종료: {name} (전송 {room.frames_sent}프레임)")
+        self._export_metrics()
+
+    async def stop(self):
+        """모든 룸의 작업을 멈춥니다."""
+        rooms, self._rooms = list(self._rooms.values()), {}
+        self._membership.clear()
+        for room in rooms:
+            await self._cancel(room)
+        self._export_metrics()
+
+    @staticmethod
+    async def _cancel(room: BroadcastRoom):
+        if room.task is not None and room.task is not asyncio.current_task():
+            room.task.cancel()
+            try:
+                await room.task
+            except asyncio.CancelledError:
+                pass
+        room.task = None
+
+    # --- 전송 ---
+    def _queue_depth(self, sid) -> int:
+        """클라이언트 engine.io 송신 큐에 쌓인 패킷 수 (알 수 없으면 0)"""
+        try:
+            eio_sid = self.sio.manager.eio_sid_from_sid(sid, '/')
+            socket = self.sio.eio.sockets.get(eio_sid)
+            return socket.queue.qsize() if socket is not None else 0
+        except AttributeError:
+            return 0
+
+    def _slow_members(self, room: BroadcastRoom) -> List[str]:
+        """송신 큐가 밀린 클라이언트 목록. 건너뛴 프레임 수를 과부하 제어에 보고합니다."""
+        governor = OverloadGovernor()
+        slow = []
+        for sid in room.members:
+            if self._queue_depth(sid) > self.max_client_queue:
+                slow.append(sid)
+                room.skipped[sid] = room.skipped.get(sid, 0) + 1
+                governor.report_client_backlog(sid, room.skipped[sid])
+            else:
+                room.skipped.pop(sid, None)
+        if slow:
+            MetricsRegistry().inc_counter('rsunity_broadcast_slow_skips_total', len(slow),
+                                          help='Frames skipped for Socket.IO clients with a full send queue')
+        return slow
+
+    async def _run(self, room: BroadcastRoom):
+        """새 프레임마다 룸 페이로드를 한 번 만들어 보냅니다."""
+        rs_manager = RealSenseManager()
+        governor = OverloadGovernor()
+        motion_gate = MotionGate()
+        last_sequence = 0
+        last_sent_at = float('-inf')
+        try:
+            while room.members:
+                frame_data = await rs_manager.lease_new_frame(last_sequence, FRAME_WAIT_TIMEOUT)
+                if frame_data is None:
+                    continue
+                with rs_manager.leased_frame(frame_data):
+                    if last_sequence:
+                        governor.report_client_backlog(room.name, frame_data.sequence - last_sequence - 1)
+                    last_sequence = frame_data.sequence
+
+                    # 과부하 시 우선순위가 낮은 룸은 일시 중지하고, 장면이 정지해 있으면 heartbeat 간격으로만 보냅니다.
+                    if governor.should_pause(room.subscription):
+                        continue
+                    if not motion_gate.should_send(frame_data, last_sent_at):
+                        continue
+                    # 모든 멤버의 송신 큐가 밀려 있으면 인코딩하지 않고 건너뜁니다.
+                    slow = self._slow_members(room)
+                    if len(slow) == len(room.members):
+                        continue
+                    try:
+                        payload = await self.build_payload(frame_data, room.subscription)
+                        if not payload:
+                            continue
+                        await self.sio.emit(self.event, payload, to=room.name, skip_sid=slow or None)
+                    except Exception as e:
+                        logger.error(f"Error in broadcast loop for {room.name}: {e}", exc_info=True)
+                        await self.sio.emit('error', {'message': f"Server streaming error: {e}"}, to=room.name)
+                        continue
+                    last_sent_at = time.monotonic()
+                    room.frames_sent += 1
+        except asyncio.CancelledError:
+            pass
+
+    # --- 상태 ---
+    def _export_metrics(self):
+        metrics = MetricsRegistry()
+        metrics.set_gauge('rsunity_broadcast_rooms', len(self._rooms), help='Active Socket.IO broadcast rooms')
+        metrics.set_gauge('rsunity_broadcast_clients', len(self._membership),
+                          help='Socket.IO clients receiving room broadcasts')
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            room.name: {
+                "members": len(room.members),
+                "slow": len(room.skipped),
+                "frames_sent": room.frames_sent,
+            }
+            for room in self._rooms.values()
+        }
@@ -0,0 +1,12 @@
+"""
+RSUnity Python 클라이언트
+서버 스트림(/ws 또는 Socket.IO)을 받아 디코딩된 NumPy 배열로 제공하는 비동기 클라이언트입니다.
+저장소 루트에서 실행하세요. (binary_protocol 등 서버 모듈을 함께 사용)
+
+    python -m rsunity_client --url http://127.0.0.1:8080 --streams color,depth:png16
+"""
+
+from .client import RSUnityClient, Frame
+from .decoding import FrameDecoder, decode_payload
+
+__all__ = ['RSUnityClient', 'Frame', 'FrameDecoder', 'decode_payload']
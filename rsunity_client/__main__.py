@@ -0,0 +1,68 @@
+"""
+스트림 수신 확인 도구
+프레임을 받아 디코딩하고 주기적으로 수신/전달 fps, 버린 프레임 수, 디코딩 시간, 지연을 출력합니다.
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import time
+from .client import RSUnityClient, TRANSPORTS, SERIALIZERS
+
+
+async def run(args: argparse.Namespace):
+    client = RSUnityClient(args.url, args.streams, transport=args.transport, priority=args.priority,
+                           serializer=args.serializer, decode_workers=args.workers,
+                           socketio_path=args.socketio_path)
+    started = last_report = time.monotonic()
+    delivered = 0
+    dropped = 0
+    latencies = []
+    async with client:
+        async for frame in client.frames():
+            delivered += 1
+            dropped += frame.dropped
+            if frame.latency is not None:
+                latencies.append(frame.latency)
+            if args.consume_ms > 0:
+                # 느린 소비자 흉내 (최신 프레임만 전달되는지 확인용)
+                await asyncio.sleep(args.consume_ms / 1000.0)
+
+            now = time.monotonic()
+            if now - last_report >= args.interval:
+                shapes = {stream: getattr(image, 'shape', type(image).__name__)
+                          for stream, image in frame.images.items()}
+                latency = f"{sum(latencies) / len(latencies) * 1000:.1f}ms" if latencies else "-"
+                print(f"#{frame.sequence} {delivered / (now - last_report):.1f}fps 버림 {dropped} "
+                      f"지연 {latency} {shapes}")
+                last_report, delivered, dropped, latencies = now, 0, 0, []
+            if args.duration and now - started >= args.duration:
+                break
+    print(json.dumps(client.get_stats(), indent=2))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="RSUnity 스트림 수신 확인")
+    parser.add_argument('--url', default='http://127.0.0.1:8080')
+    parser.add_argument('--streams', default='color,depth')
+    parser.add_argument('--transport', choices=TRANSPORTS, default='ws')
+    parser.add_argument('--serializer', choices=SERIALIZERS, default='json', help='Socket.IO 직렬화 방식')
+    parser.add_argument('--socketio-path', default=None,
+                        help='Socket.IO 경로 (기본: json은 socket.io, msgpack은 socket.io-msgpack)')
+    parser.add_argument('--priority', choices=['low', 'normal', 'high'], default='normal')
+    parser.add_argument('--workers', type=int, default=2, help='디코딩 스레드 수')
+    parser.add_argument('--consume-ms', type=float, default=0, help='프레임마다 소비에 걸리는 시간 흉내 (ms)')
+    parser.add_argument('--interval', type=float, default=1.0, help='출력 주기 (초)')
+    parser.add_argument('--duration', type=float, default=0, help='실행 시간 (초, 0이면 무제한)')
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    try:
+        asyncio.run(run(args))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == '__main__':
+    main()
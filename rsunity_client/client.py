@@ -0,0 +1,388 @@
+"""
+RSUnity 비동기 클라이언트
+Unity 없이 Python(로봇, 기록, 분석 스크립트 등)에서 서버 스트림을 받아 NumPy 배열로 사용합니다.
+
+    async with RSUnityClient('http://127.0.0.1:8080', streams='color,depth:png16') as client:
+        async for frame in client.frames():
+            color = frame.images['color']   # (H, W, 3) uint8 BGR
+            depth = frame.images['depth']   # (H, W) uint16
+            ...
+
+    - 수신, 디코딩, 소비가 서로 다른 단계로 분리되어 있어 소비 코드가 느려도 수신이 밀리지 않습니다.
+      각 단계 사이에는 최신 프레임 하나만 보관하며, 따라잡지 못한 프레임은 버리고 Frame.dropped로 알립니다.
+    - 디코딩은 스레드 풀(FrameDecoder)에서 스트림별로 병렬 실행되어 이벤트 루프를 막지 않습니다.
+    - frame.images의 배열은 재사용 버퍼이거나 수신 바이트 위의 읽기 전용 뷰입니다.
+      다음 프레임을 요청하면 버퍼가 재사용되므로 보관하려면 .copy()하세요.
+
+transport:
+    'ws'       : (기본) 바이너리 WebSocket(/ws). 가장 가볍지만 imu와 metadata:json은 전달되지 않습니다.
+    'socketio' : Socket.IO frame_data 이벤트. imu/metadata:json을 포함합니다. (python-socketio 필요)
+                 serializer='msgpack'이면 서버의 MessagePack 경로(server.msgpack_path)로 접속합니다. (msgpack 패키지 필요)
+"""
+
+import asyncio
+import logging
+import time
+from dataclasses import dataclass, field
+from typing import Optional, Dict, Any, List, Tuple, AsyncIterator
+from urllib.parse import urlencode
+import aiohttp
+import numpy as np
+from binary_protocol import unpack_header
+from .decoding import FrameDecoder
+
+logger = logging.getLogger(__name__)
+
+TRANSPORTS = ('ws', 'socketio')
+SERIALIZERS = ('json', 'msgpack')
+# 직렬화 방식별 서버의 Socket.IO 경로 (서버 설정 server.msgpack_path의 기본값)
+SOCKETIO_PATHS = {'json': 'socket.io', 'msgpack': 'socket.io-msgpack'}
+
+# 인코딩 없이 JSON으로만 전달되는 스트림 (/ws로는 전달되지 않음)
+JSON_STREAMS = {'imu': 'json', 'metadata': 'json'}
+
+# Socket.IO frame_data 페이로드 키 -> 스트림 (socketio_server.PAYLOAD_KEYS의 역방향)
+PAYLOAD_STREAMS = {
+    'color_image': 'color',
+    'depth_image': 'depth',
+    'point_cloud': 'pointcloud',
+    'metadata': 'metadata',
+    'depth_grid': 'depthgrid',
+    'mesh': 'mesh',
+}
+
+# 메시지 수신 타임아웃 (초). 종료 요청을 주기적으로 확인하기 위함
+RECEIVE_TIMEOUT = 1.0
+
+# 수신한 인코딩 프레임: {스트림: (코덱, 페이로드, 너비, 높이)}
+Payloads = Dict[str, Tuple[str, Any, int, int]]
+
+
+@dataclass
+class Frame:
+    """디코딩된 프레임 하나"""
+    sequence: int
+    capture_timestamp: Optional[float]  # 서버 캡처 시각 (time.time 기준, 알 수 없으면 None)
+    received_at: float
+    decoded_at: float
+    images: Dict[str, Any]  # 스트림 -> 디코딩 결과 (decoding.DECODERS 참고)
+    codecs: Dict[str, str]
+    metadata: Optional[Dict[str, Any]] = None
+    imu: Optional[Dict[str, Any]] = None
+    dropped: int = 0  # 이전 프레임 이후 버려진 프레임 수
+    _buffers: List[np.ndarray] = field(default_factory=list, repr=False)
+
+    @property
+    def latency(self) -> Optional[float]:
+        """캡처부터 디코딩 완료까지 걸린 시간 (초, 호스트 간 시계가 맞아야 정확)"""
+        if self.capture_timestamp is None:
+            return None
+        return self.decoded_at - self.capture_timestamp
+
+
+@dataclass
+class _Received:
+    sequence: int
+    capture_timestamp: Optional[float]
+    received_at: float
+    payloads: Payloads
+    metadata: Optional[Dict[str, Any]] = None
+    imu: Optional[Dict[str, Any]] = None
+
+
+def parse_streams(streams: str) -> Dict[str, str]:
+    """'color,depth:png16' 형식을 {스트림: 포맷}으로 해석합니다. (포맷 검증은 서버가 수행)"""
+    parsed: Dict[str, str] = {}
+    for item in streams.split(','):
+        item = item.strip()
+        if not item:
+            continue
+        stream, _, fmt = item.partition(':')
+        parsed[stream] = fmt
+    if not parsed:
+        raise ValueError("At least one stream is required.")
+    return parsed
+
+
+class RSUnityClient:
+    """서버 스트림을 받아 디코딩된 최신 프레임을 제공하는 비동기 클라이언트"""
+
+    def __init__(self, url: str = 'http://127.0.0.1:8080', streams: str = 'color,depth',
+                 transport: str = 'ws', priority: str = 'normal', serializer: str = 'json',
+                 decode_workers: int = 2, socketio_path: Optional[str] = None):
+        if transport not in TRANSPORTS:
+            raise ValueError(f"Unknown transport '{transport}' (supported: {', '.join(TRANSPORTS)})")
+        if serializer not in SERIALIZERS:
+            raise ValueError(f"Unknown serializer '{serializer}' (supported: {', '.join(SERIALIZERS)})")
+        self.url = url.rstrip('/')
+        self.streams = parse_streams(streams)
+        self.transport = transport
+        self.priority = priority
+        self.serializer = serializer
+        self.socketio_path = socketio_path or SOCKETIO_PATHS[serializer]
+        self.decoder = FrameDecoder(decode_workers)
+
+        if transport == 'ws':
+            skipped = [stream for stream, fmt in self.streams.items()
+                       if stream in JSON_STREAMS and fmt in ('', JSON_STREAMS[stream])]
+            if skipped:
+                logger.warning(f"/ws로는 {', '.join(skipped)} 스트림이 전달되지 않습니다. (transport='socketio' 사용)")
+
+        # 단계 사이의 최신 프레임 슬롯
+        self._received: Optional[_Received] = None
+        self._received_event = asyncio.Event()
+        self._decoded: Optional[Frame] = None
+        self._decoded_event = asyncio.Event()
+        self._closed = False
+        self._error: Optional[BaseException] = None
+        self._tasks: List[asyncio.Task] = []
+        self._schema: Dict[str, List[str]] = {}
+        self._local_sequence = 0
+
+        # 통계
+        self.received = 0
+        self.decoded = 0
+        self.delivered = 0
+        self.dropped_before_decode = 0
+        self.dropped_after_decode = 0
+        self._pending_dropped = 0
+        self._decode_seconds = 0.0
+
+    async def __aenter__(self) -> 'RSUnityClient':
+        await self.start()
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.close()
+
+    async def start(self):
+        """수신/디코딩 태스크를 시작합니다."""
+        if self._tasks:
+            return
+        receiver = self._run_ws() if self.transport == 'ws' else self._run_socketio()
+        self._tasks = [
+            asyncio.create_task(self._guard(receiver)),
+            asyncio.create_task(self._decode_loop()),
+        ]
+
+    async def close(self):
+        self._closed = True
+        self._received_event.set()
+        self._decoded_event.set()
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        self.decoder.close()
+
+    async def _guard(self, receiver):
+        """수신 태스크가 끝나면(연결 종료, 오류) 프레임 대기를 모두 깨웁니다."""
+        try:
+            await receiver
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.error(f"수신 오류: {e}")
+            self._error = e
+        finally:
+            self._closed = True
+            self._received_event.set()
+            self._decoded_event.set()
+
+    # --- 수신 ---
+
+    def _on_received(self, received: _Received):
+        if self._received is not None:
+            self.dropped_before_decode += 1
+            self._pending_dropped += 1
+        self._received = received
+        self.received += 1
+        self._received_event.set()
+
+    def _ws_url(self) -> str:
+        base = self.url.replace('http://', 'ws://', 1).replace('https://', 'wss://', 1)
+        streams = ','.join(f"{stream}:{fmt}" if fmt else stream for stream, fmt in self.streams.items())
+        return f"{base}/ws?{urlencode({'streams': streams, 'priority': self.priority})}"
+
+    async def _run_ws(self):
+        # 같은 순번의 메시지(스트림별 1개)를 모아 한 프레임으로 넘깁니다. (relay.RelaySource와 같은 방식)
+        expected = sum(1 for stream, fmt in self.streams.items()
+                       if not (stream in JSON_STREAMS and fmt in ('', JSON_STREAMS[stream])))
+        pending: Optional[_Received] = None
+        async with aiohttp.ClientSession() as session:
+            async with session.ws_connect(self._ws_url(), heartbeat=10.0, max_msg_size=0) as ws:
+                logger.info(f"연결되었습니다: {self._ws_url()}")
+                while not self._closed:
+                    try:
+                        msg = await ws.receive(timeout=RECEIVE_TIMEOUT)
+                    except asyncio.TimeoutError:
+                        continue
+                    if msg.type in (aiohttp.WSMsgType.CLOSE, aiohttp.WSMsgType.CLOSED, aiohttp.WSMsgType.ERROR):
+                        raise ConnectionError(f"server closed ({ws.close_code})")
+                    if msg.type == aiohttp.WSMsgType.TEXT:
+                        logger.warning(f"서버 메시지: {msg.data}")
+                        continue
+                    if msg.type != aiohttp.WSMsgType.BINARY:
+                        continue
+
+                    header, payload = unpack_header(msg.data)
+                    if pending is not None and header['sequence'] != pending.sequence:
+                        self._on_received(pending)
+                        pending = None
+                    if pending is None:
+                        pending = _Received(header['sequence'], header['capture_timestamp'], time.time(), {})
+                    pending.payloads[header['stream']] = (header['codec'], payload, header['width'], header['height'])
+                    if len(pending.payloads) >= expected:
+                        self._on_received(pending)
+                        pending = None
+
+    def _field_dict(self, name: str, entry):
+        """msgpack 모드의 평탄화 배열을 schema 이벤트의 필드 순서로 dict로 되돌립니다."""
+        if isinstance(entry, list) and name in self._schema:
+            return dict(zip(self._schema[name], entry))
+        return entry
+
+    def _on_frame_data(self, data: Dict[str, Any]):
+        received_at = time.time()
+        # metadata:json은 dict(또는 평탄화 배열)로, 나머지(metadata:header 포함)는 인코딩 페이로드로 옵니다.
+        json_metadata = self.streams.get('metadata') in ('', 'json')
+        payloads: Payloads = {}
+        for key, entry in data.items():
+            stream = PAYLOAD_STREAMS.get(key)
+            if stream is None or entry is None or stream == 'metadata' and json_metadata:
+                continue
+            entry = self._field_dict('frame', entry)
+            if entry['data'] is not None:
+                # JSON 직렬화 서버의 base64 문자열은 작업자 스레드에서 풉니다. (FrameDecoder)
+                payloads[stream] = (entry['format'], entry['data'], entry['width'], entry['height'])
+
+        metadata = self._field_dict('metadata', data.get('metadata')) if json_metadata else None
+        imu = self._field_dict('imu', data.get('imu'))
+
+        self._local_sequence += 1
+        sequence = metadata.get('sequence', self._local_sequence) if metadata else self._local_sequence
+        capture_timestamp = metadata.get('timestamp') if metadata else None
+        self._on_received(_Received(sequence, capture_timestamp, received_at, payloads, metadata, imu))
+
+    async def _run_socketio(self):
+        import socketio
+
+        sio = socketio.AsyncClient(serializer='msgpack' if self.serializer == 'msgpack' else 'default')
+        request = {
+            'streams': [f"{stream}:{fmt}" if fmt else stream for stream, fmt in self.streams.items()],
+            'priority': self.priority,
+        }
+
+        @sio.event
+        async def connect():
+            # 재연결 시에도 구독을 다시 요청합니다.
+            await sio.emit('start_streaming', request)
+
+        @sio.on('schema')
+        async def on_schema(schema):
+            self._schema = schema
+
+        @sio.on('status')
+        async def on_status(status):
+            logger.info(f"서버 상태: {self._field_dict('status', status)}")
+
+        @sio.on('error')
+        async def on_error(error):
+            logger.warning(f"서버 오류: {error}")
+
+        @sio.on('frame_data')
+        async def on_frame_data(data):
+            self._on_frame_data(data)
+
+        await sio.connect(self.url, transports=['websocket'], socketio_path=self.socketio_path)
+        logger.info(f"연결되었습니다: {self.url} (Socket.IO, {self.serializer})")
+        try:
+            while not self._closed and sio.connected:
+                await asyncio.sleep(RECEIVE_TIMEOUT)
+        finally:
+            await sio.disconnect()
+
+    # --- 디코딩 ---
+
+    async def _decode_loop(self):
+        while True:
+            await self._received_event.wait()
+            self._received_event.clear()
+            received, self._received = self._received, None
+            if received is None:
+                if self._closed:
+                    return
+                continue
+
+            started = time.perf_counter()
+            images, buffers = await self.decoder.decode_frame(received.payloads)
+            self._decode_seconds += time.perf_counter() - started
+            self.decoded += 1
+
+            frame = Frame(
+                sequence=received.sequence,
+                capture_timestamp=received.capture_timestamp,
+                received_at=received.received_at,
+                decoded_at=time.time(),
+                images=images,
+                codecs={stream: value[0] for stream, value in received.payloads.items()},
+                metadata=received.metadata,
+                imu=received.imu,
+                _buffers=buffers,
+            )
+            if self._decoded is not None:
+                # 소비되지 않은 프레임은 버리고 버퍼를 바로 돌려받습니다.
+                self.decoder.release(self._decoded._buffers)
+                self.dropped_after_decode += 1
+                self._pending_dropped += 1
+            self._decoded = frame
+            self._decoded_event.set()
+
+    # --- 소비 ---
+
+    async def next_frame(self) -> Optional[Frame]:
+        """가장 최근에 디코딩된 프레임을 기다려 반환합니다. 연결이 끝나면 None (수신 오류는 다시 발생)"""
+        while self._decoded is None:
+            if self._closed:
+                if self._error is not None:
+                    raise self._error
+                return None
+            self._decoded_event.clear()
+            await self._decoded_event.wait()
+        frame, self._decoded = self._decoded, None
+        frame.dropped = self._pending_dropped
+        self._pending_dropped = 0
+        self.delivered += 1
+        return frame
+
+    def release(self, frame: Frame):
+        """프레임의 재사용 버퍼를 돌려줍니다. (frames()는 다음 프레임을 요청할 때 자동 호출)"""
+        self.decoder.release(frame._buffers)
+        frame._buffers = []
+
+    async def frames(self) -> AsyncIterator[Frame]:
+        """최신 프레임만 전달하는 비동기 반복자. 이전 프레임의 버퍼는 다음 프레임 요청 시 재사용됩니다."""
+        frame = None
+        try:
+            while True:
+                if frame is not None:
+                    self.release(frame)
+                frame = await self.next_frame()
+                if frame is None:
+                    return
+                yield frame
+        finally:
+            if frame is not None:
+                self.release(frame)
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "received": self.received,
+            "decoded": self.decoded,
+            "delivered": self.delivered,
+            "dropped_before_decode": self.dropped_before_decode,
+            "dropped_after_decode": self.dropped_after_decode,
+            "avg_decode_ms": self._decode_seconds / self.decoded * 1000.0 if self.decoded else 0.0,
+            "buffers_allocated": self.decoder.pool.allocated,
+            "buffers_reused": self.decoder.pool.reused,
+        }
@@ -0,0 +1,245 @@
+"""
+페이로드 디코딩
+서버가 보내는 코덱(binary_protocol.CODEC_IDS)별로 인코딩 바이트를 NumPy 배열로 되돌립니다.
+
+    - npy, f16, xyz32f, xyzrgba, mesh: 수신 바이트 위의 읽기 전용 뷰로 복사 없이 해석합니다.
+    - raw: 수신 바이트를 재사용 버퍼(DecodeBufferPool)로 바로 복사합니다.
+    - jpeg: PyTurboJPEG가 있으면 재사용 버퍼에 바로 디코딩하고, 없으면 OpenCV로 디코딩하여 재사용 버퍼로 옮깁니다.
+    - png, png16, webp: OpenCV로 디코딩하여 재사용 버퍼로 옮깁니다. (png16은 uint16 뎁스 원본)
+    - qdepth: 양자화 코드를 근사 미터 값(float32)으로 복원합니다.
+    - rsfm: 프레임 메타데이터 헤더를 dict로 해석합니다.
+    - h264, vp8: 프레임 간 압축이므로 디코딩하지 않고 바이트 그대로 돌려줍니다.
+
+디코딩은 이벤트 루프가 아닌 작업자 스레드(FrameDecoder.decode_frame)에서 실행되며,
+OpenCV/libjpeg-turbo는 디코딩 중 GIL을 놓으므로 스트림별로 병렬 디코딩됩니다.
+"""
+
+import asyncio
+import base64
+import io
+import logging
+import threading
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional, Dict, Any, Tuple, List, Callable
+import numpy as np
+from binary_protocol import (
+    POINT_XYZRGBA, QDEPTH_HEADER, MESH_HEADER, QUANT_MODES, unpack_codes, dequantize_depth, unpack_frame_header
+)
+
+logger = logging.getLogger(__name__)
+
+# 디코딩 결과: (값, 재사용 버퍼 여부)
+Decoded = Tuple[Any, bool]
+
+
+class DecodeBufferPool:
+    """(shape, dtype)별 디코딩 출력 버퍼 풀
+
+    서버의 buffer_pool.BufferPool(싱글톤, 지표 수집)과 달리 클라이언트 인스턴스마다 하나씩 만들며,
+    Frame이 소비된 뒤 release로 돌려받은 버퍼를 다음 디코딩에 재사용합니다.
+    """
+
+    def __init__(self, max_free: int = 4):
+        self.max_free = max_free
+        self._free: Dict[Tuple[Tuple[int, ...], str], List[np.ndarray]] = defaultdict(list)
+        self._lock = threading.Lock()
+        self.allocated = 0
+        self.reused = 0
+
+    def acquire(self, shape: Tuple[int, ...], dtype) -> np.ndarray:
+        key = (tuple(shape), np.dtype(dtype).str)
+        with self._lock:
+            free = self._free[key]
+            if free:
+                self.reused += 1
+                return free.pop()
+            self.allocated += 1
+        return np.empty(shape, dtype=dtype)
+
+    def release(self, array: np.ndarray):
+        key = (array.shape, array.dtype.str)
+        with self._lock:
+            free = self._free[key]
+            if len(free) < self.max_free:
+                free.append(array)
+
+
+_turbojpeg = None
+_turbojpeg_checked = False
+
+
+def _get_turbojpeg():
+    """PyTurboJPEG 디코더 (설치되지 않았으면 None)"""
+    global _turbojpeg, _turbojpeg_checked
+    if not _turbojpeg_checked:
+        _turbojpeg_checked = True
+        try:
+            from turbojpeg import TurboJPEG
+            _turbojpeg = TurboJPEG()
+        except (ImportError, OSError, RuntimeError) as e:
+            logger.info(f"PyTurboJPEG를 사용할 수 없어 OpenCV로 JPEG를 디코딩합니다. ({e})")
+    return _turbojpeg
+
+
+def _to_pool(array: np.ndarray, pool: Optional[DecodeBufferPool]) -> Decoded:
+    """디코딩 결과를 풀 버퍼로 복사합니다. (풀이 없으면 그대로 반환)"""
+    if pool is None:
+        return array, False
+    buffer = pool.acquire(array.shape, array.dtype)
+    np.copyto(buffer, array)
+    return buffer, True
+
+
+def _imdecode(payload, flags: int) -> np.ndarray:
+    import cv2
+    image = cv2.imdecode(np.frombuffer(payload, dtype=np.uint8), flags)
+    if image is None:
+        raise ValueError("Image decoding failed")
+    return image
+
+
+def decode_jpeg(payload, width: int, height: int, pool: Optional[DecodeBufferPool]) -> Decoded:
+    jpeg = _get_turbojpeg()
+    if jpeg is not None and pool is not None:
+        # 서버 JPEG는 BGR(컬러, 컬러맵 뎁스) 또는 그레이(그레이스케일 뎁스)이며 모두 BGR 3채널로 디코딩합니다.
+        buffer = pool.acquire((height, width, 3), np.uint8)
+        try:
+            return jpeg.decode(payload, dst=buffer), True
+        except (TypeError, ValueError):
+            # dst 인자가 없는 이전 PyTurboJPEG, 또는 헤더의 크기와 실제 JPEG 크기가 다른 경우
+            pool.release(buffer)
+            return _to_pool(jpeg.decode(payload), pool)
+        except Exception:
+            pool.release(buffer)
+            raise
+    import cv2
+    return _to_pool(_imdecode(payload, cv2.IMREAD_COLOR), pool)
+
+
+def decode_image(payload, width: int, height: int, pool: Optional[DecodeBufferPool]) -> Decoded:
+    import cv2
+    return _to_pool(_imdecode(payload, cv2.IMREAD_UNCHANGED), pool)
+
+
+def decode_raw(payload, width: int, height: int, pool: Optional[DecodeBufferPool]) -> Decoded:
+    image = np.frombuffer(payload, dtype=np.uint8)
+    channels = image.size // max(1, width * height)
+    return _to_pool(image.reshape((height, width) if channels == 1 else (height, width, channels)), pool)
+
+
+def decode_npy(payload, width: int, height: int, pool: Optional[DecodeBufferPool]) -> Decoded:
+    stream = io.BytesIO(payload)
+    version = np.lib.format.read_magic(stream)
+    shape, fortran_order, dtype = np.lib.format._read_array_header(stream, version)
+    array = np.frombuffer(payload, dtype=dtype, count=int(np.prod(shape)), offset=stream.tell())
+    return array.reshape(shape, order='F' if fortran_order else 'C'), False
+
+
+def decode_f16(payload, width: int, height: int, pool: Optional[DecodeBufferPool]) -> Decoded:
+    return np.frombuffer(payload, dtype='<f2').reshape(height, width), False
+
+
+def decode_xyz32f(payload, width: int, height: int, pool: Optional[DecodeBufferPool]) -> Decoded:
+    return np.frombuffer(payload, dtype='<f4').reshape(-1, 3), False
+
+
+def decode_xyzrgba(payload, width: int, height: int, pool: Optional[DecodeBufferPool]) -> Decoded:
+    return np.frombuffer(payload, dtype=POINT_XYZRGBA), False
+
+
+def decode_mesh(payload, width: int, height: int, pool: Optional[DecodeBufferPool]) -> Decoded:
+    vertex_count, triangle_count, index_size = MESH_HEADER.unpack_from(payload)
+    offset = MESH_HEADER.size
+    vertices = np.frombuffer(payload, dtype='<f4', count=vertex_count * 3, offset=offset).reshape(-1, 3)
+    offset += vertices.nbytes
+    index_dtype = '<u2' if index_size == 2 else '<u4'
+    indices = np.frombuffer(payload, dtype=index_dtype, count=triangle_count * 3, offset=offset).reshape(-1, 3)
+    return {'vertices': vertices, 'indices': indices}, False
+
+
+def decode_qdepth(payload, width: int, height: int, pool: Optional[DecodeBufferPool]) -> Decoded:
+    bits, mode, near, far = QDEPTH_HEADER.unpack_from(payload)
+    codes = unpack_codes(memoryview(payload)[QDEPTH_HEADER.size:], bits, width * height)
+    return dequantize_depth(codes.reshape(height, width), bits, QUANT_MODES[mode], near, far), False
+
+
+def decode_rsfm(payload, width: int, height: int, pool: Optional[DecodeBufferPool]) -> Decoded:
+    return unpack_frame_header(bytes(payload)), False
+
+
+def decode_passthrough(payload, width: int, height: int, pool: Optional[DecodeBufferPool]) -> Decoded:
+    return bytes(payload), False
+
+
+DECODERS: Dict[str, Callable[..., Decoded]] = {
+    'jpeg': decode_jpeg,
+    'png': decode_image,
+    'png16': decode_image,
+    'webp': decode_image,
+    'raw': decode_raw,
+    'npy': decode_npy,
+    'f16': decode_f16,
+    'xyz32f': decode_xyz32f,
+    'xyzrgba': decode_xyzrgba,
+    'mesh': decode_mesh,
+    'qdepth': decode_qdepth,
+    'rsfm': decode_rsfm,
+    'h264': decode_passthrough,
+    'vp8': decode_passthrough,
+}
+
+
+def decode_payload(codec: str, payload, width: int, height: int, pool: Optional[DecodeBufferPool] = None) -> Decoded:
+    """코덱에 맞는 디코더로 페이로드를 해석합니다. (알 수 없는 코덱은 ValueError)"""
+    decoder = DECODERS.get(codec)
+    if decoder is None:
+        raise ValueError(f"Unsupported codec '{codec}'")
+    return decoder(payload, width, height, pool)
+
+
+class FrameDecoder:
+    """스트림별 페이로드를 작업자 스레드 풀에서 병렬 디코딩합니다."""
+
+    def __init__(self, workers: int = 2, max_free_buffers: int = 4):
+        if workers < 1:
+            raise ValueError("workers must be >= 1")
+        self.pool = DecodeBufferPool(max_free_buffers)
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='rsunity-decode')
+
+    def _decode_one(self, codec: str, payload, width: int, height: int) -> Decoded:
+        if isinstance(payload, str):
+            # JSON 직렬화 Socket.IO 서버는 바이트를 base64 문자열로 보냅니다.
+            payload = base64.b64decode(payload)
+        return decode_payload(codec, payload, width, height, self.pool)
+
+    async def decode_frame(self, payloads: Dict[str, Tuple[str, Any, int, int]]
+                           ) -> Tuple[Dict[str, Any], List[np.ndarray]]:
+        """{스트림: (코덱, 페이로드, 너비, 높이)}를 디코딩하여 ({스트림: 값}, 풀 버퍼 목록)을 반환합니다.
+
+        디코딩에 실패한 스트림은 경고를 남기고 결과에서 제외합니다.
+        """
+        loop = asyncio.get_running_loop()
+        streams = list(payloads)
+        results = await asyncio.gather(
+            *(loop.run_in_executor(self._executor, self._decode_one, *payloads[stream]) for stream in streams),
+            return_exceptions=True)
+
+        values: Dict[str, Any] = {}
+        pooled: List[np.ndarray] = []
+        for stream, result in zip(streams, results):
+            if isinstance(result, BaseException):
+                logger.warning(f"{stream} 디코딩 실패 ({payloads[stream][0]}): {result}")
+                continue
+            value, from_pool = result
+            values[stream] = value
+            if from_pool:
+                pooled.append(value)
+        return values, pooled
+
+    def release(self, buffers: List[np.ndarray]):
+        for buffer in buffers:
+            self.pool.release(buffer)
+
+    def close(self):
+        self._executor.shutdown(wait=False)
@@ -0,0 +1,152 @@
+"""
+샘플링 프로파일러
+운영 중인 서버에 디버거를 붙이지 않고 N초 동안 이벤트 루프와 작업자(executor, librealsense 콜백 등)
+스레드의 스택을 주기적으로 샘플링하여 flamegraph 호환 collapsed 스택으로 돌려줍니다.
+
+    - 별도 스레드가 interval_ms마다 sys._current_frames()를 읽기만 하므로 측정 대상 코드에 훅을 걸지 않아
+      부하가 걸린 상태에서도 오버헤드가 작습니다. (샘플링에 쓴 시간 비율은 overhead_ratio로 보고)
+    - trace_allocations를 켜면 같은 구간 동안 tracemalloc으로 메모리 할당을 추적하여 상위 할당 위치를 함께 돌려줍니다.
+      (tracemalloc은 할당마다 비용이 들므로 필요할 때만 사용)
+
+collapsed 형식: 한 줄에 '스레드;바깥 함수;...;안쪽 함수 샘플수' (flamegraph.pl, speedscope, inferno 등에서 사용)
+"""
+
+import asyncio
+import logging
+import os
+import sys
+import threading
+import time
+import tracemalloc
+from collections import Counter
+from typing import Dict, Any, List, Optional
+
+logger = logging.getLogger(__name__)
+
+MAX_SECONDS = 120.0
+MIN_INTERVAL_MS = 1.0
+
+# 대기 중인 스레드의 가장 안쪽 Python 프레임 (파일 이름, 함수 이름). include_idle이 아니면 제외합니다.
+IDLE_LEAVES = {
+    ('threading.py', 'wait'),
+    ('queue.py', 'get'),
+    ('thread.py', '_worker'),  # concurrent.futures 작업자가 작업 큐를 기다리는 중
+    ('selectors.py', 'select'),  # 이벤트 루프가 I/O를 기다리는 중
+}
+
+
+def _frame_label(code) -> str:
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+
+class SamplingProfiler:
+    """한 번에 하나의 프로파일링만 실행하는 싱글톤 클래스"""
+
+    _instance = None
+    _initialized = False
+
+    def __new__(cls):
+        if cls._instance is None:
+            cls._instance = super(SamplingProfiler, cls).__new__(cls)
+        return cls._instance
+
+    def __init__(self):
+        if self._initialized:
+            return
+
+        self.running = False
+        self._initialized = True
+
+    def _sample_loop(self, stop: threading.Event, interval: float, include_idle: bool,
+                     counts: Counter, stats: Dict[str, float]):
+        """(프로파일러 스레드) stop이 설정될 때까지 interval마다 모든 스레드의 스택을 기록합니다."""
+        own = threading.get_ident()
+        next_at = time.perf_counter()
+        while not stop.wait(max(0.0, next_at - time.perf_counter())):
+            started = time.perf_counter()
+            names = {thread.ident: thread.name for thread in threading.enumerate()}
+            for ident, frame in sys._current_frames().items():
+                if ident == own:
+                    continue
+                if not include_idle and (os.path.basename(frame.f_code.co_filename),
+                                         frame.f_code.co_name) in IDLE_LEAVES:
+                    continue
+                stack = []
+                while frame is not None:
+                    stack.append(_frame_label(frame.f_code))
+                    frame = frame.f_back
+                stack.append(names.get(ident, f"thread-{ident}"))
+                counts[';'.join(reversed(stack))] += 1
+            frame = None
+            stats['samples'] += 1
+            stats['busy'] += time.perf_counter() - started
+            # 샘플링이 밀리면 놓친 주기는 건너뜁니다.
+            next_at = max(next_at + interval, time.perf_counter())
+
+    @staticmethod
+    def _top_allocations(top: int) -> List[Dict[str, Any]]:
+        snapshot = tracemalloc.take_snapshot().filter_traces((
+            tracemalloc.Filter(False, tracemalloc.__file__),
+            tracemalloc.Filter(False, __file__),
+        ))
+        return [
+            {
+                "site": f"{stat.traceback[0].filename}:{stat.traceback[0].lineno}",
+                "size_kb": stat.size / 1024.0,
+                "count": stat.count,
+            }
+            for stat in snapshot.statistics('lineno')[:top]
+        ]
+
+    async def profile(self, seconds: float = 10.0, interval_ms: float = 10.0, trace_allocations: bool = False,
+                      top: int = 25, include_idle: bool = False) -> Dict[str, Any]:
+        """seconds 동안 샘플링한 결과를 반환합니다. (잘못된 인자는 ValueError, 이미 실행 중이면 RuntimeError)"""
+        if not 0 < seconds <= MAX_SECONDS:
+            raise ValueError(f"seconds must be in (0, {MAX_SECONDS:g}]")
+        if interval_ms < MIN_INTERVAL_MS:
+            raise ValueError(f"interval_ms must be >= {MIN_INTERVAL_MS:g}")
+        if top < 1:
+            raise ValueError("top must be >= 1")
+        if self.running:
+            raise RuntimeError("Profiler is already running.")
+
+        self.running = True
+        started_tracing = trace_allocations and not tracemalloc.is_tracing()
+        counts: Counter = Counter()
+        stats = {'samples': 0, 'busy': 0.0}
+        stop = threading.Event()
+        thread = threading.Thread(target=self._sample_loop, name='rsunity-profiler', daemon=True,
+                                  args=(stop, interval_ms / 1000.0, include_idle, counts, stats))
+        logger.info(f"프로파일링 시작: {seconds:g}s, {interval_ms:g}ms 간격, tracemalloc={trace_allocations}")
+        try:
+            if started_tracing:
+                tracemalloc.start()
+            wall_start = time.perf_counter()
+            thread.start()
+            await asyncio.sleep(seconds)
+            stop.set()
+            await asyncio.get_event_loop().run_in_executor(None, thread.join)
+            wall_seconds = time.perf_counter() - wall_start
+
+            allocations: Optional[List[Dict[str, Any]]] = None
+            if trace_allocations:
+                allocations = await asyncio.get_event_loop().run_in_executor(None, self._top_allocations, top)
+        finally:
+            stop.set()
+            if started_tracing:
+                tracemalloc.stop()
+            self.running = False
+
+        collapsed = '\n'.join(f"{stack} {count}" for stack, count in counts.most_common())
+        logger.info(f"프로파일링 완료: 샘플 {stats['samples']:.0f}회, 고유 스택 {len(counts)}개, "
+                    f"오버헤드 {stats['busy'] / wall_seconds * 100:.2f}%")
+        return {
+            "seconds": wall_seconds,
+            "interval_ms": interval_ms,
+            "samples": int(stats['samples']),
+            "stacks": len(counts),
+            # 샘플링 스레드가 스택을 읽는 데 쓴 시간 비율 (GIL을 잡고 있는 시간)
+            "overhead_ratio": stats['busy'] / wall_seconds if wall_seconds > 0 else 0.0,
+            "collapsed": collapsed,
+            "top_allocations": allocations,
+        }
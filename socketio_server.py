@@ -1,170 +1,326 @@
+from startup import StartupTracker, PROCESS_START  # 시작 시각 기준점이므로 가장 먼저 불러옵니다.
 import socketio
 import asyncio
-import base64
-import cv2
-import numpy as np
+import functools
+import time
 import logging
+from dataclasses import dataclass
+from typing import Optional, List
 from aiohttp import web
+from config import Config
 from realsense_manager import RealSenseManager, FrameData
+import frame_encoder
+import depth_processing
+import video_stream
+from frame_encoder import encode_variant_async, configure_encoders
+from subscriptions import Subscription, SubscriptionRegistry, parse_subscription
+from video_stream import update_video_subscriptions
+from profile_calibration import calibrate_stream_profile
+import admin_api
+import packet_schema
+import loop_monitor
+import metrics
+import ws_stream
+import http_stream
+from overload_governor import OverloadGovernor
+from room_broadcast import BroadcastScheduler
+from relay import RelaySource
 
 # --- Basic Setup ---
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
 # --- Socket.IO Server Setup ---
-sio = socketio.AsyncServer(async_mode='aiohttp', cors_allowed_origins='*')
+# JSON 직렬화 서버는 항상 기본 경로(/socket.io)에서 동작합니다. (Unity 등 MessagePack을 쓰지 않는 클라이언트)
+# server.serializer가 'msgpack'이면 MessagePack 직렬화 서버를 server.msgpack_path에 함께 엽니다. (packet_schema 참고)
+server_config = Config().get_server_config()
+serializer = packet_schema.resolve_serializer(server_config.get('serializer', 'json'))
 app = web.Application()
+sio = socketio.AsyncServer(async_mode='aiohttp', cors_allowed_origins='*')
 sio.attach(app)
+msgpack_sio = None
+if serializer == 'msgpack':
+    msgpack_sio = socketio.AsyncServer(async_mode='aiohttp', cors_allowed_origins='*', serializer='msgpack')
+    msgpack_sio.attach(app, socketio_path=server_config.get('msgpack_path', packet_schema.DEFAULT_MSGPACK_PATH))
+ws_stream.setup_routes(app)  # 바이너리 WebSocket 경로 (/ws)
+http_stream.setup_routes(app)  # MJPEG/스냅샷 경로 (/mjpeg, /snapshot)
+metrics.setup_routes(app)  # 지표 경로 (/metrics)
 
 # --- Global Variables ---
 rs_manager = RealSenseManager()
-streaming_tasks = {}  # 각 클라이언트(sid)의 스트리밍 작업을 저장
+subscriptions = SubscriptionRegistry()
+governor = OverloadGovernor()
+lag_monitor = loop_monitor.LoopLagMonitor()
+startup_tracker = StartupTracker()
+relay_source = RelaySource()
+
+# 스트림 프로파일 변경 시 영향을 받는 캐시/인코더 재생성
+rs_manager.add_reconfigure_listener(frame_encoder.on_stream_profile_changed)
+rs_manager.add_reconfigure_listener(depth_processing.on_stream_profile_changed)
+rs_manager.add_reconfigure_listener(video_stream.on_stream_profile_changed)
+
+@dataclass
+class SocketIOEndpoint:
+    """직렬화 방식별 Socket.IO 서버와 그 서버의 룸 브로드캐스트"""
+    sio: socketio.AsyncServer
+    compact: bool  # msgpack 직렬화 (packet_schema의 평탄화 배열 사용)
+    broadcaster: Optional[BroadcastScheduler] = None
+
+endpoints: List[SocketIOEndpoint] = [SocketIOEndpoint(sio, compact=False)]
+if msgpack_sio is not None:
+    endpoints.append(SocketIOEndpoint(msgpack_sio, compact=True))
+
+async def emit_status(message: str, **fields):
+    """모든 Socket.IO 클라이언트에게 각자의 직렬화 방식으로 status 이벤트를 보냅니다."""
+    for endpoint in endpoints:
+        await endpoint.sio.emit('status', packet_schema.status(message, endpoint.compact, **fields))
+
+async def notify_profile_changed(result):
+    """모든 클라이언트에게 스트림 프로파일 변경을 알립니다. (연결은 유지됨)"""
+    await emit_status('Stream profile changed.', profile=result['profile'])
+
+admin_api.setup_routes(app, notify_profile_changed)  # 관리 API 경로 (/admin)
 
 # --- Helper Functions ---
-def prepare_frame_data_for_client(frame_data: FrameData):
-    """Socket.IO로 전송할 프레임 데이터를 인코딩합니다."""
+# 구독 스트림 -> frame_data 페이로드 키
+PAYLOAD_KEYS = {
+    'color': 'color_image',
+    'depth': 'depth_image',
+    'pointcloud': 'point_cloud',
+    'metadata': 'metadata',
+    'depthgrid': 'depth_grid',
+    'mesh': 'mesh',
+}
+
+async def prepare_frame_data_for_client(frame_data: FrameData, subscription: Subscription = None,
+                                        compact: bool = False):
+    """Socket.IO로 전송할 프레임 데이터를 인코딩합니다.
+
+    구독한 스트림만 인코딩 스레드에서 인코딩하며, 인코딩 결과는 캐시를 통해 다른 클라이언트와 공유됩니다.
+    compact이면 msgpack 클라이언트용 평탄화 배열로 만듭니다.
+    """
     if not frame_data:
         logger.warning("prepare_frame_data_for_client: No frame data received.")
         return None
+    if subscription is None:
+        subscription = parse_subscription(None)
+
+    client_data = {}
+    for stream, variant in subscription.variants().items():
+        encoded = await encode_variant_async(variant, frame_data)
+        client_data[PAYLOAD_KEYS[stream]] = packet_schema.frame_entry(encoded, subscription.streams[stream], compact)
+
+    if 'imu' in subscription.streams:
+        client_data['imu'] = packet_schema.imu_entry(frame_data.imu_data, compact)
+
+    if subscription.streams.get('metadata') == 'json':
+        client_data['metadata'] = packet_schema.metadata_entry(frame_data, compact)
 
-    color_base64 = None
-    if frame_data.color_frame is not None:
-        ret, buffer = cv2.imencode('.jpg', frame_data.color_frame)
-        if ret:
-            color_base64 = base64.b64encode(buffer).decode('utf-8')
-        else:
-            logger.warning("Failed to encode color frame.")
-
-    depth_base64 = None
-    if frame_data.depth_frame is not None:
-        # Depth data is usually 16-bit, scale it for visualization
-        depth_visual = cv2.normalize(frame_data.depth_frame, None, 0, 255, cv2.NORM_MINMAX, dtype=cv2.CV_8U)
-        depth_visual_color = cv2.applyColorMap(depth_visual, cv2.COLORMAP_JET)
-        ret, buffer = cv2.imencode('.jpg', depth_visual_color)
-        if ret:
-            depth_base64 = base64.b64encode(buffer).decode('utf-8')
-        else:
-            logger.warning("Failed to encode depth frame.")
-
-    imu_payload = None
-    if frame_data.imu_data:
-        imu = frame_data.imu_data
-        imu_payload = {
-            'gyroscope': {'x': imu.gyroscope[0], 'y': imu.gyroscope[1], 'z': imu.gyroscope[2]},
-            'accelerometer': {'x': imu.accelerometer[0], 'y': imu.accelerometer[1], 'z': imu.accelerometer[2]},
-            'temperature': imu.temperature,
-        }
-
-    client_data = {
-        'color_image': {
-            'data': color_base64,
-            'width': frame_data.color_frame.shape[1] if color_base64 else 0,
-            'height': frame_data.color_frame.shape[0] if color_base64 else 0,
-            'format': 'jpeg'
-        },
-        'depth_image': {
-            'data': depth_base64,
-            'width': frame_data.depth_frame.shape[1] if depth_base64 else 0,
-            'height': frame_data.depth_frame.shape[0] if depth_base64 else 0,
-            'format': 'jpeg'
-        },
-        'imu': imu_payload
-    }
     return client_data
 
-async def stream_data_to_client(sid):
-    """클라이언트에게 지속적으로 데이터를 전송하는 백그라운드 작업"""
-    logger.info(f"Starting data stream for client {sid}")
-    while sid in streaming_tasks:
-        try:
-            latest_frame = rs_manager.get_latest_frame_data()
-            if latest_frame:
-                client_data = prepare_frame_data_for_client(latest_frame)
-                if client_data:
-                    await sio.emit('frame_data', client_data, to=sid)
-            else:
-                logger.debug(f"No new frame data for {sid}, waiting.")
-            
-            await asyncio.sleep(1.0 / 20.0)  # ~20 FPS
-        except asyncio.CancelledError:
-            logger.info(f"Streaming task for {sid} was cancelled.")
-            break
-        except Exception as e:
-            logger.error(f"Error in streaming loop for {sid}: {e}", exc_info=True)
-            await sio.emit('error', {'message': f"Server streaming error: {e}"}, to=sid)
-            break
-    logger.info(f"Data stream stopped for client {sid}")
+def _apply_video_subscription(endpoint: SocketIOEndpoint, sid, subscription: Subscription):
+    """비디오 코덱 구독을 갱신합니다. 패킷은 'video_packet' 이벤트로 바이너리 전송됩니다."""
+    async def send(packet):
+        await endpoint.sio.emit('video_packet', packet.to_payload(), to=sid)
+    update_video_subscriptions(sid, subscription.video_variants(), send)
+
+# 같은 구독끼리 하나의 룸으로 묶어, 룸마다 새 프레임당 한 번만 페이로드를 만들어 전송 (룸은 서버별)
+for _endpoint in endpoints:
+    _endpoint.broadcaster = BroadcastScheduler(
+        _endpoint.sio, functools.partial(prepare_frame_data_for_client, compact=_endpoint.compact))
 
 # --- Socket.IO Events ---
-@sio.event
-async def connect(sid, environ):
+async def connect(endpoint: SocketIOEndpoint, sid, environ):
     logger.info(f"Client connected: {sid}")
-    await sio.emit('status', {'message': 'Connected to RealSense Server.'}, to=sid)
+    if endpoint.compact:
+        await endpoint.sio.emit('schema', packet_schema.schema(), to=sid)
+    await endpoint.sio.emit('status', packet_schema.status('Connected to RealSense Server.', endpoint.compact,
+                                                           state=startup_tracker.state), to=sid)
 
-@sio.event
-async def disconnect(sid):
+async def disconnect(endpoint: SocketIOEndpoint, sid):
     logger.info(f"Client disconnected: {sid}")
-    if sid in streaming_tasks:
-        streaming_tasks[sid].cancel()
-        del streaming_tasks[sid]
-        
-        if not streaming_tasks: # Stop hardware if no clients are streaming
-            logger.info("No active clients. Stopping RealSense streaming.")
-            await rs_manager.stop_streaming()
-
-@sio.event
-async def start_streaming(sid, data):
+    if endpoint.broadcaster.is_streaming(sid):
+        await endpoint.broadcaster.leave(sid)
+        subscriptions.unsubscribe(sid)
+        update_video_subscriptions(sid, set(), None)
+        # Stops processing if no clients (Socket.IO or binary WebSocket) remain
+        await rs_manager.remove_consumer(sid)
+
+async def start_streaming(endpoint: SocketIOEndpoint, sid, data):
     logger.info(f"Received 'start_streaming' request from {sid}")
-    if sid in streaming_tasks:
-        logger.warning(f"Client {sid} already has a streaming task. Ignoring request.")
+    if endpoint.broadcaster.is_streaming(sid):
+        logger.warning(f"Client {sid} is already streaming. Ignoring request.")
         return
 
-    if not rs_manager.is_running:
-        logger.info("RealSense manager is not running. Starting it now.")
-        await rs_manager.start_streaming()
+    try:
+        subscription = parse_subscription(data)
+        relay_source.check_subscription(subscription)
+    except ValueError as e:
+        await endpoint.sio.emit('error', {'message': str(e)}, to=sid)
+        return
+
+    try:
+        _apply_video_subscription(endpoint, sid, subscription)
+    except ValueError as e:
+        await endpoint.sio.emit('error', {'message': str(e)}, to=sid)
+        return
 
-    task = asyncio.create_task(stream_data_to_client(sid))
-    streaming_tasks[sid] = task
-    await sio.emit('status', {'message': 'Streaming started.'}, to=sid)
+    subscriptions.subscribe(sid, subscription)
+    await rs_manager.add_consumer(sid, subscription.hardware_streams())
+    await endpoint.broadcaster.join(sid, subscription)
+    # 장치 준비 전이면 구독만 등록되고, 준비가 끝나는 즉시 스트리밍이 시작됩니다.
+    await endpoint.sio.emit('status', packet_schema.status('Streaming started.', endpoint.compact,
+                                                           streams=subscription.to_dict(),
+                                                           state=startup_tracker.state), to=sid)
 
-@sio.event
-async def stop_streaming(sid, data):
+async def update_subscription(endpoint: SocketIOEndpoint, sid, data):
+    """스트리밍 중인 클라이언트의 구독 스트림/포맷을 변경합니다."""
+    logger.info(f"Received 'update_subscription' request from {sid}: {data}")
+    if not endpoint.broadcaster.is_streaming(sid):
+        await endpoint.sio.emit('error', {'message': 'Streaming is not started.'}, to=sid)
+        return
+
+    try:
+        subscription = parse_subscription(data)
+        relay_source.check_subscription(subscription)
+    except ValueError as e:
+        await endpoint.sio.emit('error', {'message': str(e)}, to=sid)
+        return
+
+    try:
+        _apply_video_subscription(endpoint, sid, subscription)
+    except ValueError as e:
+        await endpoint.sio.emit('error', {'message': str(e)}, to=sid)
+        return
+
+    subscriptions.subscribe(sid, subscription)
+    await rs_manager.add_consumer(sid, subscription.hardware_streams())
+    await endpoint.broadcaster.join(sid, subscription)
+    await endpoint.sio.emit('status', packet_schema.status('Subscription updated.', endpoint.compact,
+                                                           streams=subscription.to_dict()), to=sid)
+
+async def stop_streaming(endpoint: SocketIOEndpoint, sid, data):
     logger.info(f"Received 'stop_streaming' request from {sid}")
-    if sid in streaming_tasks:
-        streaming_tasks[sid].cancel()
-        del streaming_tasks[sid]
-        await sio.emit('status', {'message': 'Streaming stopped.'}, to=sid)
-        
-        if not streaming_tasks: # Stop hardware if no clients are streaming
-            logger.info("No active streams. Stopping RealSense hardware.")
-            await rs_manager.stop_streaming()
+    if endpoint.broadcaster.is_streaming(sid):
+        await endpoint.broadcaster.leave(sid)
+        subscriptions.unsubscribe(sid)
+        update_video_subscriptions(sid, set(), None)
+        await endpoint.sio.emit('status', packet_schema.status('Streaming stopped.', endpoint.compact), to=sid)
+        await rs_manager.remove_consumer(sid)
+
+async def admin_reconfigure(endpoint: SocketIOEndpoint, sid, data):
+    """스트림 프로파일(해상도/FPS/스트림)을 런타임에 변경합니다. data['token']으로 인증합니다."""
+    data = data or {}
+    if not isinstance(data, dict):
+        await endpoint.sio.emit('error', {'message': "'admin_reconfigure' data must be an object."}, to=sid)
+        return
+    # engineio의 aiohttp environ은 REMOTE_ADDR를 127.0.0.1로 고정하므로 원본 요청의 주소를 사용합니다.
+    request = (endpoint.sio.get_environ(sid) or {}).get('aiohttp.request')
+    remote = request.remote if request is not None else None
+    if not admin_api.is_admin_authorized(data.get('token'), remote):
+        logger.warning(f"Unauthorized 'admin_reconfigure' request from {sid}")
+        await endpoint.sio.emit('error', {'message': 'Admin token required.'}, to=sid)
+        return
+
+    logger.info(f"Received 'admin_reconfigure' request from {sid}: {data}")
+    try:
+        result = await admin_api.apply_stream_profile(data)
+    except (ValueError, TypeError) as e:
+        await endpoint.sio.emit('error', {'message': f"Reconfigure failed: {e}"}, to=sid)
+        return
+
+    if result['changed']:
+        await notify_profile_changed(result)
+    else:
+        await endpoint.sio.emit('status', packet_schema.status('Stream profile unchanged.', endpoint.compact,
+                                                               profile=result['profile']), to=sid)
+
+def _register_handlers(endpoint: SocketIOEndpoint):
+    """이벤트 핸들러를 서버에 등록합니다. 핸들러는 첫 인자로 자신이 속한 엔드포인트를 받습니다."""
+    for handler in (connect, disconnect, start_streaming, update_subscription, stop_streaming, admin_reconfigure):
+        endpoint.sio.on(handler.__name__, functools.partial(handler, endpoint))
+
+for _endpoint in endpoints:
+    _register_handlers(_endpoint)
 
 # --- Main Application Logic ---
-async def main():
+async def bring_up(stop_event: asyncio.Event):
+    """장치 초기화, 워밍업, 인코더 선택, 프로파일 보정을 백그라운드에서 진행하고 준비 상태를 알립니다."""
+    try:
+        await _bring_up()
+    except Exception as e:
+        logger.error(f"Server bring-up failed: {e}", exc_info=True)
+        startup_tracker.mark_failed(str(e))
+    if not startup_tracker.is_ready:
+        await emit_status('Server startup failed.', state=startup_tracker.state)
+        stop_event.set()
+
+async def _bring_up():
+    if relay_source.enabled:
+        # 릴레이 모드: 카메라/인코더 없이 상위 서버의 인코딩 결과를 그대로 다시 보냅니다.
+        with startup_tracker.phase('relay'):
+            await relay_source.start()
+        startup_tracker.mark_ready()
+        await emit_status('Relay ready.', state=startup_tracker.state)
+        return
+
     logger.info("Initializing RealSense Manager...")
     initialized = await rs_manager.initialize()
     if not initialized:
-        logger.error("Failed to initialize RealSense Manager. Exiting.")
+        startup_tracker.mark_failed("RealSense initialization failed")
         return
 
-    logger.info("Starting Socket.IO server on http://0.0.0.0:8080")
-    runner = web.AppRunner(app)
-    await runner.setup()
-    site = web.TCPSite(runner, '0.0.0.0', 8080)
-    await site.start()
+    # 인코더 백엔드 선택 ('auto'는 이 호스트에서 벤치마크)
+    with startup_tracker.phase('encoders'):
+        await asyncio.get_event_loop().run_in_executor(None, configure_encoders)
+
+    # 스트림 프로파일 자동 선택 (auto_profile.enabled)
+    if Config().get_auto_profile_config().get('enabled', False):
+        with startup_tracker.phase('calibration'):
+            await calibrate_stream_profile()
+
+    # 준비 중에 스트리밍을 요청한 클라이언트(Socket.IO, /ws)를 위해 스트리밍 시작
+    await rs_manager.start_pending_consumers()
+    startup_tracker.mark_ready()
+    await emit_status('Camera ready.', profile=rs_manager.get_stream_profile(), state=startup_tracker.state)
+
+async def main():
+    startup_tracker.record('imports', time.perf_counter() - PROCESS_START)
+    lag_monitor.start()
+
+    # 포트를 먼저 열어 클라이언트가 장치 초기화를 기다리는 동안 연결/구독할 수 있게 합니다.
+    # 한 호스트에서 릴레이를 이어 붙일 수 있도록 server.host/port 설정을 따릅니다.
+    server_config = Config().get_server_config()
+    host, port = server_config.get('host', '0.0.0.0'), int(server_config.get('port', 8080))
+    logger.info(f"Starting Socket.IO server on http://{host}:{port}")
+    with startup_tracker.phase('bind'):
+        runner = web.AppRunner(app)
+        await runner.setup()
+        site = web.TCPSite(runner, host, port)
+        await site.start()
     logger.info("Server is up and running. Waiting for connections.")
+    governor.start()
 
+    stop_event = asyncio.Event()
+    bring_up_task = asyncio.create_task(bring_up(stop_event))
     try:
-        # Keep the server running until interrupted
-        await asyncio.Event().wait()
+        # Keep the server running until interrupted (or device bring-up fails)
+        await stop_event.wait()
+        logger.error("Failed to initialize RealSense Manager. Exiting.")
     finally:
         logger.info("Server is shutting down.")
+        bring_up_task.cancel()
+        await relay_source.stop()
+        for endpoint in endpoints:
+            await endpoint.broadcaster.stop()
+        await governor.stop()
+        await lag_monitor.stop()
         await rs_manager.cleanup()
         await runner.cleanup()
 
 if __name__ == '__main__':
     try:
-        asyncio.run(main())
+        loop_monitor.run_event_loop(main(), Config().get_server_config().get('event_loop', 'asyncio'))
     except KeyboardInterrupt:
         logger.info("Server stopped by user (Ctrl+C).")
     except Exception as e:
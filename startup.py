@@ -0,0 +1,136 @@
+"""
+서버 시작 단계 계측과 준비 상태
+서버는 HTTP 포트를 먼저 열고 장치 초기화/파이프라인 시작/워밍업/인코더 선택을 백그라운드에서 진행합니다.
+각 단계의 소요 시간은 로그와 /metrics(rsunity_startup_phase_seconds)로 내보내고,
+준비 상태(starting -> ready | failed)는 rsunity_ready 지표와 status 이벤트로 알립니다.
+
+무거운 모듈(pyrealsense2, cv2)은 lazy_import로 처음 사용할 때 불러오며, 그 시간도 'import:<모듈>' 단계로 기록됩니다.
+"""
+
+import importlib
+import logging
+import threading
+import time
+import types
+from contextlib import contextmanager
+from typing import Dict, Any, Optional
+
+logger = logging.getLogger(__name__)
+
+# 이 모듈을 처음 불러온 시각 (서버 진입점에서 가장 먼저 import하여 프로세스 시작 기준으로 사용)
+PROCESS_START = time.perf_counter()
+
+STATES = ('starting', 'ready', 'failed')
+
+
+class StartupTracker:
+    """시작 단계별 소요 시간과 준비 상태를 기록하는 싱글톤 클래스"""
+
+    _instance = None
+    _initialized = False
+
+    def __new__(cls):
+        if cls._instance is None:
+            cls._instance = super(StartupTracker, cls).__new__(cls)
+        return cls._instance
+
+    def __init__(self):
+        if self._initialized:
+            return
+
+        self.phases: Dict[str, float] = {}
+        self.state = 'starting'
+        self.reason: Optional[str] = None
+        self.ready_after: Optional[float] = None
+        self._lock = threading.Lock()
+
+        self._initialized = True
+
+    def record(self, name: str, seconds: float):
+        """단계 소요 시간을 기록합니다. 같은 이름이 반복되면 누적합니다."""
+        from metrics import MetricsRegistry
+        with self._lock:
+            self.phases[name] = self.phases.get(name, 0.0) + seconds
+            total = self.phases[name]
+        MetricsRegistry().set_gauge('rsunity_startup_phase_seconds', total,
+                                    help='Time spent in each server startup phase', labels={'phase': name})
+        logger.info(f"시작 단계 '{name}': {seconds * 1000:.0f}ms")
+
+    @contextmanager
+    def phase(self, name: str):
+        """with 블록의 소요 시간을 단계로 기록합니다. (실행 스레드 무관)"""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(name, time.perf_counter() - started)
+
+    def _set_state(self, state: str, reason: Optional[str] = None):
+        from metrics import MetricsRegistry
+        self.state = state
+        self.reason = reason
+        self.ready_after = time.perf_counter() - PROCESS_START
+        MetricsRegistry().set_gauge('rsunity_ready', int(state == 'ready'),
+                                    help='1 once the camera pipeline is warmed up and serving frames')
+        MetricsRegistry().set_gauge('rsunity_startup_seconds', self.ready_after,
+                                    help='Seconds from process start until ready or failed')
+
+    def mark_ready(self):
+        self._set_state('ready')
+        logger.info(f"서버 준비 완료 ({self.ready_after:.2f}s): {self.summary()}")
+
+    def mark_failed(self, reason: str):
+        self._set_state('failed', reason)
+        logger.error(f"서버 시작 실패 ({self.ready_after:.2f}s, {reason}): {self.summary()}")
+
+    @property
+    def is_ready(self) -> bool:
+        return self.state == 'ready'
+
+    def summary(self) -> str:
+        with self._lock:
+            return ', '.join(f"{name} {seconds * 1000:.0f}ms" for name, seconds in self.phases.items())
+
+    def get_status(self) -> Dict[str, Any]:
+        with self._lock:
+            phases = dict(self.phases)
+        return {
+            "state": self.state,
+            "reason": self.reason,
+            "elapsed_s": self.ready_after if self.ready_after is not None else time.perf_counter() - PROCESS_START,
+            "phases_ms": {name: seconds * 1000 for name, seconds in phases.items()},
+        }
+
+
+class _LazyModule(types.ModuleType):
+    """첫 속성 접근 시 실제 모듈을 불러오는 대리 모듈"""
+
+    def __init__(self, name: str):
+        super().__init__(name)
+        self._module = None
+        self._load_lock = threading.Lock()
+
+    def _load(self):
+        with self._load_lock:
+            if self._module is None:
+                with StartupTracker().phase(f"import:{self.__name__}"):
+                    self._module = importlib.import_module(self.__name__)
+        return self._module
+
+    def __getattr__(self, attr: str):
+        # _module/_load_lock은 인스턴스 속성이므로 여기로 오지 않습니다.
+        return getattr(self._module if self._module is not None else self._load(), attr)
+
+
+_lazy_modules: Dict[str, _LazyModule] = {}
+
+
+def lazy_import(name: str) -> types.ModuleType:
+    """모듈을 처음 사용할 때 불러오는 대리 객체를 반환합니다. (import 시간은 시작 단계로 기록)
+
+    같은 이름은 같은 대리 객체를 공유하므로 import 시간이 한 번만 기록됩니다.
+    """
+    module = _lazy_modules.get(name)
+    if module is None:
+        module = _lazy_modules.setdefault(name, _LazyModule(name))
+    return module
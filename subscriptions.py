@@ -0,0 +1,200 @@
+"""
+클라이언트별 스트림 구독 관리
+각 클라이언트가 원하는 스트림(color, depth, imu, pointcloud)과 포맷을 기록하고,
+현재 구독자 전체가 필요로 하는 스트림 변형/하드웨어 스트림을 계산합니다.
+"""
+
+from dataclasses import dataclass, field
+from typing import Dict, Any, Optional, Set, Iterable
+from frame_encoder import (
+    COLOR_JPEG, COLOR_PNG, COLOR_WEBP, COLOR_RAW, COLOR_AUTO,
+    DEPTH_JPEG, DEPTH_WEBP, DEPTH_AUTO, DEPTH_PNG16, DEPTH_QUANTIZED,
+    POINTCLOUD_XYZ32F, POINTCLOUD_VOXEL, DEPTHGRID_F16, MESH_INDEXED, METADATA_HEADER
+)
+from video_stream import COLOR_H264, COLOR_VP8, VIDEO_CODECS
+
+# 스트림별 지원 포맷 -> 스트림 변형 (imu, metadata:json은 인코딩 없이 JSON으로 전송)
+# 'auto'는 config.json의 encoding 설정(벤치마크 선택 포함)을 따르며 실제 코덱은 페이로드에 표시됩니다.
+STREAM_FORMATS: Dict[str, Dict[str, Optional[str]]] = {
+    'color': {'jpeg': COLOR_JPEG, 'png': COLOR_PNG, 'webp': COLOR_WEBP, 'raw': COLOR_RAW, 'auto': COLOR_AUTO,
+              'h264': COLOR_H264, 'vp8': COLOR_VP8},
+    'depth': {'jpeg': DEPTH_JPEG, 'webp': DEPTH_WEBP, 'auto': DEPTH_AUTO, 'png16': DEPTH_PNG16,
+              **{variant.split(':', 1)[1]: variant for variant in DEPTH_QUANTIZED}},
+    'pointcloud': {'xyz32f': POINTCLOUD_XYZ32F, 'voxel': POINTCLOUD_VOXEL},
+    'depthgrid': {'f16': DEPTHGRID_F16},
+    'mesh': {'indexed': MESH_INDEXED},
+    'imu': {'json': None},
+    'metadata': {'header': METADATA_HEADER, 'json': None},
+}
+
+DEFAULT_FORMATS: Dict[str, str] = {
+    'color': 'jpeg',
+    'depth': 'jpeg',
+    'pointcloud': 'xyz32f',
+    'depthgrid': 'f16',
+    'mesh': 'indexed',
+    'imu': 'json',
+    'metadata': 'json',
+}
+
+# 구독 스트림 -> 필요한 하드웨어 스트림
+HARDWARE_STREAMS: Dict[str, Set[str]] = {
+    'color': {'color'},
+    'depth': {'depth'},
+    'pointcloud': {'depth'},
+    'depthgrid': {'depth'},
+    'mesh': {'depth'},
+    'imu': {'imu'},
+    'metadata': set(),
+}
+
+# 구독 정보를 보내지 않는 기존 클라이언트(Unity 등)의 기본 구독
+DEFAULT_STREAMS = ('color', 'depth')
+
+# 클라이언트 우선순위 (과부하 시 'low' 클라이언트부터 전송을 일시 중지)
+PRIORITIES = ('low', 'normal', 'high')
+DEFAULT_PRIORITY = 'normal'
+
+
+@dataclass
+class Subscription:
+    """클라이언트 구독 정보 (스트림 -> 포맷)"""
+    streams: Dict[str, str] = field(default_factory=dict)
+    priority: str = DEFAULT_PRIORITY
+
+    def variants(self) -> Dict[str, str]:
+        """프레임 단위로 인코딩하는 스트림의 {스트림: 변형} 매핑을 반환합니다. (비디오 제외)"""
+        return {
+            stream: STREAM_FORMATS[stream][fmt]
+            for stream, fmt in self.streams.items()
+            if STREAM_FORMATS[stream][fmt] is not None and STREAM_FORMATS[stream][fmt] not in VIDEO_CODECS
+        }
+
+    def video_variants(self) -> Set[str]:
+        """비디오 코덱(프레임 간 압축)으로 받는 변형 집합"""
+        return {
+            STREAM_FORMATS[stream][fmt]
+            for stream, fmt in self.streams.items()
+            if STREAM_FORMATS[stream][fmt] in VIDEO_CODECS
+        }
+
+    def hardware_streams(self) -> Set[str]:
+        """구독을 만족하기 위해 켜져 있어야 하는 하드웨어 스트림을 반환합니다."""
+        required = set()
+        for stream in self.streams:
+            required |= HARDWARE_STREAMS[stream]
+        return required
+
+    def to_dict(self) -> Dict[str, str]:
+        return dict(self.streams)
+
+    def signature(self) -> str:
+        """같은 페이로드를 받는 구독끼리 같은 값 (예: 'color=jpeg,depth=jpeg;priority=normal')"""
+        streams = ','.join(f"{stream}={fmt}" for stream, fmt in sorted(self.streams.items()))
+        return f"{streams};priority={self.priority}"
+
+
+def parse_subscription(data: Any) -> Subscription:
+    """클라이언트 요청에서 구독 정보를 해석합니다.
+
+    허용 형식:
+        None 또는 'streams' 키가 없는 dict      -> color, depth (jpeg)
+        {'streams': ['color', 'depth:png16']}
+        {'streams': {'color': 'jpeg', 'pointcloud': 'xyz32f'}}
+        'color,depth:png16'
+    dict에는 'priority' ('low', 'normal', 'high')를 함께 지정할 수 있습니다.
+
+    잘못된 스트림/포맷/우선순위이거나 위 형식이 아니면 ValueError를 발생시킵니다.
+    """
+    priority = DEFAULT_PRIORITY
+    if isinstance(data, dict):
+        requested = data.get('streams')
+        priority = data.get('priority') or DEFAULT_PRIORITY
+        if priority not in PRIORITIES:
+            raise ValueError(f"Unknown priority '{priority}' (supported: {', '.join(PRIORITIES)})")
+    else:
+        requested = data
+
+    if not requested:
+        requested = list(DEFAULT_STREAMS)
+    if isinstance(requested, str):
+        requested = [token for token in requested.split(',') if token.strip()]
+    if not isinstance(requested, (list, tuple, dict)):
+        raise ValueError(f"Invalid subscription: expected a list, dict or comma-separated string of streams, "
+                         f"got {type(requested).__name__}")
+
+    if isinstance(requested, dict):
+        items: Iterable = requested.items()
+    else:
+        items = []
+        for token in requested:
+            stream, _, fmt = str(token).strip().partition(':')
+            items.append((stream, fmt or None))
+
+    streams: Dict[str, str] = {}
+    for stream, fmt in items:
+        if stream not in STREAM_FORMATS:
+            raise ValueError(f"Unknown stream '{stream}' (supported: {', '.join(STREAM_FORMATS)})")
+        fmt = fmt or DEFAULT_FORMATS[stream]
+        if fmt not in STREAM_FORMATS[stream]:
+            raise ValueError(
+                f"Unsupported format '{fmt}' for stream '{stream}' "
+                f"(supported: {', '.join(STREAM_FORMATS[stream])})"
+            )
+        streams[stream] = fmt
+
+    return Subscription(streams=streams, priority=priority)
+
+
+class SubscriptionRegistry:
+    """전체 클라이언트 구독을 관리하는 싱글톤 클래스"""
+
+    _instance = None
+    _initialized = False
+
+    def __new__(cls):
+        if cls._instance is None:
+            cls._instance = super(SubscriptionRegistry, cls).__new__(cls)
+        return cls._instance
+
+    def __init__(self):
+        if self._initialized:
+            return
+
+        self._subscriptions: Dict[Any, Subscription] = {}
+
+        self._initialized = True
+
+    def subscribe(self, consumer_id, subscription: Subscription) -> None:
+        """소비자의 구독을 등록하거나 갱신합니다."""
+        self._subscriptions[consumer_id] = subscription
+
+    def unsubscribe(self, consumer_id) -> None:
+        """소비자의 구독을 해제합니다."""
+        self._subscriptions.pop(consumer_id, None)
+
+    def get(self, consumer_id) -> Optional[Subscription]:
+        return self._subscriptions.get(consumer_id)
+
+    def required_variants(self) -> Set[str]:
+        """현재 구독자 중 한 명 이상이 필요로 하는 스트림 변형 집합"""
+        variants = set()
+        for subscription in self._subscriptions.values():
+            variants.update(subscription.variants().values())
+            variants.update(subscription.video_variants())
+        return variants
+
+    def required_hardware_streams(self) -> Set[str]:
+        """현재 구독자 중 한 명 이상이 필요로 하는 하드웨어 스트림 집합"""
+        streams = set()
+        for subscription in self._subscriptions.values():
+            streams |= subscription.hardware_streams()
+        return streams
+
+    def get_summary(self) -> Dict[str, Any]:
+        """구독 현황 요약"""
+        return {
+            "subscribers": len(self._subscriptions),
+            "variants": sorted(self.required_variants()),
+            "hardware_streams": sorted(self.required_hardware_streams()),
+        }
@@ -0,0 +1,29 @@
+"""
+테스트 공통 설정
+    - 저장소 루트를 import 경로에 추가합니다. (서버 모듈은 평면 구조)
+    - Config 싱글톤이 저장소의 config.json 대신 임시 디렉터리의 기본 설정을 쓰도록 먼저 만들어 둡니다.
+    - pyrealsense2가 설치되지 않은 환경에서는 장치 없이 동작하는 가짜 모듈(fake_realsense)을 등록합니다.
+"""
+
+import os
+import sys
+import tempfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+TESTS = os.path.dirname(os.path.abspath(__file__))
+for path in (ROOT, TESTS):
+    if path not in sys.path:
+        sys.path.insert(0, path)
+
+try:
+    import pyrealsense2  # noqa: F401
+except ImportError:
+    import fake_realsense
+    sys.modules['pyrealsense2'] = fake_realsense
+
+from config import Config  # noqa: E402
+
+_config = Config.__new__(Config)
+_config.config_path = os.path.join(tempfile.mkdtemp(prefix='rsunity-test-'), 'config.json')
+_config.load_config()
+_config._initialized = True
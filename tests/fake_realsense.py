@@ -0,0 +1,43 @@
+"""
+장치 없는 테스트용 pyrealsense2 대체 모듈
+realsense_manager가 사용하는 이름만 흉내 냅니다. 열거형 값은 이름 문자열입니다.
+"""
+
+
+class _Enum:
+    def __getattr__(self, name):
+        if name.startswith('__'):
+            raise AttributeError(name)
+        return name
+
+
+stream = _Enum()
+format = _Enum()
+camera_info = _Enum()
+option = _Enum()
+frame_metadata_value = _Enum()
+timestamp_domain = _Enum()
+
+
+class config:
+    def __init__(self):
+        self.streams = {}
+
+    def enable_device(self, serial):
+        pass
+
+    def enable_stream(self, stream_type, width, height, fmt, fps):
+        self.streams[stream_type] = (width, height, fmt, fps)
+
+
+class pipeline:
+    def start(self, cfg):
+        raise RuntimeError("No device connected")
+
+    def stop(self):
+        pass
+
+
+class context:
+    def query_devices(self):
+        return []
@@ -0,0 +1,44 @@
+import asyncio
+
+import pytest
+from aiohttp import web
+from aiohttp.test_utils import TestClient, TestServer
+
+import admin_api
+from realsense_manager import RealSenseManager
+
+
+def _post(body, **kwargs):
+    """관리 API 앱을 띄우고 /admin/stream_profile에 본문을 보낸 뒤 (상태 코드, 본문)을 반환합니다."""
+    async def run():
+        app = web.Application()
+        admin_api.setup_routes(app)
+        async with TestClient(TestServer(app)) as client:
+            response = await client.post('/admin/stream_profile', data=body,
+                                         headers={'Content-Type': 'application/json'}, **kwargs)
+            return response.status, await response.text()
+
+    return asyncio.run(run())
+
+
+@pytest.mark.parametrize('body', ['[1, 2]', '"640x480"', '42', 'null', '{"width": 640', 'not json', ''])
+def test_invalid_body_is_bad_request(monkeypatch, body):
+    async def reconfigure(**kwargs):
+        raise AssertionError("invalid body must not reach reconfigure")
+
+    monkeypatch.setattr(RealSenseManager(), 'reconfigure', reconfigure)
+    status, _ = _post(body)
+    assert status == 400
+
+
+def test_object_body_is_applied(monkeypatch):
+    received = []
+
+    async def reconfigure(**kwargs):
+        received.append(kwargs)
+        return {'changed': False, 'profile': {}}
+
+    monkeypatch.setattr(RealSenseManager(), 'reconfigure', reconfigure)
+    status, _ = _post('{"width": 640, "height": 480}')
+    assert status == 200
+    assert received[0]['width'] == 640 and received[0]['streams'] is None
@@ -0,0 +1,117 @@
+import numpy as np
+import pytest
+
+from buffer_pool import MAX_FREE_PER_KEY, BufferPool
+
+
+@pytest.fixture
+def pool():
+    """여유 버퍼를 비운 공용 풀 (테스트마다 다른 크기를 써서 서로 섞이지 않게 합니다)"""
+    pool = BufferPool()
+    pool.clear()
+    return pool
+
+
+def _delta(pool, before):
+    after = pool.get_stats()
+    return {name: after[name] - before[name] for name in ('hits', 'misses', 'resident_bytes')}
+
+
+def test_released_buffer_is_reused(pool):
+    before = pool.get_stats()
+    first = pool.acquire((3, 5), np.uint16)
+    pool.release(first)
+    second = pool.acquire([3, 5], np.uint16)
+
+    assert second is first
+    assert _delta(pool, before) == {'hits': 1, 'misses': 1, 'resident_bytes': first.nbytes}
+    pool.release(second)
+
+
+def test_scalar_shape_matches_tuple_shape(pool):
+    first = pool.acquire(11, 'u1')
+    pool.release(first)
+    assert pool.acquire((11,), np.uint8) is first
+    pool.release(first)
+
+
+@pytest.mark.parametrize('shape, dtype', [((3, 6), np.uint16), ((3, 5), np.float32), ((5, 3), np.uint16)])
+def test_different_shape_or_dtype_is_not_reused(pool, shape, dtype):
+    first = pool.acquire((3, 5), np.uint16)
+    pool.release(first)
+    second = pool.acquire(shape, dtype)
+
+    assert second is not first
+    assert second.shape == shape and second.dtype == dtype
+    pool.release(second)
+
+
+def test_buffers_in_use_are_distinct(pool):
+    first = pool.acquire((4, 4), np.float32)
+    second = pool.acquire((4, 4), np.float32)
+    assert first is not second
+    assert pool.get_stats()['in_use'] >= 2
+    pool.release(first)
+    pool.release(second)
+
+
+def test_free_list_is_capped(pool):
+    before = pool.get_stats()
+    arrays = [pool.acquire((2, 9), np.int32) for _ in range(MAX_FREE_PER_KEY + 2)]
+    for array in arrays:
+        pool.release(array)
+
+    # 상한을 넘는 버퍼는 풀에 남지 않고 해제됩니다.
+    assert pool.get_stats()['free'] == MAX_FREE_PER_KEY
+    assert _delta(pool, before)['resident_bytes'] == MAX_FREE_PER_KEY * arrays[0].nbytes
+
+
+def test_borrow_releases_on_exit_and_on_error(pool):
+    with pool.borrow((6, 2), np.float64) as borrowed:
+        pass
+    with pytest.raises(RuntimeError):
+        with pool.borrow((6, 2), np.float64) as again:
+            assert again is borrowed
+            raise RuntimeError('boom')
+    assert pool.acquire((6, 2), np.float64) is borrowed
+    pool.release(borrowed)
+
+
+def test_foreign_and_repeated_releases_are_ignored(pool):
+    before = pool.get_stats()
+    pool.release(np.empty((7, 7), np.uint8))
+    assert pool.get_stats()['free'] == before['free']
+
+    array = pool.acquire((7, 7), np.uint8)
+    pool.release(array)
+    pool.release(array)
+    # 두 번 반환해도 여유 목록에는 한 번만 들어가므로 같은 버퍼를 두 곳에 나눠 주지 않습니다.
+    first, second = pool.acquire((7, 7), np.uint8), pool.acquire((7, 7), np.uint8)
+    assert first is array and second is not array
+    pool.release(first)
+    pool.release(second)
+
+
+def test_discarded_buffer_leaves_the_pool(pool):
+    before = pool.get_stats()
+    array = pool.acquire((8, 3), np.uint16)
+    pool.discard(array)
+    pool.release(array)  # 이미 관리 대상이 아니므로 무시
+
+    replacement = pool.acquire((8, 3), np.uint16)
+    assert replacement is not array
+    assert _delta(pool, before)['resident_bytes'] == replacement.nbytes
+    pool.release(replacement)
+
+
+def test_clear_drops_free_buffers(pool):
+    before = pool.get_stats()
+    array = pool.acquire((9, 2), np.uint8)
+    pool.release(array)
+    pool.clear()
+
+    assert pool.get_stats()['free'] == 0
+    assert _delta(pool, before)['resident_bytes'] == 0
+    replacement = pool.acquire((9, 2), np.uint8)
+    assert replacement is not array
+    pool.release(replacement)
@@ -0,0 +1,62 @@
+import os
+import subprocess
+import sys
+
+import cv2
+import numpy as np
+import pytest
+
+from binary_protocol import QDEPTH_HEADER, pack_codes
+from realsense_manager import FrameData, StreamMetadata
+from rsunity_client.decoding import DecodeBufferPool, decode_payload
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SERVER_MODULES = ('realsense_manager', 'depth_processing', 'frame_encoder', 'frame_cache', 'buffer_pool', 'config')
+
+
+def _png16():
+    depth = np.arange(12, dtype=np.uint16).reshape(3, 4) * 1000
+    return depth, cv2.imencode('.png', depth)[1].tobytes()
+
+
+def _raw():
+    color = np.arange(36, dtype=np.uint8).reshape(3, 4, 3)
+    return color, color.tobytes()
+
+
+@pytest.mark.parametrize('codec, sample', [('png16', _png16), ('raw', _raw)])
+def test_decoded_images_use_pool(codec, sample):
+    expected, payload = sample()
+    pool = DecodeBufferPool()
+
+    first, pooled = decode_payload(codec, payload, 4, 3, pool)
+    assert pooled and np.array_equal(first, expected)
+    pool.release(first)
+    second, pooled = decode_payload(codec, payload, 4, 3, pool)
+    assert pooled and second is first
+    assert (pool.allocated, pool.reused) == (1, 1)
+
+
+def test_without_pool_nothing_is_pooled():
+    expected, payload = _png16()
+    value, pooled = decode_payload('png16', payload, 4, 3)
+    assert not pooled and np.array_equal(value, expected)
+
+
+def test_client_does_not_import_server_modules():
+    code = ("import sys, rsunity_client.client, rsunity_client.decoding; "
+            f"print([m for m in {SERVER_MODULES!r} if m in sys.modules])")
+    output = subprocess.run([sys.executable, '-c', code], cwd=ROOT, capture_output=True, text=True, check=True)
+    assert output.stdout.strip() == '[]'
+
+
+def test_qdepth_and_rsfm_round_trip():
+    codes = np.array([[0, 1, 511], [1022, 1023, 7]], dtype=np.uint16)
+    payload = QDEPTH_HEADER.pack(10, 0, 0.5, 4.0) + pack_codes(codes, 10)
+    metres, _ = decode_payload('qdepth', payload, 3, 2)
+    assert metres[0, 0] == 0 and metres[0, 1] == pytest.approx(0.5) and metres[1, 2] > 0
+    assert metres[1, 1] == pytest.approx(4.0)
+
+    frame = FrameData(1.0, None, None, None, sequence=42, color_meta=StreamMetadata(frame_number=7))
+    header, _ = decode_payload('rsfm', frame.to_header_bytes(), 0, 0)
+    assert header['sequence'] == 42 and header['color']['frame_number'] == 7 and header['depth'] is None
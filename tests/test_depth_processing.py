@@ -0,0 +1,193 @@
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+
+from depth_processing import build_depth_mesh, get_mesh_topology, pool_depth_grid, voxel_downsample
+
+SCALE = 0.001  # 1 mm 단위 뎁스
+INTRINSICS = SimpleNamespace(width=16, height=12, fx=20.0, fy=20.0, ppx=8.0, ppy=6.0)
+
+
+def _reference_grid(depth, grid_width, grid_height, method):
+    """블록별로 0을 뺀 뒤 최솟값/아래쪽 중앙값을 고르는 느린 기준 구현"""
+    height, width = depth.shape
+    block_h, block_w = height // grid_height, width // grid_width
+    top, left = (height - block_h * grid_height) // 2, (width - block_w * grid_width) // 2
+    grid = np.zeros((grid_height, grid_width), dtype=np.float32)
+    for row in range(grid_height):
+        for col in range(grid_width):
+            block = depth[top + row * block_h:top + (row + 1) * block_h,
+                          left + col * block_w:left + (col + 1) * block_w]
+            valid = np.sort(block[block > 0])
+            if valid.size:
+                grid[row, col] = valid[0] if method == 'min' else valid[(valid.size - 1) // 2]
+    return (grid * np.float32(SCALE)).astype(np.float16)
+
+
+@pytest.mark.parametrize('method', ['min', 'median'])
+def test_zero_pixels_are_ignored(method):
+    depth = np.array([[0, 1500, 0, 0],
+                      [1000, 2500, 0, 3000],
+                      [2000, 2000, 0, 0],
+                      [0, 4000, 0, 0]], dtype=np.uint16)
+    grid = pool_depth_grid(depth, SCALE, 2, 2, method)
+
+    assert grid.dtype == np.float16
+    expected = {'min': [[1.0, 3.0], [2.0, 0.0]], 'median': [[1.5, 3.0], [2.0, 0.0]]}[method]
+    assert np.array_equal(grid, np.array(expected, dtype=np.float16))
+
+
+def test_median_picks_lower_middle_of_valid_pixels():
+    depth = np.array([[0, 4000, 1000, 0],
+                      [3000, 2000, 0, 0]], dtype=np.uint16)
+    grid = pool_depth_grid(depth, SCALE, 1, 1, 'median')
+    # 유효 픽셀 1000/2000/3000/4000 중 아래쪽 중앙값
+    assert grid[0, 0] == np.float16(2.0)
+
+
+@pytest.mark.parametrize('method', ['min', 'median'])
+def test_all_zero_block_is_zero_not_neighbour_value(method):
+    depth = np.full((8, 8), 1200, dtype=np.uint16)
+    depth[4:, 4:] = 0
+    grid = pool_depth_grid(depth, SCALE, 2, 2, method)
+
+    assert grid[1, 1] == 0
+    assert np.all(grid[grid != 0] == np.float16(1.2))
+    assert np.count_nonzero(grid) == 3
+
+
+@pytest.mark.parametrize('method', ['min', 'median'])
+@pytest.mark.parametrize('shape, grid_size', [((7, 10), (3, 2)), ((480, 640), (48, 36)), ((13, 13), (4, 4)),
+                                              ((5, 9), (9, 5))])
+def test_non_divisible_sizes_match_reference(method, shape, grid_size):
+    rng = np.random.default_rng(shape[0] * shape[1])
+    depth = rng.integers(300, 6000, size=shape).astype(np.uint16)
+    depth[rng.random(shape) < 0.3] = 0
+    grid_width, grid_height = grid_size
+    grid = pool_depth_grid(depth, SCALE, grid_width, grid_height, method)
+
+    assert grid.shape == (grid_height, grid_width)
+    assert np.array_equal(grid, _reference_grid(depth, grid_width, grid_height, method))
+
+
+def test_non_divisible_size_crops_edges_evenly():
+    # 7x7을 2x2 격자로 나누면 3x3 블록 네 개 + 가장자리 한 줄/열이 잘립니다 (위/왼쪽 0줄, 아래/오른쪽 1줄).
+    depth = np.full((7, 7), 2000, dtype=np.uint16)
+    depth[6, :] = 500
+    depth[:, 6] = 500
+    assert np.all(pool_depth_grid(depth, SCALE, 2, 2, 'min') == np.float16(2.0))
+
+
+def test_invalid_arguments():
+    depth = np.zeros((4, 4), dtype=np.uint16)
+    with pytest.raises(ValueError):
+        pool_depth_grid(depth, SCALE, 2, 2, 'mean')
+    with pytest.raises(ValueError):
+        pool_depth_grid(depth, SCALE, 5, 2)
+    with pytest.raises(ValueError):
+        pool_depth_grid(depth, SCALE, 0, 2)
+
+
+def _mesh_cells(indices, grid_width):
+    """삼각형 인덱스를 (행, 열) 칸 집합으로 되돌립니다. 칸은 세 정점의 최소 행/열입니다."""
+    rows, cols = np.divmod(indices.astype(np.int64), grid_width)
+    return set(zip(rows.min(axis=1).tolist(), cols.min(axis=1).tolist()))
+
+
+def test_flat_plane_keeps_every_triangle():
+    depth = np.full((12, 16), 1000, dtype=np.uint16)
+    vertices, indices = build_depth_mesh(depth, SCALE, INTRINSICS, step=4)
+
+    assert vertices.shape == (3 * 4, 3)
+    assert np.array_equal(indices, get_mesh_topology(4, 3))
+    assert np.allclose(vertices[:, 2], 1.0)
+    # 정점 (행 1, 열 3) = 픽셀 (4, 12): x = (12 - 8) / 20 * z, y = (4 - 6) / 20 * z
+    assert np.allclose(vertices[1 * 4 + 3], [0.2, -0.1, 1.0])
+
+
+def test_depth_jump_culls_triangles_across_the_edge():
+    depth = np.full((12, 16), 1000, dtype=np.uint16)
+    depth[:, 8:] = 1500  # 정점 열 2, 3은 0.5 m 뒤
+    vertices, indices = build_depth_mesh(depth, SCALE, INTRINSICS, step=4, max_depth_jump=0.1)
+
+    # 열 1-2 사이 칸만 경계를 가로지르므로 그 칸의 삼각형만 빠지고, 정점 수는 그대로입니다.
+    assert len(vertices) == 12
+    assert len(indices) == 2 * 2 * 2
+    corner_z = vertices[indices, 2]
+    assert np.all(corner_z.max(axis=1) - corner_z.min(axis=1) <= 0.1)
+    assert _mesh_cells(indices, 4) == {(0, 0), (1, 0), (0, 2), (1, 2)}
+
+
+def test_depth_jump_below_threshold_is_kept():
+    depth = np.full((12, 16), 1000, dtype=np.uint16)
+    depth[:, 8:] = 1090  # 완만한 경사면은 잘리지 않아야 합니다.
+    _, indices = build_depth_mesh(depth, SCALE, INTRINSICS, step=4, max_depth_jump=0.1)
+    assert len(indices) == 2 * 3 * 2
+    _, indices = build_depth_mesh(depth, SCALE, INTRINSICS, step=4, max_depth_jump=0.08)
+    assert len(indices) == 2 * 2 * 2
+
+
+def test_zero_depth_vertex_drops_adjacent_triangles():
+    depth = np.full((12, 16), 1000, dtype=np.uint16)
+    depth[4, 4] = 0  # 정점 (1, 1)
+    vertices, indices = build_depth_mesh(depth, SCALE, INTRINSICS, step=4)
+
+    assert np.array_equal(vertices[1 * 4 + 1], [0, 0, 0])
+    assert 1 * 4 + 1 not in indices
+    # 정점 (1, 1)은 칸 (0,0) 두 삼각형 중 하나(b,c,d), (0,1) 두 개, (1,0) 두 개, (1,1) 하나(a,c,b)에 속합니다.
+    assert len(indices) == 2 * 3 * 2 - 6
+
+
+def test_invalid_mesh_step():
+    with pytest.raises(ValueError):
+        build_depth_mesh(np.zeros((12, 16), dtype=np.uint16), SCALE, INTRINSICS, step=0)
+
+
+def _by_position(points, colors=None):
+    order = np.lexsort(points.T[::-1])
+    return points[order], (colors[order] if colors is not None else None)
+
+
+def test_voxels_split_at_zero_for_negative_coordinates():
+    points = np.array([[-0.05, 0.02, 1.01],
+                       [0.05, 0.02, 1.01],    # x 부호가 다르면 다른 복셀 (floor, 0 쪽 절삭이 아님)
+                       [-0.15, -0.12, 1.02],
+                       [-0.11, -0.18, 1.04],  # 위 점과 같은 (-2, -2, 10) 복셀
+                       [0.05, -0.05, -1.05]], dtype=np.float32)
+    averaged, colors = voxel_downsample(points, 0.1)
+
+    assert colors is None
+    assert averaged.dtype == np.float32
+    expected = np.array([[-0.13, -0.15, 1.03],
+                         [-0.05, 0.02, 1.01],
+                         [0.05, -0.05, -1.05],
+                         [0.05, 0.02, 1.01]], dtype=np.float32)
+    assert np.allclose(_by_position(averaged)[0], expected, atol=1e-6)
+
+
+def test_voxel_colours_are_rounded_means():
+    points = np.array([[-0.01, -0.01, 0.51],
+                       [-0.02, -0.03, 0.52],
+                       [-0.04, -0.02, 0.53],
+                       [0.31, 0.31, 0.51]], dtype=np.float32)
+    colors = np.array([[0, 100, 255],
+                       [1, 101, 255],
+                       [1, 200, 254],
+                       [7, 8, 9]], dtype=np.uint8)
+    averaged, averaged_colors = voxel_downsample(points, 0.1, colors)
+    averaged, averaged_colors = _by_position(averaged, averaged_colors)
+
+    assert averaged_colors.dtype == np.uint8
+    # (0+1+1)/3 = 0.67 -> 1, (100+101+200)/3 = 133.67 -> 134, (255+255+254)/3 = 254.67 -> 255
+    assert averaged_colors.tolist() == [[1, 134, 255], [7, 8, 9]]
+    assert np.allclose(averaged[0], [-0.07 / 3, -0.02, 0.52], atol=1e-6)
+
+
+def test_voxel_downsample_empty_and_invalid_size():
+    points = np.empty((0, 3), dtype=np.float32)
+    colors = np.empty((0, 3), dtype=np.uint8)
+    averaged, averaged_colors = voxel_downsample(points, 0.1, colors)
+    assert averaged.shape == (0, 3) and averaged_colors.shape == (0, 3)
+    with pytest.raises(ValueError):
+        voxel_downsample(points, 0)
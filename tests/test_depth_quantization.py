@@ -0,0 +1,70 @@
+import numpy as np
+import pytest
+
+from binary_protocol import dequantize_depth, pack_codes, quant_levels, unpack_codes
+from depth_processing import get_quantization_lut, quantize_depth
+
+SCALE = 0.001  # 1 mm 단위 뎁스
+NEAR, FAR = 0.2, 5.0
+GROUP = {8: (1, 1), 10: (4, 5), 12: (2, 3)}  # 비트 수 -> (묶음당 값 개수, 바이트 수)
+
+
+@pytest.mark.parametrize('bits', [8, 10, 12])
+@pytest.mark.parametrize('count', [1, 2, 3, 4, 5, 7, 9, 640 * 3 + 1])
+def test_pack_round_trip(bits, count):
+    rng = np.random.default_rng(count)
+    codes = rng.integers(0, 1 << bits, size=count).astype(np.uint16)
+    packed = pack_codes(codes, bits)
+
+    values, nbytes = GROUP[bits]
+    assert len(packed) == -(-count // values) * nbytes
+    assert np.array_equal(unpack_codes(packed, bits, count), codes)
+
+
+@pytest.mark.parametrize('bits', [8, 10, 12])
+@pytest.mark.parametrize('mode', ['linear', 'log'])
+def test_quantize_round_trip_error(bits, mode):
+    depth = np.arange(int(NEAR / SCALE), int(FAR / SCALE) + 1, 7, dtype=np.uint16).reshape(1, -1)
+    codes = quantize_depth(depth, SCALE, bits, mode, NEAR, FAR)
+    assert codes.dtype == (np.uint8 if bits == 8 else np.uint16)
+
+    unpacked = unpack_codes(pack_codes(codes, bits), bits, codes.size).reshape(codes.shape)
+    metres = dequantize_depth(unpacked, bits, mode, NEAR, FAR)
+    original = depth * SCALE
+    steps = quant_levels(bits, mode, NEAR, FAR) - 1
+    if mode == 'linear':
+        # 반올림이므로 오차는 코드 간격의 절반 이하
+        assert np.max(np.abs(metres - original)) <= (FAR - NEAR) / steps / 2 + 1e-5
+    else:
+        # 로그 방식은 상대 오차가 거리와 무관하게 일정합니다.
+        ratio = (FAR / NEAR) ** (1 / (2 * steps))
+        assert np.max(np.abs(metres / original - 1)) <= ratio - 1 + 1e-5
+
+
+@pytest.mark.parametrize('bits', [8, 10, 12])
+@pytest.mark.parametrize('mode', ['linear', 'log'])
+def test_zero_and_out_of_range_depth(bits, mode):
+    top = quant_levels(bits, mode, NEAR, FAR)
+    depth = np.array([[0, 50, int(NEAR / SCALE), int(FAR / SCALE), 65535]], dtype=np.uint16)
+    codes = quantize_depth(depth, SCALE, bits, mode, NEAR, FAR)
+    # 뎁스 0(무효)은 코드 0, near보다 가까우면 1, far보다 멀면 최대 코드
+    assert codes.tolist() == [[0, 1, 1, top, top]]
+
+    metres = dequantize_depth(codes.astype(np.uint16), bits, mode, NEAR, FAR)
+    assert metres[0, 0] == 0
+    assert metres[0, 1] == pytest.approx(NEAR) and metres[0, 4] == pytest.approx(FAR)
+
+
+def test_lut_is_cached_and_read_only():
+    lut = get_quantization_lut(10, 'log', NEAR, FAR, SCALE)
+    assert get_quantization_lut(10, 'log', NEAR, FAR, SCALE) is lut
+    assert lut.shape == (65536,) and not lut.flags.writeable
+
+
+@pytest.mark.parametrize('bits, mode, near, far', [(9, 'linear', NEAR, FAR), (8, 'cubic', NEAR, FAR),
+                                                   (8, 'log', 0.0, FAR), (8, 'linear', FAR, NEAR)])
+def test_invalid_settings(bits, mode, near, far):
+    with pytest.raises(ValueError):
+        quant_levels(bits, mode, near, far)
+    with pytest.raises(ValueError):
+        dequantize_depth(np.zeros(4, dtype=np.uint16), bits, mode, near, far)
@@ -0,0 +1,74 @@
+import math
+
+import pytest
+
+from binary_protocol import FRAME_HEADER_SIZE, unpack_frame_header
+from realsense_manager import FrameData, StreamMetadata
+
+
+def _frame(color_meta=None, depth_meta=None):
+    return FrameData(1760000000.25, None, None, None, sequence=123456, host_timestamp=1760000000.5,
+                     host_monotonic=4321.125, color_meta=color_meta, depth_meta=depth_meta)
+
+
+def test_header_round_trip_with_both_streams():
+    color = StreamMetadata(frame_number=9001, sensor_timestamp=1234567890123, timestamp=1760000000250.5,
+                           timestamp_domain='global_time', exposure=8500.0, gain=16.0, laser_power=float('nan'))
+    depth = StreamMetadata(frame_number=0, sensor_timestamp=-1, timestamp=98765.25,
+                           timestamp_domain='hardware_clock', exposure=33000.0, gain=16.0, laser_power=150.0)
+    data = _frame(color, depth).to_header_bytes()
+
+    assert len(data) == FRAME_HEADER_SIZE
+    header = unpack_frame_header(data)
+    assert (header['sequence'], header['host_timestamp'], header['host_monotonic']) == \
+        (123456, 1760000000.5, 4321.125)
+
+    color = dict(header['color'])
+    assert math.isnan(color.pop('laser_power'))
+    assert color == {
+        'frame_number': 9001, 'sensor_timestamp': 1234567890123, 'timestamp': 1760000000250.5,
+        'timestamp_domain': 'global_time', 'exposure': 8500.0, 'gain': 16.0,
+    }
+    assert header['depth'] == {
+        'frame_number': 0, 'sensor_timestamp': -1, 'timestamp': 98765.25,
+        'timestamp_domain': 'hardware_clock', 'exposure': 33000.0, 'gain': 16.0, 'laser_power': 150.0,
+    }
+
+
+@pytest.mark.parametrize('present', ['color', 'depth', None])
+def test_missing_stream_metadata_is_none(present):
+    meta = StreamMetadata(frame_number=7, timestamp_domain='system_time')
+    frame = _frame(color_meta=meta if present == 'color' else None, depth_meta=meta if present == 'depth' else None)
+    header = unpack_frame_header(frame.to_header_bytes())
+
+    for stream in ('color', 'depth'):
+        if stream == present:
+            assert header[stream]['frame_number'] == 7
+            assert header[stream]['timestamp_domain'] == 'system_time'
+        else:
+            assert header[stream] is None
+
+
+def test_unknown_values_use_sentinels():
+    header = unpack_frame_header(_frame(color_meta=StreamMetadata(timestamp_domain='bogus')).to_header_bytes())
+    color = header['color']
+    # 프레임 번호가 없으면 -1, 알 수 없는 타임스탬프 기준은 빈 문자열로 돌아옵니다.
+    assert color['frame_number'] == -1
+    assert color['timestamp_domain'] == ''
+    assert color['sensor_timestamp'] == -1
+    assert all(math.isnan(color[name]) for name in ('timestamp', 'exposure', 'gain', 'laser_power'))
+
+
+def test_header_trailing_bytes_are_ignored():
+    data = _frame(depth_meta=StreamMetadata(frame_number=5)).to_header_bytes()
+    assert unpack_frame_header(data + b'payload')['depth']['frame_number'] == 5
+
+
+def test_invalid_header_is_rejected():
+    data = _frame().to_header_bytes()
+    with pytest.raises(ValueError):
+        unpack_frame_header(data[:-1])
+    with pytest.raises(ValueError):
+        unpack_frame_header(b'XXXX' + data[4:])
+    with pytest.raises(ValueError):
+        unpack_frame_header(data[:4] + bytes([data[4] + 1]) + data[5:])
@@ -0,0 +1,171 @@
+import asyncio
+import threading
+import time
+
+import numpy as np
+
+import frame_encoder
+from buffer_pool import BufferPool
+from frame_ring import FrameRing
+from realsense_manager import FrameData, RealSenseManager
+
+SHAPE = (3, 7)
+
+
+def _frame(sequence):
+    depth = BufferPool().acquire(SHAPE, np.uint16)
+    return FrameData(float(sequence), None, depth, None, sequence=sequence)
+
+
+def _reused(array) -> bool:
+    """array가 풀로 반환되었는지 확인합니다. (다음 acquire가 같은 버퍼를 돌려줌)"""
+    pool = BufferPool()
+    taken = pool.acquire(SHAPE, np.uint16)
+    pool.release(taken)
+    return taken is array
+
+
+def test_evicted_frame_without_lease_is_recycled():
+    ring = FrameRing(max_frames=1)
+    first = _frame(1)
+    ring.append(first)
+    ring.append(_frame(2))
+    assert ring.recycled == 1
+    assert _reused(first.depth_frame)
+
+
+def test_leased_frame_is_recycled_after_last_release():
+    ring = FrameRing(max_frames=1)
+    first = _frame(1)
+    ring.append(first)
+    assert ring.acquire(first) and ring.acquire(first)
+
+    ring.append(_frame(2))
+    assert ring.recycled == 0
+    assert ring.get_stats()['retired'] == 1
+    ring.release(first)
+    assert ring.recycled == 0 and not _reused(first.depth_frame)
+    ring.release(first)
+    assert ring.recycled == 1 and ring.get_stats()['retired'] == 0
+    assert _reused(first.depth_frame)
+
+
+def test_release_of_frame_still_in_ring_keeps_it():
+    ring = FrameRing(max_frames=2)
+    first = _frame(1)
+    ring.append(first)
+    assert ring.acquire(first)
+    ring.release(first)
+    ring.release(first)  # 임대 없이 반환해도 음수가 되지 않습니다.
+    assert ring.get(1) is first and ring.recycled == 0
+    assert ring.get_stats()['leased'] == 0
+
+
+def test_untracked_frames_are_not_leased():
+    ring = FrameRing(max_frames=1)
+    outside = _frame(5)
+    assert not ring.acquire(outside)
+    ring.release(outside)
+
+    first = _frame(1)
+    ring.append(first)
+    ring.append(_frame(2))
+    # 이미 재사용된 프레임은 다시 임대할 수 없습니다.
+    assert not ring.acquire(first)
+    BufferPool().release(outside.depth_frame)
+
+
+def test_clear_waits_for_leases():
+    ring = FrameRing(max_frames=3)
+    first, second = _frame(1), _frame(2)
+    ring.append(first)
+    ring.append(second)
+    ring.acquire(second)
+    ring.clear()
+    assert ring.recycled == 1 and ring.get_stats()['retired'] == 1
+    ring.release(second)
+    assert ring.recycled == 2
+
+
+def test_encode_thread_holds_lease_after_caller_is_cancelled(monkeypatch):
+    ring = FrameRing(max_frames=1)
+    monkeypatch.setattr(RealSenseManager(), 'frame_history', ring)
+    started, finish = threading.Event(), threading.Event()
+
+    def slow_encoder(frame_data):
+        started.set()
+        finish.wait(2)
+        return None
+
+    monkeypatch.setitem(frame_encoder.VARIANT_ENCODERS, frame_encoder.METADATA_HEADER, slow_encoder)
+    first = _frame(1)
+    ring.append(first)
+
+    async def run():
+        task = asyncio.create_task(frame_encoder.encode_variant_async(frame_encoder.METADATA_HEADER, first))
+        while not started.is_set():
+            await asyncio.sleep(0.01)
+        task.cancel()
+        ring.append(_frame(2))
+        # 호출한 코루틴은 취소되었지만 인코딩 스레드가 아직 프레임을 사용 중입니다.
+        assert ring.recycled == 0
+        finish.set()
+        deadline = time.monotonic() + 2
+        while ring.recycled == 0 and time.monotonic() < deadline:
+            await asyncio.sleep(0.01)
+
+    asyncio.run(run())
+    assert ring.recycled == 1
+    assert _reused(first.depth_frame)
+
+
+def test_frame_evicted_between_latest_and_acquire_is_not_leased():
+    ring = FrameRing(max_frames=1)
+    first = _frame(1)
+    ring.append(first)
+    stale = ring.latest()
+    ring.append(_frame(2))  # 조회와 임대 사이에 다음 프레임이 들어와 밀려남
+
+    assert not ring.acquire(stale)
+    assert stale.recycled
+    # 잠금 안에서 조회와 임대를 함께 하면 항상 링 안의 프레임을 받습니다.
+    latest = ring.lease_latest(after_sequence=1)
+    assert latest.sequence == 2 and not latest.recycled
+    assert ring.lease_latest(after_sequence=2) is None
+    ring.append(_frame(3))
+    assert ring.get_stats()['retired'] == 1
+    ring.release(latest)
+    assert latest.recycled
+
+
+def test_recycled_frame_is_not_encoded(monkeypatch):
+    ring = FrameRing(max_frames=1)
+    monkeypatch.setattr(RealSenseManager(), 'frame_history', ring)
+
+    def fail(frame_data):
+        raise AssertionError("recycled frame must not be encoded")
+
+    monkeypatch.setitem(frame_encoder.VARIANT_ENCODERS, frame_encoder.METADATA_HEADER, fail)
+    first = _frame(1)
+    ring.append(first)
+    ring.append(_frame(2))
+
+    assert asyncio.run(frame_encoder.encode_variant_async(frame_encoder.METADATA_HEADER, first)) is None
+    # 링 밖의 프레임(측정용 등)은 임대 없이 인코딩합니다.
+    outside = FrameData(0.0, None, None, None, sequence=-1)
+    encoded = []
+    monkeypatch.setitem(frame_encoder.VARIANT_ENCODERS, frame_encoder.METADATA_HEADER, encoded.append)
+    asyncio.run(frame_encoder.encode_variant_async(frame_encoder.METADATA_HEADER, outside, use_cache=False))
+    assert encoded == [outside]
+
+
+def test_history_lookup_leases_atomically():
+    ring = FrameRing(max_frames=2)
+    first = _frame(1)
+    ring.append(first)
+    ring.append(_frame(2))
+    assert ring.get(1, lease=True) is first
+    ring.append(_frame(3))
+    assert not first.recycled
+    ring.release(first)
+    assert first.recycled
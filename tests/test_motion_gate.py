@@ -0,0 +1,127 @@
+import numpy as np
+import pytest
+
+import motion_gate
+from motion_gate import MotionGate
+from realsense_manager import FrameData
+
+HOLD_S, HEARTBEAT_S = 0.5, 1.0
+
+
+class Clock:
+    def __init__(self):
+        self.now = 100.0
+
+    def monotonic(self):
+        return self.now
+
+
+@pytest.fixture
+def gate(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(motion_gate.time, 'monotonic', clock.monotonic)
+    gate = MotionGate()
+    monkeypatch.setattr(gate, 'options', {**gate.options, 'hold_s': HOLD_S, 'heartbeat_s': HEARTBEAT_S,
+                                          'thumbnail_width': 16, 'color_delta': 12, 'changed_ratio': 0.02})
+    for name, value in (('enabled', True), ('active', True), ('_references', {}), ('_last_sequence', None),
+                        ('_last_motion_at', float('-inf')), ('evaluated', 0), ('motion_frames', 0)):
+        monkeypatch.setattr(gate, name, value)
+    gate.clock = clock
+    yield gate
+    del gate.clock
+
+
+def _bgr(block=False):
+    image = np.full((48, 64, 3), 80, dtype=np.uint8)
+    if block:
+        image[8:32, 8:40] = 240
+    return image
+
+
+def _yuyv(block=False):
+    image = np.full((48, 64, 2), 128, dtype=np.uint8)
+    image[:, :, 0] = 80
+    if block:
+        image[8:32, 8:40, 0] = 240
+    return image
+
+
+class Client:
+    """last_sent_at을 기록하며 should_send를 호출하는 클라이언트"""
+
+    def __init__(self, gate):
+        self.gate = gate
+        self.last_sent_at = float('-inf')
+        self.sequence = 0
+
+    def offer(self, at, **fields):
+        self.gate.clock.now = 100.0 + at
+        self.sequence += 1
+        frame = FrameData(at, fields.pop('color', None), fields.pop('depth', None), None,
+                          sequence=self.sequence, **fields)
+        sent = self.gate.should_send(frame, self.last_sent_at)
+        if sent:
+            self.last_sent_at = self.gate.clock.now
+        return sent
+
+
+def test_static_motion_hold_and_heartbeat(gate):
+    client = Client(gate)
+    # 첫 프레임은 기준이 없으므로 움직임으로 보고 전송
+    assert client.offer(0.0, color=_bgr())
+    # 정지 장면이어도 hold_s 동안은 계속 전송
+    assert client.offer(0.3, color=_bgr())
+    # hold_s가 지나면 정지: heartbeat_s 전까지는 건너뜀
+    assert not client.offer(0.8, color=_bgr())
+    assert not gate.active
+    assert not client.offer(1.2, color=_bgr())
+    # 마지막 전송(0.3초) 뒤 heartbeat_s가 지나면 한 프레임 전송
+    assert client.offer(1.35, color=_bgr())
+    assert not client.offer(1.5, color=_bgr())
+    # 블록이 바뀌면 바로 다음 프레임부터 전송 재개
+    assert client.offer(1.6, color=_bgr(block=True))
+    assert gate.active
+    # 다시 정지: hold_s 동안 유지한 뒤 중지
+    assert client.offer(2.0, color=_bgr(block=True))
+    assert not client.offer(2.2, color=_bgr(block=True))
+    assert gate.motion_frames == 2
+
+
+def test_decision_is_shared_per_sequence(gate):
+    first, second = Client(gate), Client(gate)
+    assert first.offer(0.0, color=_bgr())
+    evaluated = gate.evaluated
+    # 같은 순번은 다시 계산하지 않으며, heartbeat는 클라이언트별로 계산합니다.
+    second.sequence = first.sequence - 1
+    assert second.offer(0.0, color=_bgr(block=True))
+    assert gate.evaluated == evaluated
+
+
+def test_yuyv_uses_luma_without_bgr_conversion(gate):
+    client = Client(gate)
+    assert client.offer(0.0, color_yuyv=_yuyv())
+    frame = FrameData(0.8, None, None, None, sequence=99, color_yuyv=_yuyv())
+    gate.clock.now = 100.8
+    assert not gate.should_send(frame, 100.7)
+    # 휘도 채널만 축소하므로 BGR 변환이 일어나지 않아야 합니다.
+    assert frame._color_bgr is None
+    assert client.offer(1.0, color_yuyv=_yuyv(block=True))
+    assert gate.motion_frames == 2
+
+
+def test_depth_change_is_motion(gate):
+    client = Client(gate)
+    depth = np.full((48, 64), 1000, dtype=np.uint16)
+    assert client.offer(0.0, depth=depth)
+    assert not client.offer(0.8, depth=depth.copy())
+    moved = depth.copy()
+    moved[:24] = 2000  # 1 m 변화 (depth_delta_m 기본 0.05 m)
+    assert client.offer(0.9, depth=moved)
+
+
+def test_frames_without_pixels_and_disabled_gate_always_send(gate, monkeypatch):
+    relayed = FrameData(0.0, None, None, None, sequence=1, relayed=True)
+    assert gate.should_send(relayed, gate.clock.now)
+    monkeypatch.setattr(gate, 'enabled', False)
+    client = Client(gate)
+    assert client.offer(0.0, color=_bgr()) and client.offer(5.0, color=_bgr())
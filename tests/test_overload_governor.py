@@ -0,0 +1,78 @@
+import asyncio
+import time
+
+import frame_encoder
+from frame_cache import EncodedFrameCache
+from loop_monitor import LoopLagMonitor
+from overload_governor import OverloadGovernor
+from realsense_manager import FrameData
+
+
+def _sample(monkeypatch, workload, interval=0.3, duration=0.7):
+    """workload를 실행하는 동안 과부하 제어의 측정 구간 신호를 모읍니다."""
+    governor = OverloadGovernor()
+    monkeypatch.setitem(governor.options, 'interval_s', interval)
+    samples = []
+    monkeypatch.setattr(governor, '_evaluate', samples.append)
+
+    async def run():
+        lag_monitor = LoopLagMonitor()
+        lag_monitor.start()
+        task = asyncio.create_task(governor._run())
+        await workload(duration)
+        await asyncio.sleep(interval)
+        task.cancel()
+        await task
+        await lag_monitor.stop()
+
+    asyncio.run(run())
+    return samples
+
+
+def test_encode_queue_counts_work_waiting_on_encode_thread(monkeypatch):
+    def slow_encoder(frame_data):
+        time.sleep(0.15)
+        return None
+
+    monkeypatch.setitem(frame_encoder.VARIANT_ENCODERS, frame_encoder.METADATA_HEADER, slow_encoder)
+
+    async def workload(duration):
+        frames = [FrameData(time.time(), None, None, None, sequence=n) for n in range(1, 5)]
+        await asyncio.gather(*(frame_encoder.encode_variant_async(frame_encoder.METADATA_HEADER, frame)
+                               for frame in frames))
+
+    samples = _sample(monkeypatch, workload)
+    assert max(sample['encode_queue'] for sample in samples) >= 3
+    assert EncodedFrameCache().pending == 0
+
+
+def test_encode_queue_idle_is_zero(monkeypatch):
+    samples = _sample(monkeypatch, asyncio.sleep)
+    assert samples and all(sample['encode_queue'] == 0 for sample in samples)
+
+
+def test_cpu_is_normalized_to_one_core(monkeypatch):
+    async def busy_loop(duration):
+        end = time.perf_counter() + duration
+        while time.perf_counter() < end:
+            spin_until = time.perf_counter() + 0.05
+            while time.perf_counter() < spin_until:
+                pass
+            await asyncio.sleep(0)
+
+    samples = _sample(monkeypatch, busy_loop, interval=0.3, duration=1.0)
+    # 이벤트 루프 스레드 하나가 포화되면 코어 수와 관계없이 1.0에 가까워야 합니다.
+    assert max(sample['cpu'] for sample in samples) > 0.7
+
+
+def test_loop_lag_comes_from_lag_monitor(monkeypatch):
+    async def blocking(duration):
+        await asyncio.sleep(0.1)
+        time.sleep(0.25)  # 루프를 막는 동기 호출
+        await asyncio.sleep(duration)
+
+    samples = _sample(monkeypatch, blocking, interval=0.3, duration=0.7)
+    lags = [sample['loop_lag_ms'] for sample in samples]
+    assert max(lags) >= 150
+    # 구간마다 최댓값을 가져가며 초기화하므로 이후 구간에는 남지 않습니다.
+    assert lags[-1] < 150
@@ -0,0 +1,28 @@
+import pytest
+
+import packet_schema
+from frame_cache import EncodedFrame
+
+
+def _encoded():
+    return EncodedFrame(stream='color', codec='jpeg', sequence=3, timestamp=1.0, width=4, height=2, data=b'\xff\xd8')
+
+
+def test_payloads_are_chosen_per_call():
+    # 같은 프로세스에서 JSON 클라이언트와 msgpack 클라이언트에게 각자의 형식으로 보낼 수 있어야 합니다.
+    assert packet_schema.frame_entry(_encoded(), 'jpeg') == {'data': '/9g=', 'width': 4, 'height': 2, 'format': 'jpeg'}
+    assert packet_schema.frame_entry(_encoded(), 'jpeg', compact=True) == [b'\xff\xd8', 4, 2, 'jpeg']
+    assert packet_schema.status('ok', state='ready') == {'message': 'ok', 'state': 'ready'}
+    assert packet_schema.status('ok', True, state='ready') == ['ok', None, None, 'ready']
+
+
+def test_status_rejects_unknown_fields():
+    with pytest.raises(ValueError):
+        packet_schema.status('ok', bogus=1)
+
+
+def test_resolve_serializer():
+    assert packet_schema.resolve_serializer('json') == 'json'
+    assert packet_schema.resolve_serializer('msgpack') in ('json', 'msgpack')
+    with pytest.raises(ValueError):
+        packet_schema.resolve_serializer('cbor')
@@ -0,0 +1,87 @@
+import asyncio
+
+import pytest
+
+import profile_calibration
+from realsense_manager import RealSenseManager
+
+
+class TimeoutPipeline:
+    """timeout_width 이상의 해상도에서는 wait_for_frames가 타임아웃되는 파이프라인"""
+
+    def __init__(self, width, timeout_width):
+        self.width = width
+        self.timeout_width = timeout_width
+
+    def wait_for_frames(self):
+        if self.width >= self.timeout_width:
+            raise RuntimeError("Frame didn't arrive within 5000")
+        return self
+
+    def get_color_frame(self):
+        return None
+
+    def get_depth_frame(self):
+        return None
+
+    def stop(self):
+        pass
+
+
+@pytest.fixture
+def manager(monkeypatch, tmp_path):
+    rs_manager = RealSenseManager()
+    calls = {'restart': 0, 'reconfigure': []}
+
+    async def restart_pipeline():
+        calls['restart'] += 1
+        return True
+
+    async def reconfigure(**kwargs):
+        calls['reconfigure'].append(kwargs)
+        return {'changed': True}
+
+    def start_pipeline(streams, width=None, height=None, fps=None):
+        rs_manager.pipeline = TimeoutPipeline(width, rs_manager.timeout_width)
+        return True
+
+    monkeypatch.setattr(rs_manager, 'is_connected', True)
+    monkeypatch.setattr(rs_manager, 'pipeline', None)
+    monkeypatch.setattr(rs_manager, 'configured_streams', {'color', 'depth'})
+    monkeypatch.setattr(rs_manager, 'supported_profiles', [
+        {'stream': stream, 'width': width, 'height': height, 'fps': 30}
+        for stream in ('color', 'depth') for width, height in ((1280, 720), (640, 480), (424, 240))
+    ])
+    monkeypatch.setattr(rs_manager, '_start_pipeline', start_pipeline)
+    monkeypatch.setattr(rs_manager, 'restart_pipeline', restart_pipeline)
+    monkeypatch.setattr(rs_manager, 'reconfigure', reconfigure)
+    monkeypatch.setattr(profile_calibration, 'RESULT_PATH', str(tmp_path / 'profile_calibration.json'))
+    monkeypatch.setattr(profile_calibration, '_encode_for_calibration', lambda frame_data: None)
+    monkeypatch.setattr(rs_manager, 'calls', calls, raising=False)
+    monkeypatch.setattr(rs_manager, 'timeout_width', 0, raising=False)
+    return rs_manager
+
+
+def _calibrate():
+    return asyncio.run(profile_calibration.calibrate_stream_profile(
+        {'frames': 3, 'warmup_frames': 1, 'cpu_budget': 1e9, 'latency_budget_ms': 1e9}
+    ))
+
+
+def test_timeout_moves_on_to_next_candidate(manager):
+    manager.timeout_width = 1280
+    result = _calibrate()
+
+    assert result['chosen'] == {'width': 640, 'height': 480, 'fps': 30}
+    first, second = result['measurements'][:2]
+    assert first['ok'] is False and 'error' in first
+    assert second['ok'] is True
+    assert manager.calls['reconfigure'][0]['width'] == 640
+
+
+def test_all_candidates_timing_out_restores_pipeline(manager):
+    manager.timeout_width = 0
+    assert _calibrate() is None
+    assert manager.calls['restart'] == 1
+    assert manager.calls['reconfigure'] == []
+
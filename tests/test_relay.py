@@ -0,0 +1,57 @@
+import time
+
+import pytest
+
+import frame_encoder
+from frame_cache import EncodedFrame, EncodedFrameCache
+from realsense_manager import FrameData
+from relay import RelaySource
+from subscriptions import parse_subscription
+
+
+@pytest.fixture
+def relay(monkeypatch):
+    source = RelaySource()
+    monkeypatch.setattr(source, 'enabled', True)
+    monkeypatch.setattr(source, 'options', {'streams': 'color,depth:png16', 'priority': 'high'})
+    monkeypatch.setattr(source, '_variants', {})
+    return source
+
+
+def test_relayed_subscription_is_accepted(relay):
+    relay.check_subscription(parse_subscription({'streams': ['color', 'depth:png16', 'metadata:json']}))
+    relay.check_subscription(parse_subscription({'streams': ['depth:png16']}))
+
+
+@pytest.mark.parametrize('streams', [
+    ['color:png'],               # 같은 스트림의 다른 포맷
+    ['color', 'pointcloud'],     # 받지 않는 스트림
+    ['depth'],                   # depth:jpeg (릴레이는 png16만 받음)
+    ['color:h264'],              # 비디오 코덱
+    ['color', 'imu'],            # 릴레이에는 IMU가 없음
+])
+def test_unrelayed_subscription_is_rejected(relay, streams):
+    with pytest.raises(ValueError):
+        relay.check_subscription(parse_subscription({'streams': streams}))
+
+
+def test_camera_mode_accepts_everything(monkeypatch):
+    source = RelaySource()
+    monkeypatch.setattr(source, 'enabled', False)
+    source.check_subscription(parse_subscription({'streams': ['color:png', 'imu']}))
+
+
+def test_relayed_frame_is_never_encoded(monkeypatch):
+    def fail(*args, **kwargs):
+        raise AssertionError("relay must not configure encoders")
+
+    monkeypatch.setattr(frame_encoder, 'configure_encoders', fail)
+    monkeypatch.setattr(frame_encoder, '_encoders', {})
+    frame = FrameData(time.time(), None, None, None, sequence=7, relayed=True)
+    cache = EncodedFrameCache()
+    cache.put(frame_encoder.COLOR_JPEG, EncodedFrame('color', 'jpeg', 7, frame.timestamp, 4, 2, b'jpeg'))
+
+    assert frame_encoder.encode_variant(frame_encoder.COLOR_JPEG, frame).data == b'jpeg'
+    # 캐시에 없는 변형('auto' 포함)은 인코딩하지 않고 None
+    assert frame_encoder.encode_variant(frame_encoder.COLOR_AUTO, frame) is None
+    assert frame_encoder.encode_variant(frame_encoder.DEPTH_PNG16, frame) is None
@@ -0,0 +1,125 @@
+import asyncio
+import time
+from types import SimpleNamespace
+
+import pytest
+
+from motion_gate import MotionGate
+from realsense_manager import FrameData, RealSenseManager
+from room_broadcast import ROOM_PREFIX, BroadcastScheduler
+from subscriptions import parse_subscription
+
+
+class StubSio:
+    """룸 입장/퇴장과 emit을 기록하고, sid별 engine.io 송신 큐 깊이를 흉내 내는 Socket.IO 서버"""
+
+    def __init__(self):
+        self.rooms = {}
+        self.emitted = []
+        self.queue_depth = {}
+        self.manager = SimpleNamespace(eio_sid_from_sid=lambda sid, namespace: sid)
+        self.eio = SimpleNamespace(sockets=self)
+
+    def get(self, sid):
+        depth = self.queue_depth.get(sid, 0)
+        return SimpleNamespace(queue=SimpleNamespace(qsize=lambda: depth))
+
+    async def enter_room(self, sid, room):
+        self.rooms.setdefault(room, set()).add(sid)
+
+    async def leave_room(self, sid, room):
+        self.rooms.get(room, set()).discard(sid)
+
+    async def emit(self, event, data=None, to=None, skip_sid=None):
+        self.emitted.append((event, data, to, skip_sid))
+
+
+@pytest.fixture
+def frames(monkeypatch):
+    """10ms마다 새 프레임을 내는 lease_new_frame"""
+    monkeypatch.setattr(MotionGate(), 'enabled', False)
+    sequence = 0
+
+    async def lease_new_frame(last_sequence, timeout):
+        nonlocal sequence
+        await asyncio.sleep(0.01)
+        sequence += 1
+        return FrameData(time.time(), None, None, None, sequence=sequence)
+
+    monkeypatch.setattr(RealSenseManager(), 'lease_new_frame', lease_new_frame)
+
+
+def _scheduler():
+    built = []
+
+    async def build_payload(frame_data, subscription):
+        built.append(frame_data.sequence)
+        return {'sequence': frame_data.sequence}
+
+    sio = StubSio()
+    return BroadcastScheduler(sio, build_payload), sio, built
+
+
+def test_join_leave_and_teardown(frames):
+    color = parse_subscription('color')
+    depth = parse_subscription('depth')
+
+    async def run():
+        scheduler, sio, built = _scheduler()
+        await scheduler.join('a', color)
+        await scheduler.join('b', color)
+        room = ROOM_PREFIX + color.signature()
+        assert set(scheduler.get_stats()) == {room}
+        assert sio.rooms[room] == {'a', 'b'}
+        task = scheduler._rooms[room].task
+
+        await asyncio.sleep(0.1)
+        assert built and all(to == room for _, _, to, _ in sio.emitted)
+
+        # 다른 구독으로 옮기면 이전 룸에서 빠집니다.
+        await scheduler.join('b', depth)
+        assert sio.rooms[room] == {'a'} and scheduler.get_stats()[room]['members'] == 1
+        await scheduler.leave('a')
+        assert room not in scheduler.get_stats() and task.done()
+        assert not scheduler.is_streaming('a') and scheduler.is_streaming('b')
+
+        await scheduler.stop()
+        assert scheduler.get_stats() == {} and not scheduler.is_streaming('b')
+
+    asyncio.run(run())
+
+
+def test_slow_members_are_skipped(frames):
+    subscription = parse_subscription('color')
+
+    async def run():
+        scheduler, sio, built = _scheduler()
+        sio.queue_depth['slow'] = scheduler.max_client_queue + 1
+        await scheduler.join('fast', subscription)
+        await scheduler.join('slow', subscription)
+        await asyncio.sleep(0.1)
+        await scheduler.stop()
+        return sio, built
+
+    sio, built = asyncio.run(run())
+    frame_events = [entry for entry in sio.emitted if entry[0] == 'frame_data']
+    assert frame_events and all(skip == ['slow'] for _, _, _, skip in frame_events)
+    assert len(built) == len(frame_events)
+
+
+def test_all_slow_members_skip_encoding(frames):
+    subscription = parse_subscription('color')
+
+    async def run():
+        scheduler, sio, built = _scheduler()
+        sio.queue_depth.update({'a': 99, 'b': 99})
+        await scheduler.join('a', subscription)
+        await scheduler.join('b', subscription)
+        await asyncio.sleep(0.1)
+        stats = scheduler.get_stats()
+        await scheduler.stop()
+        return sio, built, stats
+
+    sio, built, stats = asyncio.run(run())
+    assert built == [] and sio.emitted == []
+    assert list(stats.values())[0]['slow'] == 2
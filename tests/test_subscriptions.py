@@ -0,0 +1,41 @@
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+import socketio_server
+from subscriptions import parse_subscription
+
+
+def test_parse_accepted_forms():
+    assert parse_subscription(None).streams == {'color': 'jpeg', 'depth': 'jpeg'}
+    assert parse_subscription('color,depth:png16').streams == {'color': 'jpeg', 'depth': 'png16'}
+    assert parse_subscription(('color',)).streams == {'color': 'jpeg'}
+    subscription = parse_subscription({'streams': {'depth': 'png16'}, 'priority': 'high'})
+    assert subscription.streams == {'depth': 'png16'} and subscription.priority == 'high'
+
+
+@pytest.mark.parametrize('data', [5, 1.5, True, object(), {'streams': 5}, {'streams': True}])
+def test_parse_rejects_other_types_with_value_error(data):
+    with pytest.raises(ValueError):
+        parse_subscription(data)
+
+
+class StubSio:
+    def __init__(self):
+        self.emitted = []
+
+    async def emit(self, event, data=None, to=None, **kwargs):
+        self.emitted.append((event, data, to))
+
+
+@pytest.mark.parametrize('handler', [socketio_server.start_streaming, socketio_server.update_subscription])
+@pytest.mark.parametrize('data', [5, {'streams': 5}])
+def test_invalid_subscription_emits_error_event(handler, data):
+    sio = StubSio()
+    streaming = handler is socketio_server.update_subscription
+    endpoint = SimpleNamespace(sio=sio, compact=False,
+                               broadcaster=SimpleNamespace(is_streaming=lambda sid: streaming))
+    asyncio.run(handler(endpoint, 'sid-1', data))
+    assert [(event, to) for event, _, to in sio.emitted] == [('error', 'sid-1')]
+    assert 'Invalid subscription' in sio.emitted[0][1]['message']
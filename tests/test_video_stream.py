@@ -0,0 +1,73 @@
+import asyncio
+import threading
+import time
+
+import numpy as np
+
+import video_stream
+from realsense_manager import FrameData, RealSenseManager
+
+
+class FakeEncoder:
+    """인코딩에 시간이 걸리고, 사용 중에 닫히거나 두 스레드가 동시에 쓰면 기록하는 인코더"""
+
+    instances = []
+
+    def __init__(self, variant, width, height, fps, options):
+        self.width, self.height = width, height
+        self.busy = threading.Lock()
+        self.closed = False
+        self.errors = []
+        FakeEncoder.instances.append(self)
+
+    def encode(self, image, force_keyframe=False, pixel_format='bgr24'):
+        if not self.busy.acquire(blocking=False):
+            self.errors.append('concurrent encode')
+            return []
+        try:
+            time.sleep(0.2)
+            if self.closed:
+                self.errors.append('closed during encode')
+            return [(b'packet', True)]
+        finally:
+            self.busy.release()
+
+    def close(self):
+        if self.busy.locked():
+            self.errors.append('closed while encoding')
+        self.closed = True
+
+
+def test_resubscribe_during_encode_uses_separate_encoder(monkeypatch):
+    FakeEncoder.instances = []
+    monkeypatch.setattr(video_stream, 'VideoEncoder', FakeEncoder)
+    image = np.zeros((4, 6, 3), dtype=np.uint8)
+    sequence = 0
+
+    async def lease_new_frame(last_sequence, timeout):
+        nonlocal sequence
+        await asyncio.sleep(0.01)
+        sequence += 1
+        return FrameData(time.time(), image, None, None, sequence=sequence)
+
+    monkeypatch.setattr(RealSenseManager(), 'lease_new_frame', lease_new_frame)
+
+    async def run():
+        async def send(packet):
+            pass
+
+        broadcaster = video_stream.VideoBroadcaster(video_stream.COLOR_H264)
+        broadcaster.subscribe('a', send)
+        await asyncio.sleep(0.1)  # 첫 인코딩이 작업자 스레드에서 진행 중
+        first_task = broadcaster._task
+        broadcaster.unsubscribe('a')
+        broadcaster.subscribe('a', send)
+        await asyncio.sleep(0.5)
+        broadcaster.unsubscribe('a')
+        await asyncio.wait_for(first_task, 2)
+        await asyncio.sleep(0.5)
+
+    asyncio.run(run())
+    assert len(FakeEncoder.instances) == 2
+    assert all(encoder.closed for encoder in FakeEncoder.instances)
+    assert [error for encoder in FakeEncoder.instances for error in encoder.errors] == []
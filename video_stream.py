@@ -0,0 +1,322 @@
+"""
+비디오 코덱 스트리밍 (H.264 / VP8)
+컬러 프레임을 프레임 간 압축(소프트웨어 인코더, PyAV/ffmpeg)으로 인코딩하여
+엘리멘터리 스트림 패킷으로 구독자에게 전달합니다.
+
+    - 모든 구독자가 하나의 인코더 출력을 공유합니다. (프레임당 인코딩 1회)
+    - 새 구독자는 캐시된 최신 키프레임을 즉시 받고, 다음 프레임은 강제 키프레임으로 인코딩됩니다.
+    - 느린 구독자의 큐가 넘치면 다음 키프레임까지 패킷을 건너뛰고 키프레임을 요청합니다.
+
+PyAV(`pip install av`)가 설치되어 있어야 합니다.
+"""
+
+import asyncio
+import logging
+from dataclasses import dataclass
+from fractions import Fraction
+from typing import Optional, Dict, Any, List, Tuple, Callable, Awaitable
+import numpy as np
+from config import Config
+from frame_cache import EncodedFrame
+from realsense_manager import RealSenseManager
+
+logger = logging.getLogger(__name__)
+
+# --- 스트림 변형 이름 ---
+COLOR_H264 = 'color:h264'
+COLOR_VP8 = 'color:vp8'
+
+# 변형 -> (코덱 이름, ffmpeg 인코더, 기본 옵션)
+VIDEO_CODECS: Dict[str, tuple] = {
+    COLOR_H264: ('h264', 'libx264', {'preset': 'ultrafast', 'tune': 'zerolatency', 'forced-idr': '1'}),
+    COLOR_VP8: ('vp8', 'libvpx', {'deadline': 'realtime', 'cpu-used': '8', 'lag-in-frames': '0'}),
+}
+
+# 새 프레임 대기 타임아웃 (초)
+FRAME_WAIT_TIMEOUT = 1.0
+
+
+@dataclass
+class VideoPacket:
+    """인코딩된 비디오 패킷"""
+    codec: str
+    sequence: int
+    timestamp: float
+    width: int
+    height: int
+    keyframe: bool
+    data: bytes
+
+    def to_encoded_frame(self) -> EncodedFrame:
+        return EncodedFrame(
+            stream='color',
+            codec=self.codec,
+            sequence=self.sequence,
+            timestamp=self.timestamp,
+            width=self.width,
+            height=self.height,
+            data=self.data,
+        )
+
+    def to_payload(self) -> Dict[str, Any]:
+        """Socket.IO 'video_packet' 이벤트 페이로드 (data는 바이너리로 전송됨)"""
+        return {
+            'codec': self.codec,
+            'sequence': self.sequence,
+            'timestamp': self.timestamp,
+            'width': self.width,
+            'height': self.height,
+            'keyframe': self.keyframe,
+            'data': self.data,
+        }
+
+
+def is_video_available() -> bool:
+    """PyAV가 설치되어 있는지 여부"""
+    try:
+        import av  # noqa: F401
+        return True
+    except ImportError:
+        return False
+
+
+class VideoEncoder:
+    """PyAV 기반 소프트웨어 비디오 인코더"""
+
+    def __init__(self, variant: str, width: int, height: int, fps: int, options: Dict[str, Any]):
+        import av
+
+        codec, encoder_name, codec_options = VIDEO_CODECS[variant]
+        self.codec = codec
+        self.width = width
+        self.height = height
+        self._frame_index = 0
+
+        self._context = av.CodecContext.create(encoder_name, 'w')
+        self._context.width = width
+        self._context.height = height
+        self._context.pix_fmt = 'yuv420p'
+        self._context.time_base = Fraction(1, fps)
+        self._context.framerate = Fraction(fps, 1)
+        self._context.bit_rate = int(options.get('bitrate', 1_500_000))
+        self._context.gop_size = int(options.get('gop', fps * 2))
+        self._context.options = {**codec_options, **options.get('codec_options', {})}
+        self._context.open()
+
+        # PyAV 버전에 따라 픽처 타입 표현이 다릅니다.
+        picture_type = getattr(av.video.frame, 'PictureType', None)
+        self._keyframe_type = picture_type.I if picture_type is not None else 'I'
+        self._av = av
+
+    def encode(self, image: np.ndarray, force_keyframe: bool = False, pixel_format: str = 'bgr24') -> List[tuple]:
+        """이미지(BGR 또는 pixel_format='yuyv422'인 카메라 원본 YUYV)를 인코딩하여 (bytes, is_keyframe) 목록을 반환합니다."""
+        frame = self._av.VideoFrame.from_ndarray(image, format=pixel_format)
+        frame.pts = self._frame_index
+        self._frame_index += 1
+        if force_keyframe:
+            frame.pict_type = self._keyframe_type
+        return [(bytes(packet), bool(packet.is_keyframe)) for packet in self._context.encode(frame)]
+
+    def close(self):
+        try:
+            for _ in self._context.encode(None):
+                pass
+        except Exception:
+            pass
+
+
+class VideoSubscriber:
+    """비디오 구독자 (전송 방식별 send 코루틴과 전용 큐를 가짐)"""
+
+    def __init__(self, subscriber_id, send: Callable[[VideoPacket], Awaitable[None]], queue_size: int):
+        self.subscriber_id = subscriber_id
+        self.send = send
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=queue_size)
+        self.waiting_for_keyframe = True
+        self.dropped_packets = 0
+        self.task: Optional[asyncio.Task] = None
+
+
+class VideoBroadcaster:
+    """하나의 비디오 변형을 인코딩하여 모든 구독자에게 분배합니다."""
+
+    def __init__(self, variant: str):
+        self.variant = variant
+        self.codec = VIDEO_CODECS[variant][0]
+        self.options = Config().get_video_config()
+        self._subscribers: Dict[Any, VideoSubscriber] = {}
+        self._task: Optional[asyncio.Task] = None
+        self._force_keyframe = False
+        self._reset_encoder = False
+        self.latest_keyframe: Optional[VideoPacket] = None
+
+    def subscribe(self, subscriber_id, send: Callable[[VideoPacket], Awaitable[None]]):
+        """구독자를 추가합니다. 캐시된 키프레임을 즉시 보내고 다음 프레임을 키프레임으로 요청합니다."""
+        self.unsubscribe(subscriber_id)
+        subscriber = VideoSubscriber(subscriber_id, send, int(self.options.get('queue_size', 30)))
+        if self.latest_keyframe is not None:
+            subscriber.queue.put_nowait(self.latest_keyframe)
+        subscriber.task = asyncio.create_task(self._drain(subscriber))
+        self._subscribers[subscriber_id] = subscriber
+        self._force_keyframe = True
+
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+        logger.info(f"[{self.variant}] 비디오 구독자 추가: {subscriber_id} (총 {len(self._subscribers)}명)")
+
+    def is_subscribed(self, subscriber_id) -> bool:
+        return subscriber_id in self._subscribers
+
+    def unsubscribe(self, subscriber_id):
+        subscriber = self._subscribers.pop(subscriber_id, None)
+        if subscriber is None:
+            return
+        if subscriber.task:
+            subscriber.task.cancel()
+        logger.info(f"[{self.variant}] 비디오 구독자 해제: {subscriber_id} (총 {len(self._subscribers)}명)")
+        if not self._subscribers and self._task:
+            self._task.cancel()
+            self._task = None
+
+    async def _drain(self, subscriber: VideoSubscriber):
+        """구독자 큐의 패킷을 순서대로 전송합니다."""
+        try:
+            while True:
+                packet = await subscriber.queue.get()
+                await subscriber.send(packet)
+        except asyncio.CancelledError:
+            pass
+        except Exception as e:
+            logger.warning(f"[{self.variant}] 비디오 패킷 전송 실패 ({subscriber.subscriber_id}): {e}")
+
+    def _dispatch(self, packet: VideoPacket):
+        """패킷을 모든 구독자 큐에 넣습니다. 넘치는 구독자는 다음 키프레임부터 다시 받습니다."""
+        if packet.keyframe:
+            self.latest_keyframe = packet
+        for subscriber in self._subscribers.values():
+            if subscriber.waiting_for_keyframe and not packet.keyframe:
+                continue
+            try:
+                subscriber.queue.put_nowait(packet)
+                if packet.keyframe:
+                    subscriber.waiting_for_keyframe = False
+            except asyncio.QueueFull:
+                # 참조 프레임이 끊기므로 큐를 비우고 키프레임부터 다시 시작합니다.
+                while not subscriber.queue.empty():
+                    subscriber.queue.get_nowait()
+                    subscriber.dropped_packets += 1
+                subscriber.waiting_for_keyframe = True
+                self._force_keyframe = True
+
+    def _encode(self, encoder: Optional[VideoEncoder], image: np.ndarray, pixel_format: str,
+                force_keyframe: bool) -> Tuple[VideoEncoder, List[tuple]]:
+        """(executor에서 실행) 필요하면 인코더를 (재)생성하고 이미지를 인코딩하여 (인코더, 패킷 목록)을 반환합니다."""
+        height, width = image.shape[:2]
+        if encoder is None or self._reset_encoder or (encoder.width, encoder.height) != (width, height):
+            self._reset_encoder = False
+            if encoder is not None:
+                encoder.close()
+            fps = Config().get_realsense_config().get('fps', 15)
+            encoder = VideoEncoder(self.variant, width, height, fps, self.options)
+            force_keyframe = True
+            logger.info(f"[{self.variant}] 비디오 인코더 생성: {width}x{height}@{fps}")
+        return encoder, encoder.encode(image, force_keyframe, pixel_format)
+
+    async def _run(self):
+        """새 컬러 프레임마다 한 번 인코딩하여 구독자에게 분배합니다.
+
+        인코더는 이 작업만 사용합니다. 구독 해제 직후 다시 구독하면 새 작업이 자신의 인코더를 만들고,
+        이전 작업은 작업자 스레드에서 진행 중인 인코딩이 끝난 뒤에 자신의 인코더를 닫습니다.
+        """
+        rs_manager = RealSenseManager()
+        loop = asyncio.get_event_loop()
+        last_sequence = 0
+        encoder: Optional[VideoEncoder] = None
+        in_flight: Optional[asyncio.Future] = None
+        try:
+            while self._subscribers:
+                frame_data = await rs_manager.lease_new_frame(last_sequence, FRAME_WAIT_TIMEOUT)
+                if frame_data is None:
+                    continue
+                with rs_manager.leased_frame(frame_data):
+                    last_sequence = frame_data.sequence
+                    if not frame_data.has_color:
+                        continue
+
+                    force_keyframe, self._force_keyframe = self._force_keyframe, False
+                    # YUYV는 yuv420p로 크로마만 줄이면 되므로 BGR을 거치지 않고 바로 넘깁니다.
+                    if frame_data.color_yuyv is not None:
+                        image, pixel_format = frame_data.color_yuyv, 'yuyv422'
+                    else:
+                        image, pixel_format = frame_data.color_frame, 'bgr24'
+                    # 취소되어도 작업자 스레드의 인코딩은 멈추지 않으므로, finally에서 결과를 기다릴 수 있게 보호하고
+                    # 프레임도 스레드의 인코딩이 끝날 때까지 따로 임대합니다.
+                    in_flight = loop.run_in_executor(None, self._encode, encoder, image, pixel_format, force_keyframe)
+                    if rs_manager.lease_frame(frame_data):
+                        in_flight.add_done_callback(lambda _, frame=frame_data: rs_manager.release_frame(frame))
+                    encoder, packets = await asyncio.shield(in_flight)
+                    in_flight = None
+                    for data, keyframe in packets:
+                        self._dispatch(VideoPacket(
+                            codec=self.codec,
+                            sequence=frame_data.sequence,
+                            timestamp=frame_data.timestamp,
+                            width=image.shape[1],
+                            height=image.shape[0],
+                            keyframe=keyframe,
+                            data=data,
+                        ))
+        except asyncio.CancelledError:
+            pass
+        except Exception as e:
+            logger.error(f"[{self.variant}] 비디오 인코딩 오류: {e}", exc_info=True)
+        finally:
+            if in_flight is not None:
+                try:
+                    encoder, _ = await in_flight
+                except (Exception, asyncio.CancelledError):
+                    pass
+            if encoder is not None:
+                await loop.run_in_executor(None, encoder.close)
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "subscribers": len(self._subscribers),
+            "dropped_packets": sum(s.dropped_packets for s in self._subscribers.values()),
+            "has_keyframe": self.latest_keyframe is not None,
+        }
+
+
+_broadcasters: Dict[str, VideoBroadcaster] = {}
+
+
+def get_video_broadcaster(variant: str) -> VideoBroadcaster:
+    """변형별 VideoBroadcaster를 반환합니다. (PyAV가 없으면 ValueError)"""
+    if variant not in VIDEO_CODECS:
+        raise ValueError(f"Unknown video variant: {variant}")
+    if not is_video_available():
+        raise ValueError("Video streaming requires PyAV (pip install av)")
+    broadcaster = _broadcasters.get(variant)
+    if broadcaster is None:
+        broadcaster = _broadcasters[variant] = VideoBroadcaster(variant)
+    return broadcaster
+
+
+def on_stream_profile_changed(changes: Dict[str, Any]):
+    """해상도/FPS가 바뀌면 다음 프레임에서 인코더를 다시 만들고 이전 키프레임 캐시를 버립니다."""
+    if not {'width', 'height', 'fps'} & set(changes):
+        return
+    for broadcaster in _broadcasters.values():
+        broadcaster._reset_encoder = True
+        broadcaster.latest_keyframe = None
+
+
+def update_video_subscriptions(subscriber_id, variants, send: Callable[[VideoPacket], Awaitable[None]]):
+    """구독자의 비디오 변형 구독을 variants와 일치시킵니다. 이미 구독 중인 변형은 유지됩니다."""
+    for variant in VIDEO_CODECS:
+        if variant in variants:
+            broadcaster = get_video_broadcaster(variant)
+            if not broadcaster.is_subscribed(subscriber_id):
+                broadcaster.subscribe(subscriber_id, send)
+        elif variant in _broadcasters:
+            _broadcasters[variant].unsubscribe(subscriber_id)
@@ -0,0 +1,128 @@
+"""
+바이너리 WebSocket 스트림 엔드포인트
+Socket.IO 프레이밍 없이 고정 헤더 + 인코딩 바이트만 전송하는 경량 경로입니다.
+제어(start/stop 등)는 계속 Socket.IO로 하고, 지연에 민감한 클라이언트만 이 경로를 사용합니다.
+
+사용법:
+    ws://<host>:8080/ws?streams=color,depth:png16,pointcloud&priority=low
+    연결 후 텍스트 메시지 {"streams": ["color"]} 로 구독 스트림을 변경할 수 있습니다.
+    (스트림/포맷 형식은 subscriptions.parse_subscription 참고)
+"""
+
+import asyncio
+import json
+import logging
+import time
+from aiohttp import web, WSMsgType
+from binary_protocol import pack_frame, FLAG_KEYFRAME
+from frame_encoder import encode_variant_async
+from motion_gate import MotionGate
+from overload_governor import OverloadGovernor
+from relay import RelaySource
+from realsense_manager import RealSenseManager
+from subscriptions import SubscriptionRegistry, parse_subscription
+from video_stream import update_video_subscriptions
+
+logger = logging.getLogger(__name__)
+
+# 새 프레임 대기 타임아웃 (초). 연결 종료 여부를 주기적으로 확인하기 위함
+FRAME_WAIT_TIMEOUT = 1.0
+
+
+async def _send_frames(ws: web.WebSocketResponse, consumer_id: str):
+    """새 프레임이 도착할 때마다 구독 중인 스트림을 바이너리로 전송합니다."""
+    rs_manager = RealSenseManager()
+    registry = SubscriptionRegistry()
+    governor = OverloadGovernor()
+    motion_gate = MotionGate()
+    last_sequence = 0
+    last_sent_at = float('-inf')
+    while not ws.closed:
+        frame_data = await rs_manager.lease_new_frame(last_sequence, FRAME_WAIT_TIMEOUT)
+        if frame_data is None:
+            continue
+        with rs_manager.leased_frame(frame_data):
+            if last_sequence:
+                governor.report_client_backlog(consumer_id, frame_data.sequence - last_sequence - 1)
+            last_sequence = frame_data.sequence
+
+            subscription = registry.get(consumer_id)
+            if subscription is None or governor.should_pause(subscription):
+                continue
+            if not motion_gate.should_send(frame_data, last_sent_at):
+                continue
+            for variant in subscription.variants().values():
+                encoded = await encode_variant_async(variant, frame_data)
+                if encoded is not None:
+                    await ws.send_bytes(pack_frame(encoded))
+            last_sent_at = time.monotonic()
+
+
+def _video_sender(ws: web.WebSocketResponse):
+    """비디오 패킷을 바이너리 헤더(키프레임 플래그 포함)와 함께 전송하는 코루틴을 만듭니다."""
+    async def send(packet):
+        if not ws.closed:
+            await ws.send_bytes(pack_frame(packet.to_encoded_frame(), FLAG_KEYFRAME if packet.keyframe else 0))
+    return send
+
+
+async def websocket_stream_handler(request: web.Request) -> web.WebSocketResponse:
+    """바이너리 프레임 스트림 WebSocket 핸들러"""
+    ws = web.WebSocketResponse(heartbeat=10.0)
+    await ws.prepare(request)
+
+    try:
+        subscription = parse_subscription({
+            'streams': request.query.get('streams'),
+            'priority': request.query.get('priority'),
+        })
+        RelaySource().check_subscription(subscription)
+        update_video_subscriptions(f"ws:{id(ws)}", subscription.video_variants(), _video_sender(ws))
+    except ValueError as e:
+        await ws.close(code=4400, message=str(e).encode('utf-8')[:120])
+        return ws
+
+    consumer_id = f"ws:{id(ws)}"
+    logger.info(f"Binary WebSocket client connected: {request.remote} streams={subscription.to_dict()}")
+
+    rs_manager = RealSenseManager()
+    registry = SubscriptionRegistry()
+    registry.subscribe(consumer_id, subscription)
+    await rs_manager.add_consumer(consumer_id, subscription.hardware_streams())
+    sender = asyncio.create_task(_send_frames(ws, consumer_id))
+
+    try:
+        async for msg in ws:
+            if msg.type == WSMsgType.TEXT:
+                try:
+                    command = json.loads(msg.data)
+                    if 'streams' in command:
+                        subscription = parse_subscription(command)
+                        RelaySource().check_subscription(subscription)
+                        update_video_subscriptions(consumer_id, subscription.video_variants(), _video_sender(ws))
+                        registry.subscribe(consumer_id, subscription)
+                        await rs_manager.add_consumer(consumer_id, subscription.hardware_streams())
+                        logger.info(f"Binary WebSocket client {request.remote} streams={subscription.to_dict()}")
+                except (ValueError, TypeError) as e:
+                    logger.warning(f"Invalid control message from {request.remote}: {e}")
+            elif msg.type == WSMsgType.ERROR:
+                logger.warning(f"Binary WebSocket error: {ws.exception()}")
+    finally:
+        sender.cancel()
+        try:
+            await sender
+        except (asyncio.CancelledError, ConnectionResetError):
+            pass
+        except Exception as e:
+            logger.error(f"Binary WebSocket sender failed: {e}", exc_info=True)
+        registry.unsubscribe(consumer_id)
+        update_video_subscriptions(consumer_id, set(), None)
+        await rs_manager.remove_consumer(consumer_id)
+        logger.info(f"Binary WebSocket client disconnected: {request.remote}")
+
+    return ws
+
+
+def setup_routes(app: web.Application):
+    """aiohttp 앱에 바이너리 WebSocket 경로를 등록합니다."""
+    app.router.add_get('/ws', websocket_stream_handler)